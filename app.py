@@ -1,6 +1,8 @@
 """Streamlit Financial Education Bot - Lightweight Version"""
 import streamlit as st
 import os
+from bot import FinancialBot
+from metrics import get_default_metrics
 
 st.set_page_config(page_title="💰 Financial Bot", layout="wide")
 
@@ -11,15 +13,22 @@ try:
 except:
     api_key = os.getenv("MISTRAL_API_KEY")
 
-# Initialize session state
-if 'history' not in st.session_state:
-    st.session_state.history = []
+metrics = get_default_metrics()
+
+# What the user typed and saw, kept apart from the bot's token-budgeted prompt history
+if 'transcript' not in st.session_state:
+    st.session_state.transcript = []
 
 # Sidebar
 with st.sidebar:
     st.title("🤖 Financial Bot")
-    if st.button("Clear Chat"):
-        st.session_state.history = []
+    if st.button("Clear Chat") and 'bot' in st.session_state:
+        st.session_state.bot.history.clear()
+        st.session_state.transcript = []
+    if 'bot' in st.session_state:
+        st.caption(f"Prompt tokens (last request): {st.session_state.bot.history.last_prompt_tokens}")
+    with st.expander("📈 Metrics"):
+        st.code(metrics.summary())
 
 # Main UI
 st.title("💰 Financial Education Bot")
@@ -31,105 +40,122 @@ if not api_key:
     st.info("Steps: App Settings → Advanced settings → Secrets → Add MISTRAL_API_KEY")
 else:
     st.success("✅ API Key loaded successfully!")
-    
-    # Import Mistral only if key exists
-    from mistralai import Mistral
-    
-    client = Mistral(api_key=api_key)
-    
+
+    # Built once per server process, not on every Streamlit rerun or browser session
+    @st.cache_resource
+    def load_backend(api_key):
+        from llm_backend import make_backend
+        from llm_client import get_client
+
+        # Opens the pooled client (and starts a local model warm-up) up front
+        get_client(api_key)
+        return make_backend(api_key)
+
+    # One bot (history, caches) per browser session on the shared backend, kept across reruns
+    if 'bot' not in st.session_state:
+        bot = FinancialBot(api_key=api_key, backend=load_backend(api_key))
+        # Visitors must not read files on the host
+        bot.allow_file_access = False
+        if bot.conversation_log_error:
+            st.warning(f"Running without the conversation log: {bot.conversation_log_error}")
+        if bot.conversation_log is not None:
+            # ?session=<id> in the URL brings the conversation back after a reload or restart
+            if st.query_params.get("session"):
+                bot.resume(st.query_params["session"])
+                # Calculator replies (commands, or questions the router answered locally) were tables
+                calculators = {name[1:] for name in FinancialBot.commands.calculators()} | {"question"}
+                st.session_state.transcript = [
+                    entry
+                    for turn in bot.conversation_log.turns(bot.session_id)
+                    for entry in ({"role": "user", "content": turn.user},
+                                  {"role": "assistant", "content": turn.reply,
+                                   "code": turn.label in calculators and not turn.in_history and not turn.error})
+                ]
+            else:
+                st.query_params["session"] = bot.session_id
+        st.session_state.bot = bot
+    bot = st.session_state.bot
+
     # Helper functions
-    def calc_return(buy, sell):
-        if buy <= 0:
-            return "Error: Buy price must be positive"
-        pct = ((sell - buy) / buy) * 100
-        return f"Return: {pct:.2f}% | Profit: ${sell-buy:.2f}"
-    
-    def calc_compound(principal, rate, years, compounds=1):
-        if principal <= 0 or rate < 0 or years <= 0:
-            return "Error: Invalid values"
-        amount = principal * (1 + rate/100/compounds)**(compounds*years)
-        return f"Final: ${amount:,.2f} | Interest: ${amount-principal:,.2f}"
-    
-    def call_api(messages):
-        try:
-            response = client.chat.complete(
-                model="mistral-small-latest",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=512
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error: {str(e)}"
-    
-    def process_input(user_input):
-        lower = user_input.lower().strip()
-        
-        if lower.startswith('/calc_return'):
-            try:
-                parts = user_input.split()
-                return calc_return(float(parts[1]), float(parts[2]))
-            except:
-                return "Usage: /calc_return <buy_price> <sell_price>"
-        
-        elif lower.startswith('/compound'):
-            try:
-                parts = user_input.split()
-                principal = float(parts[1])
-                rate = float(parts[2])
-                years = int(parts[3])
-                compounds = int(parts[4]) if len(parts) > 4 else 1
-                return calc_compound(principal, rate, years, compounds)
-            except:
-                return "Usage: /compound <principal> <rate> <years> [compounds/year]"
-        
-        elif lower.startswith('/help'):
-            return """**Commands:**
-- `/calc_return 100 150` - Investment ROI
-- `/compound 1000 5 10` - Compound interest
-- Just ask questions! (e.g., "What is a stock?")"""
-        
+    def show_progress():
+        """on_progress callback: a progress bar in the current message, drawn on first use"""
+        bars = []
+
+        def update(done, total):
+            if not bars:
+                bars.append(st.progress(0.0, text="Simulating..."))
+            if done < total:
+                bars[0].progress(done / total, text="Simulating...")
+            else:
+                bars[0].empty()
+        return update
+
+    def show_distribution(result):
+        """on_simulation callback: histogram of /simulate final values"""
+        # NumPy is only imported when /simulate is actually used
+        import numpy as np
+
+        # Clipped at the 99th percentile so the tail does not flatten it
+        values = result["values"]
+        counts, edges = np.histogram(values, bins=50, range=(0, np.percentile(values, 99)))
+        st.bar_chart({"Final value ($)": [f"{e:,.0f}" for e in edges[:-1]], "Paths": counts},
+                     x="Final value ($)", y="Paths")
+
+    def help_markdown():
+        lines = [f"- `{c.example or c.name}` - {c.summary}" for c in FinancialBot.commands if not c.reads_files]
+        return "**Commands:**\n" + "\n".join(lines) + '\n- Just ask questions! (e.g., "What is a stock?")'
+
+    bot.on_simulation = show_distribution
+
+    def show_message(msg):
+        if msg.get("code"):
+            # Calculator tables are pre-formatted text
+            st.code(msg["content"], language=None)
         else:
-            # Add user message to history
-            st.session_state.history.append({"role": "user", "content": user_input})
-            
-            # Get AI response
-            response = call_api(st.session_state.history)
-            
-            # Add to history
-            st.session_state.history.append({"role": "assistant", "content": response})
-            
-            # Keep history manageable
-            if len(st.session_state.history) > 20:
-                st.session_state.history = st.session_state.history[-20:]
-            
-            return response
-    
-    # Display chat history
+            st.markdown(msg["content"])
+
+    # Display the chat as it was typed and shown, whatever the prompt history kept
     st.subheader("💬 Chat")
-    for msg in st.session_state.history:
+    transcript = st.session_state.transcript
+    for msg in transcript:
         with st.chat_message(msg["role"]):
-            st.write(msg["content"])
-    
+            show_message(msg)
+
     # Chat input
     user_input = st.chat_input("Ask a question or use a command...")
     if user_input:
         with st.chat_message("user"):
             st.write(user_input)
-        
+        transcript.append({"role": "user", "content": user_input})
+
         with st.chat_message("assistant"):
-            with st.spinner("⏳ Thinking..."):
-                response = process_input(user_input)
-            st.write(response)
-    
+            if user_input.strip().lower() == '/help':
+                reply = {"role": "assistant", "content": help_markdown()}
+                show_message(reply)
+            else:
+                bot.on_progress = show_progress()
+                response = bot.process_user_input(user_input, stream=True)
+                if isinstance(response, str):
+                    # Only calculator tables are pre-formatted; answers and errors are Markdown
+                    code = bot.last_reply_calculated and not response.startswith(("❌", "Error"))
+                    reply = {"role": "assistant", "content": response, "code": code}
+                    show_message(reply)
+                else:
+                    text = st.write_stream(response)
+                    reply = {"role": "assistant", "content": text if isinstance(text, str) else "".join(map(str, text))}
+        transcript.append(reply)
+
     # Help section
-    with st.expander("�� Help"):
+    with st.expander("📚 Help"):
         st.markdown("""
         **Try these:**
         - What is a stock?
-        - Explain P/E ratio
+        - /explain P/E ratio
         - /calc_return 100 150
         - /compound 1000 5 10
+        - /convert 100 USD EUR
+        - /amortize 300000 6.5 30
+        - /simulate 10000 7 15 30 500
         - /help
         """)
 
@@ -0,0 +1,411 @@
+"""
+Async Financial Bot - serves many concurrent chat sessions in one event loop.
+
+Each session is an AsyncSession (a FinancialBot with its own
+conversation_history) whose AI calls go through the SDK's async completion
+API. AsyncFinancialBot hosts the sessions and enforces:
+- a concurrency semaphore on in-flight LLM calls
+- backpressure: new requests are rejected once too many are queued
+- cancellation: a cancelled or failed request is rolled back out of the session history
+- bounded memory (optional): beyond max_live_sessions, or after idling, a
+  session is parked in a SessionStore as its bare conversation and restored
+  on its next message
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from bot import FinancialBot
+from llm_backend import answered_locally
+from response_cache import BaseCache, get_default_cache
+from scheduler import INTERACTIVE
+from session_store import SessionStore
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_MAX_PENDING = 1024
+
+
+class BotOverloadedError(RuntimeError):
+    """Raised when the bot already has max_pending requests queued or running"""
+
+
+class AsyncSession(FinancialBot):
+    """One chat session; AI-backed handlers return awaitables instead of strings"""
+
+    def __init__(self, host: "AsyncFinancialBot", session_id: str):
+        super().__init__(response_cache=host.response_cache, semantic_cache=host.semantic_cache,
+                         backend=host.backend)
+        self.host = host
+        self.session_id = session_id
+        self.lock = asyncio.Lock()
+        self.allow_file_access = host.allow_file_access
+        self.max_simulation_paths = host.max_simulation_paths
+        self.max_cashflow_years = host.max_cashflow_years
+        self.simulation_workers = host.simulation_workers
+        self.last_used = time.time()
+
+    def _call_mistral_api(self, user_message: str, stream: bool = False,
+                          cache_key: Optional[str] = None,
+                          history_stub: Optional[str] = None,
+                          cache: Optional[BaseCache] = None):
+        with self.metrics.stage("prompt"):
+            messages, cache_slot, cached = self._begin_call(user_message, cache_key, history_stub, cache)
+        if stream:
+            return self._astream_mistral_api(messages, cache_slot, cached)
+        return self._acall_mistral_api(messages, cache_slot, cached)
+
+    async def _acall_mistral_api(self, messages: List[Dict[str, str]],
+                                 cache_slot: Optional[Tuple[BaseCache, str]],
+                                 cached: Optional[str]) -> str:
+        """Async counterpart of FinancialBot._call_mistral_api"""
+        if cached is not None:
+            return cached
+        history_len = len(self.conversation_history)
+        estimate = self._estimate_tokens(messages)
+        try:
+            async with self.host.semaphore:
+                with self.metrics.stage("api"):
+                    response = await self.scheduler.acall(
+                        lambda: self.backend.complete_async(
+                            model=self.model,
+                            messages=messages,
+                            temperature=self.temperature,
+                            max_tokens=self.max_tokens,
+                        ),
+                        priority=INTERACTIVE,
+                        tokens=estimate,
+                    )
+        except asyncio.CancelledError:
+            self._rollback(history_len)
+            raise
+        except Exception as e:
+            self._rollback(history_len)
+            self.metrics.inc("errors_total", error=type(e).__name__)
+            return self._format_api_error(e)
+
+        if response.usage:
+            self.history.record_usage(response.usage.prompt_tokens)
+            self.scheduler.settle(estimate, response.usage.total_tokens)
+            self.metrics.record_usage(self.model, response.usage)
+        if response.choices and len(response.choices) > 0:
+            assistant_message = response.choices[0].message.content
+            self._record_assistant_message(assistant_message, None if answered_locally(response) else cache_slot)
+            return assistant_message
+        self._rollback(history_len)
+        return "Error: Could not get response from API"
+
+    async def _astream_mistral_api(self, messages: List[Dict[str, str]],
+                                   cache_slot: Optional[Tuple[BaseCache, str]],
+                                   cached: Optional[str]) -> AsyncIterator[str]:
+        """Async counterpart of FinancialBot._stream_mistral_api"""
+        if cached is not None:
+            yield cached
+            return
+        history_len = len(self.conversation_history)
+        estimate = self._estimate_tokens(messages)
+        parts = []
+        start = time.perf_counter()
+        try:
+            async with self.host.semaphore:
+                events = await self.scheduler.acall(
+                    lambda: self.backend.stream_async(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    ),
+                    priority=INTERACTIVE,
+                    tokens=estimate,
+                )
+                if answered_locally(events):
+                    cache_slot = None
+                async with events:
+                    async for event in events:
+                        if event.data.usage:
+                            self.history.record_usage(event.data.usage.prompt_tokens)
+                            self.scheduler.settle(estimate, event.data.usage.total_tokens)
+                            self.metrics.record_usage(self.model, event.data.usage)
+                        choices = event.data.choices
+                        if not choices:
+                            continue
+                        content = choices[0].delta.content
+                        if isinstance(content, str) and content:
+                            if not parts:
+                                self.metrics.observe("stage_seconds", time.perf_counter() - start, stage="first_token")
+                            parts.append(content)
+                            yield content
+        except (asyncio.CancelledError, GeneratorExit):
+            self._rollback(history_len)
+            raise
+        except Exception as e:
+            self._rollback(history_len)
+            self.metrics.inc("errors_total", error=type(e).__name__)
+            yield self._format_api_error(e)
+            return
+
+        self.metrics.observe("stage_seconds", time.perf_counter() - start, stage="stream")
+
+        if parts:
+            self._record_assistant_message("".join(parts), cache_slot)
+        else:
+            self._rollback(history_len)
+            yield "Error: Could not get response from API"
+
+    def _summarize_chunks(self, chunks: List[str], stub: str, stream: bool = False):
+        if len(chunks) < 2:
+            return super()._summarize_chunks(chunks, stub, stream)
+        if stream:
+            return self._astream_summary(chunks, stub)
+        return self._asummarize(chunks, stub)
+
+    async def _final_summary_prompt(self, chunks: List[str]) -> str:
+        # The map/reduce stage blocks on its worker pool; keep it off the event loop
+        return await asyncio.to_thread(self._summary_pipeline().final_prompt, chunks)
+
+    async def _asummarize(self, chunks: List[str], stub: str) -> str:
+        try:
+            prompt = await self._final_summary_prompt(chunks)
+        except Exception as e:
+            return self._format_api_error(e)
+        return await self._call_mistral_api(prompt, history_stub=stub)
+
+    async def _astream_summary(self, chunks: List[str], stub: str) -> AsyncIterator[str]:
+        try:
+            prompt = await self._final_summary_prompt(chunks)
+        except Exception as e:
+            yield self._format_api_error(e)
+            return
+        async for chunk in self._call_mistral_api(prompt, stream=True, history_stub=stub):
+            yield chunk
+
+    def summarize_folder(self, folder: str, output_dir: Optional[str] = None):
+        return asyncio.to_thread(super().summarize_folder, folder, output_dir)
+
+    def ask_many(self, questions: List[str]):
+        # Blocks on its worker pool; keep it off the event loop
+        return asyncio.to_thread(super().ask_many, questions)
+
+    def _then_prefetch(self, reply, term: str):
+        if asyncio.iscoroutine(reply):
+            return self._aprefetch_after(reply, term)
+        return self._aprefetch_after_stream(reply, term)
+
+    async def _aprefetch_after(self, reply, term: str) -> str:
+        answer = await reply
+        self.prefetch_related_terms(term)
+        return answer
+
+    async def _aprefetch_after_stream(self, chunks: AsyncIterator[str], term: str) -> AsyncIterator[str]:
+        async for chunk in chunks:
+            yield chunk
+        self.prefetch_related_terms(term)
+
+    def log_turn(self, user_input: str, reply, label: str, answered: int):
+        if isinstance(reply, str):
+            return super().log_turn(user_input, reply, label, answered)
+        if asyncio.iscoroutine(reply):
+            return self._alog_after(user_input, reply, label, answered)
+        return self._alog_after_stream(user_input, reply, label, answered)
+
+    async def _alog_after(self, user_input: str, reply, label: str, answered: int) -> str:
+        answer = await reply
+        self._append_turn(user_input, answer, label, answered)
+        return answer
+
+    async def _alog_after_stream(self, user_input: str, chunks: AsyncIterator[str], label: str,
+                                 answered: int) -> AsyncIterator[str]:
+        parts = []
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self._append_turn(user_input, "".join(parts), label, answered)
+
+    def run_simulation(self, *args, **kwargs):
+        # Up to SIMULATION_TIME_BUDGET seconds of NumPy work; keep it off the event loop
+        return asyncio.to_thread(super().run_simulation, *args, **kwargs)
+
+
+class AsyncFinancialBot:
+    """Hosts many AsyncSession objects behind one concurrency limit"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_pending: int = DEFAULT_MAX_PENDING,
+                 response_cache=None, semantic_cache=None,
+                 store: Optional[SessionStore] = None,
+                 max_live_sessions: Optional[int] = None,
+                 allow_file_access: bool = True, backend=None,
+                 max_simulation_paths: Optional[int] = None,
+                 max_cashflow_years: Optional[float] = None,
+                 simulation_workers: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.response_cache = response_cache if response_cache is not None else get_default_cache()
+        self.semantic_cache = semantic_cache
+        # None: each session gets llm_backend.make_backend() (Mistral, or local-first routing)
+        self.backend = backend
+        self.store = store
+        self.max_live_sessions = max_live_sessions
+        # False for untrusted (remote) users: no commands that read server files
+        self.allow_file_access = allow_file_access
+        # Calculator limits for every session (None: the settings' defaults, see FinancialBot)
+        self.max_simulation_paths = max_simulation_paths
+        self.max_cashflow_years = max_cashflow_years
+        self.simulation_workers = simulation_workers
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Least recently used first
+        self.sessions: "OrderedDict[str, AsyncSession]" = OrderedDict()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.parked = 0
+        self.restored = 0
+
+    def session(self, session_id: str) -> AsyncSession:
+        """Return the session for session_id, creating (or restoring) it on first use"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+        else:
+            session = AsyncSession(self, session_id)
+            state = self.store.take(session_id) if self.store is not None else None
+            if state is not None:
+                session.history.restore(state)
+                self.restored += 1
+            elif session.conversation_log is not None and session_id in session.conversation_log:
+                # Dropped from the store, or from before a restart: rebuild it from the transcript
+                session.resume(session_id)
+                self.restored += 1
+            self.sessions[session_id] = session
+            self._shrink()
+        session.last_used = time.time()
+        return session
+
+    def end_session(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+        if self.store is not None:
+            self.store.delete(session_id)
+
+    def _park(self, session_id: str) -> None:
+        """Move a session out of memory, keeping only its conversation (if there is a store)"""
+        session = self.sessions.pop(session_id)
+        if self.store is not None:
+            self.store.put(session_id, session.history.snapshot(), session.last_used)
+        self.parked += 1
+
+    def _shrink(self) -> None:
+        if self.max_live_sessions is None or len(self.sessions) <= self.max_live_sessions:
+            return
+        excess = len(self.sessions) - self.max_live_sessions
+        # Oldest first; sessions with a request in flight stay, and so does the newest
+        for session_id, session in list(self.sessions.items())[:-1]:
+            if not excess:
+                break
+            if not session.lock.locked():
+                self._park(session_id)
+                excess -= 1
+
+    def park_idle(self, idle_seconds: float) -> int:
+        """Park sessions unused for idle_seconds and expire old stored ones; returns how many were parked"""
+        cutoff = time.time() - idle_seconds
+        idle = [session_id for session_id, session in self.sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()]
+        for session_id in idle:
+            self._park(session_id)
+        if self.store is not None:
+            self.store.expire()
+        return len(idle)
+
+    def _admit(self) -> None:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise BotOverloadedError(
+                f"Too many pending requests ({self.pending}/{self.max_pending})"
+            )
+        self.pending += 1
+
+    async def process_user_input(self, session_id: str, user_input: str) -> str:
+        """Route one message for a session and return the full reply
+
+        Messages of the same session are handled one at a time so that its
+        history stays in order; different sessions run concurrently.
+        """
+        self._admit()
+        try:
+            session = self.session(session_id)
+            async with session.lock:
+                start = time.perf_counter()
+                result = session.process_user_input(user_input)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                    # String replies were already timed by the session itself
+                    session.metrics.record_request(session.command_label(user_input), time.perf_counter() - start)
+            self.completed += 1
+            return result
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    async def calculate(self, session: AsyncSession, command: str) -> str:
+        """Run a calculator command (no AI call) on session
+
+        Admitted and bounded like messages: it counts as pending and holds a
+        slot of the concurrency semaphore while it runs, since /simulate and
+        long schedules cost CPU time.
+        """
+        self._admit()
+        try:
+            async with self.semaphore:
+                result = session.process_user_input(command)
+                if asyncio.iscoroutine(result):
+                    result = await result
+            self.completed += 1
+            return result
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    async def stream_user_input(self, session_id: str, user_input: str) -> AsyncIterator[str]:
+        """Like process_user_input, but yield reply chunks as they arrive"""
+        self._admit()
+        try:
+            session = self.session(session_id)
+            async with session.lock:
+                start = time.perf_counter()
+                result: Union[str, AsyncIterator[str]] = session.process_user_input(user_input, stream=True)
+                timed = not isinstance(result, str)
+                try:
+                    if asyncio.iscoroutine(result):
+                        result = await result
+                    if isinstance(result, str):
+                        yield result
+                    else:
+                        async for chunk in result:
+                            yield chunk
+                finally:
+                    if timed:
+                        session.metrics.record_request(session.command_label(user_input), time.perf_counter() - start)
+            self.completed += 1
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return session and request counters"""
+        return {
+            "sessions": len(self.sessions),
+            "parked": self.parked,
+            "restored": self.restored,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "max_concurrency": self.max_concurrency,
+        }
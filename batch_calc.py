@@ -0,0 +1,160 @@
+"""
+Vectorized batch versions of the FinancialBot calculators.
+
+The scalar calculators format one result string per call; grading a portfolio
+of tens of thousands of positions that way is a Python loop plus string
+formatting per row. These functions take NumPy arrays (or a CSV/Parquet file
+of positions), compute everything in a handful of array operations and return
+arrays. Formatting is an optional last step (format_return_summary).
+
+Invalid rows (e.g. buy price <= 0) produce NaN rather than an error.
+"""
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+Table = Dict[str, np.ndarray]
+
+
+# ============================================================================
+# ARRAY CALCULATORS
+# ============================================================================
+def percentage_returns(buy_price, sell_price) -> Table:
+    """Profit/loss and percentage return for arrays of buy and sell prices"""
+    buy = np.asarray(buy_price, dtype=np.float64)
+    sell = np.asarray(sell_price, dtype=np.float64)
+    profit = sell - buy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.where(buy > 0, profit / buy * 100.0, np.nan)
+    return {"buy_price": buy, "sell_price": sell, "profit_loss": profit, "return_pct": pct}
+
+
+def compound_interest(principal, annual_rate, years, compounds_per_year=1) -> Table:
+    """Final amount and interest earned; all arguments broadcast against each other"""
+    principal = np.asarray(principal, dtype=np.float64)
+    rate = np.asarray(annual_rate, dtype=np.float64) / 100.0
+    years = np.asarray(years, dtype=np.float64)
+    n = np.asarray(compounds_per_year, dtype=np.float64)
+    valid = (principal > 0) & (rate >= 0) & (years > 0) & (n > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amount = np.where(valid, principal * np.power(1.0 + rate / n, n * years), np.nan)
+    return {"final_amount": amount, "interest_earned": amount - principal}
+
+
+def currency_conversion(amount, exchange_rate) -> np.ndarray:
+    """Convert an array of amounts; non-positive rates give NaN"""
+    amount = np.asarray(amount, dtype=np.float64)
+    rate = np.asarray(exchange_rate, dtype=np.float64)
+    return np.where(rate > 0, amount * rate, np.nan)
+
+
+# ============================================================================
+# FILE I/O
+# ============================================================================
+def load_positions(path: str) -> Table:
+    """Load a CSV or Parquet file of positions into a dict of float columns"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pandas and pyarrow (pip install pandas pyarrow)")
+        frame = pd.read_parquet(path)
+        return {str(col).strip().lower(): frame[col].to_numpy(dtype=np.float64) for col in frame.columns}
+
+    with open(path, encoding="utf-8") as f:
+        names = [name.strip().lower() for name in f.readline().split(",")]
+    # np.loadtxt has a C parser (much faster than genfromtxt on large files)
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2, dtype=np.float64, encoding="utf-8")
+    if data.shape[1] != len(names):
+        raise ValueError(f"Expected {len(names)} columns, found {data.shape[1]}")
+    return {name: data[:, i] for i, name in enumerate(names)}
+
+
+def save_table(path: str, table: Table) -> None:
+    """Write a result table to CSV"""
+    names = list(table)
+    columns = np.column_stack([np.asarray(table[name], dtype=np.float64) for name in names])
+    np.savetxt(path, columns, delimiter=",", header=",".join(names), comments="", fmt="%.6g")
+
+
+def returns_from_file(path: str) -> Table:
+    """Compute percentage returns for every position in a file
+
+    Expects buy_price and sell_price columns; an optional quantity column is
+    carried through and used to weight the summary.
+    """
+    columns = load_positions(path)
+    missing = {"buy_price", "sell_price"} - set(columns)
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+    table = percentage_returns(columns["buy_price"], columns["sell_price"])
+    if "quantity" in columns:
+        table["quantity"] = columns["quantity"]
+    return table
+
+
+def conversions_from_file(path: str, exchange_rate: float) -> Table:
+    """Convert the amount column of a CSV/Parquet file at one exchange rate"""
+    columns = load_positions(path)
+    if "amount" not in columns:
+        raise ValueError("Missing column: amount")
+    return {"amount": columns["amount"], "converted": currency_conversion(columns["amount"], exchange_rate)}
+
+
+# ============================================================================
+# SUMMARY / FORMATTING
+# ============================================================================
+def summarize_returns(table: Table) -> Dict[str, float]:
+    """Portfolio-level aggregates of a percentage_returns table"""
+    valid = np.isfinite(table["return_pct"])
+    quantity = table.get("quantity")
+    weights = quantity[valid] if quantity is not None else 1.0
+    cost = float(np.sum(table["buy_price"][valid] * weights))
+    value = float(np.sum(table["sell_price"][valid] * weights))
+    pct = table["return_pct"][valid]
+    return {
+        "positions": int(table["return_pct"].size),
+        "invalid": int((~valid).sum()),
+        "total_cost": cost,
+        "total_value": value,
+        "total_return_pct": (value - cost) / cost * 100.0 if cost > 0 else float("nan"),
+        "mean_return_pct": float(pct.mean()) if pct.size else float("nan"),
+        "best_return_pct": float(pct.max()) if pct.size else float("nan"),
+        "worst_return_pct": float(pct.min()) if pct.size else float("nan"),
+    }
+
+
+def format_return_summary(summary: Dict[str, float], output_path: Optional[str] = None) -> str:
+    """Human-readable summary in the style of the scalar calculators"""
+    text = f"""
+Batch Return Results:
+─────────────────────
+Positions:        {summary['positions']:,} ({summary['invalid']:,} invalid)
+Total Cost:       ${summary['total_cost']:,.2f}
+Total Value:      ${summary['total_value']:,.2f}
+Total Return %:   {summary['total_return_pct']:.2f}%
+Mean Return %:    {summary['mean_return_pct']:.2f}%
+Best / Worst %:   {summary['best_return_pct']:.2f}% / {summary['worst_return_pct']:.2f}%
+"""
+    if output_path:
+        text += f"Per-position results written to: {output_path}\n"
+    return text
+
+
+def format_conversion_summary(table: Table, from_currency: str, to_currency: str,
+                              exchange_rate: float, output_path: Optional[str] = None) -> str:
+    """Totals of a conversions_from_file table"""
+    valid = np.isfinite(table["converted"])
+    text = f"""
+Batch Currency Conversion:
+──────────────────────────
+Amounts:          {table['amount'].size:,} ({int((~valid).sum()):,} invalid)
+Exchange Rate:    1 {from_currency} = {exchange_rate:.6g} {to_currency}
+Total:            {float(table['amount'][valid].sum()):,.2f} {from_currency}
+Converted Total:  {float(table['converted'][valid].sum()):,.2f} {to_currency}
+"""
+    if output_path:
+        text += f"Converted amounts written to: {output_path}\n"
+    return text
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Load test: AsyncFinancialBot throughput vs. concurrency against the fake server.
+
+Every request is a distinct session asking a free-form question, so each one
+costs a full (fake) completion with the configured server latency.
+    python benchmarks/bench_async_load.py --requests 512 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_mistral import spawn_server
+
+
+async def run_level(concurrency: int, requests: int) -> float:
+    import llm_client
+    from async_bot import AsyncFinancialBot
+
+    bot = AsyncFinancialBot(max_concurrency=concurrency, max_pending=requests)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        bot.process_user_input(f"session-{i}", f"What is an ETF? ({i})")
+        for i in range(requests)
+    ))
+    elapsed = time.perf_counter() - start
+    await llm_client.aclose_clients()
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--levels", default="1,8,32,128,256")
+    args = parser.parse_args()
+
+    with spawn_server("--latency", str(args.latency)) as url:
+        os.environ.setdefault("MISTRAL_API_KEY", "bench")
+        os.environ["MISTRAL_SERVER_URL"] = url
+        print(f"{'concurrency':>12} {'req/s':>10} {'speedup':>8}")
+        baseline = None
+        for level in (int(x) for x in args.levels.split(",")):
+            requests = min(args.requests, max(level * 4, 20))
+            throughput = asyncio.run(run_level(level, requests))
+            baseline = baseline or throughput
+            print(f"{level:>12} {throughput:>10.1f} {throughput / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scalar FinancialBot calculators vs. the vectorized batch API.
+
+The scalar path is what grading a portfolio looked like before: one
+calculate_percentage_return / calculate_compound_interest call (and one
+formatted string) per row. Scalar timings above --max-scalar-rows are
+extrapolated linearly to keep the run short.
+    python benchmarks/bench_batch_calc.py --max-rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+
+import numpy as np
+
+import batch_calc
+from bot import FinancialBot
+
+
+def time_scalar(bot: FinancialBot, buy, sell, principal, rate) -> float:
+    start = time.perf_counter()
+    for b, s, p, r in zip(buy.tolist(), sell.tolist(), principal.tolist(), rate.tolist()):
+        bot.calculate_percentage_return(b, s)
+        bot.calculate_compound_interest(p, r, 10, 12)
+    return time.perf_counter() - start
+
+
+def time_vectorized(buy, sell, principal, rate) -> float:
+    start = time.perf_counter()
+    batch_calc.summarize_returns(batch_calc.percentage_returns(buy, sell))
+    batch_calc.compound_interest(principal, rate, 10, 12)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-rows", type=int, default=10_000_000)
+    parser.add_argument("--max-scalar-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    bot = FinancialBot(response_cache=None)
+
+    print(f"{'rows':>12} {'scalar s':>10} {'vector s':>10} {'speedup':>9}")
+    rows = 1_000
+    while rows <= args.max_rows:
+        buy = rng.uniform(1, 500, rows)
+        sell = buy * rng.uniform(0.5, 2.0, rows)
+        principal = rng.uniform(100, 100_000, rows)
+        rate = rng.uniform(0, 10, rows)
+
+        vector = time_vectorized(buy, sell, principal, rate)
+        if rows <= args.max_scalar_rows:
+            scalar = time_scalar(bot, buy, sell, principal, rate)
+            marker = ""
+        else:
+            n = args.max_scalar_rows
+            scalar = time_scalar(bot, buy[:n], sell[:n], principal[:n], rate[:n]) * rows / n
+            marker = "*"
+        print(f"{rows:>12,} {scalar:>9.3f}{marker or ' '} {vector:>10.4f} {scalar / vector:>8.0f}x")
+        rows *= 10
+    print("* extrapolated from --max-scalar-rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pooled shared client vs. a fresh Mistral client per call.
+
+Runs against the local fake server, so no API key or network is needed.
+    python benchmarks/bench_client_pool.py --calls 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_client
+from config import get_settings
+from fake_mistral import FakeMistralServer
+
+MESSAGES = [{"role": "user", "content": "What is an ETF?"}]
+
+
+def run_fresh(server_url: str, calls: int) -> float:
+    from mistralai import Mistral
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        client = Mistral(api_key="bench", server_url=server_url)
+        client.chat.complete(model="fake", messages=MESSAGES, max_tokens=16)
+    return time.perf_counter() - start
+
+
+def run_pooled(server_url: str, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        client = llm_client.get_client("bench", server_url)
+        client.chat.complete(model="fake", messages=MESSAGES, max_tokens=16)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = FakeMistralServer().start()
+    try:
+        fresh = run_fresh(server.url, args.calls)
+        llm_client.stats.reset()
+        pooled = run_pooled(server.url, args.calls)
+        stats = llm_client.get_stats()
+    finally:
+        llm_client.close_clients()
+        server.stop()
+
+    print(f"Fresh client per call: {fresh * 1000 / args.calls:.2f} ms/call")
+    print(f"Shared pooled client:  {pooled * 1000 / args.calls:.2f} ms/call")
+    print(f"Pool stats: {stats}")
+    if stats["reused_connections"] < args.calls - get_settings().pool_size:
+        print("❌ Connections were not reused")
+        sys.exit(1)
+    print("✅ Connections reused")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Conversation log benchmark: append cost, size, open/resume and analytics scan.
+
+Writes the same synthetic turns (--sessions x --turns, interleaved as live
+traffic would be) two ways:
+- log:  conversation_log.ConversationLog (one binary record per turn)
+- json: the per-session alternative, rewriting <session>.json with the
+        whole message list after every turn
+and reports microseconds per appended turn and bytes on disk, then, for the
+log: index rebuild on open, resuming sessions, a full analytics scan and
+compaction after erasing 10% of the sessions.
+
+    python benchmarks/bench_conversation_log.py --sessions 2000 --turns 10
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from conversation_log import ConversationLog, format_report
+
+TERMS = ["P/E ratio", "EPS", "dividend yield", "ETF", "bond", "beta", "NPV", "IRR", "market cap", "APY"]
+QUESTIONS = ["What is a stock?", "How do index funds work?", "What is diversification?",
+             "Should I pay off debt or invest?", "What is an emergency fund?"]
+
+
+def synthetic_turns(sessions: int, turns: int, seed: int):
+    rng = random.Random(seed)
+    reply = ("A financial term explained for beginners, with a short practical example. " * 6).strip()
+    order = [(f"session-{s:06d}", t) for t in range(turns) for s in range(sessions)]
+    for session_id, _ in order:
+        kind = rng.random()
+        if kind < 0.4:
+            yield session_id, f"/explain {rng.choice(TERMS)}", reply, "explain"
+        elif kind < 0.8:
+            yield session_id, rng.choice(QUESTIONS), reply, "question"
+        else:
+            yield session_id, "/calc_return 100 150", "Return %: 50.00%", "calc_return"
+
+
+def dir_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--segment-mb", type=float, default=4)
+    args = parser.parse_args()
+
+    turns = list(synthetic_turns(args.sessions, args.turns, args.seed))
+    root = tempfile.mkdtemp(prefix="bench_log_")
+    try:
+        log_dir = os.path.join(root, "log")
+        log = ConversationLog(log_dir, segment_bytes=int(args.segment_mb * 1024 * 1024), fsync=False)
+        start = time.perf_counter()
+        for session_id, user, reply, label in turns:
+            log.append(session_id, user, reply, label, prompt_tokens=120, reply_tokens=90,
+                       in_history=label != "calc_return")
+        log_s = time.perf_counter() - start
+        log.close()
+
+        json_dir = os.path.join(root, "json")
+        os.makedirs(json_dir)
+        histories = {}
+        start = time.perf_counter()
+        for session_id, user, reply, label in turns:
+            messages = histories.setdefault(session_id, [])
+            messages.append({"role": "user", "content": user, "ts": time.time()})
+            messages.append({"role": "assistant", "content": reply, "label": label})
+            with open(os.path.join(json_dir, session_id + ".json"), "w", encoding="utf-8") as f:
+                json.dump(messages, f)
+        json_s = time.perf_counter() - start
+
+        n = len(turns)
+        print(f"{n:,} turns in {args.sessions:,} sessions")
+        print(f"  append   log {log_s / n * 1e6:7.1f} us/turn   json {json_s / n * 1e6:7.1f} us/turn "
+              f"({json_s / log_s:.1f}x)")
+        print(f"  on disk  log {dir_bytes(log_dir) / 1e6:7.2f} MB        json {dir_bytes(json_dir) / 1e6:7.2f} MB")
+
+        start = time.perf_counter()
+        log = ConversationLog(log_dir, segment_bytes=int(args.segment_mb * 1024 * 1024))
+        open_s = time.perf_counter() - start
+        print(f"  open     {open_s * 1000:.1f} ms to index {log.stats()['segments']} segments")
+
+        sample = random.Random(args.seed).sample(log.sessions(), min(200, args.sessions))
+        start = time.perf_counter()
+        for session_id in sample:
+            log.turns(session_id)
+        resume_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for session_id in sample:
+            with open(os.path.join(json_dir, session_id + ".json"), encoding="utf-8") as f:
+                json.load(f)
+        json_resume_s = time.perf_counter() - start
+        print(f"  resume   log {resume_s / len(sample) * 1e6:7.1f} us/session  json {json_resume_s / len(sample) * 1e6:7.1f} us/session")
+
+        start = time.perf_counter()
+        report = log.analytics()
+        scan_s = time.perf_counter() - start
+        print(f"  analyze  {scan_s * 1000:.1f} ms ({n / scan_s:,.0f} turns/s)\n")
+        print(format_report(report))
+
+        for session_id in log.sessions()[::10]:
+            log.delete_session(session_id)
+        start = time.perf_counter()
+        result = log.compact()
+        print(f"\ncompact after erasing 10% of sessions: {result['records_before']:,} -> "
+              f"{result['records_after']:,} records, {result['bytes_before'] / 1e6:.2f} -> "
+              f"{result['bytes_after'] / 1e6:.2f} MB in {(time.perf_counter() - start) * 1000:.0f} ms")
+        log.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
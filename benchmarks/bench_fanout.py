@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Multi-question fan-out and /explain prefetch benchmark (fake Mistral server).
+
+1. Answers a list of distinct questions one blocking call at a time, then
+   with FinancialBot.answer_questions (BATCH_WORKERS threads), and reports
+   the wall time of each and the speedup.
+2. With PREFETCH_RELATED=1, asks /explain for a few terms from the relation
+   table, waits for the background prefetch, then asks /explain for one
+   related term of each and reports how many were served from the cache.
+
+    python benchmarks/bench_fanout.py --questions 40 --latency 0.2 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_mistral import spawn_server
+
+TERMS = ["P/E ratio", "dividend yield", "bond", "ETF", "volatility"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake server latency per call (s)")
+    args = parser.parse_args()
+
+    with spawn_server("--latency", str(args.latency)) as url:
+        # Settings are read once, so configure the environment before the bot is imported
+        os.environ.setdefault("MISTRAL_API_KEY", "bench")
+        os.environ["MISTRAL_SERVER_URL"] = url
+        os.environ["PREFETCH_RELATED"] = "1"
+        from bot import FinancialBot
+        from response_cache import LRUCache
+
+        questions = [f"What is the difference between asset class {i} and asset class {i + 1}?"
+                     for i in range(args.questions)]
+
+        bot = FinancialBot(response_cache=LRUCache(max_entries=10_000))
+        start = time.perf_counter()
+        sequential = [bot._complete_standalone(q) for q in questions]
+        sequential_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parallel = bot.answer_questions(questions, workers=args.workers)
+        parallel_s = time.perf_counter() - start
+        errors = sum(a.startswith("❌") for a in parallel)
+        assert len(parallel) == len(sequential)
+
+        start = time.perf_counter()
+        bot.answer_questions(questions, workers=args.workers)
+        cached_s = time.perf_counter() - start
+
+        print(f"{len(questions)} questions, {args.latency * 1000:.0f} ms per call")
+        print(f"  sequential        {sequential_s:8.2f} s")
+        print(f"  {args.workers} workers         {parallel_s:8.2f} s  ({sequential_s / parallel_s:.1f}x, {errors} errors)")
+        print(f"  again (cached)    {cached_s:8.4f} s")
+
+        from prefetch import get_default_prefetcher
+        prefetcher = get_default_prefetcher()
+        bot = FinancialBot(response_cache=LRUCache(max_entries=10_000))
+        for term in TERMS:
+            bot.process_user_input(f"/explain {term}")
+        prefetcher.join()
+
+        hits_before = bot.response_cache.hits
+        follow_ups = [prefetcher.related_terms(term)[0] for term in TERMS]
+        start = time.perf_counter()
+        for term in follow_ups:
+            bot.process_user_input(f"/explain {term}")
+        follow_up_s = time.perf_counter() - start
+        hits = bot.response_cache.hits - hits_before
+        print(f"\nPrefetch after /explain ({len(TERMS)} terms): {prefetcher.stats()}")
+        print(f"  follow-ups {', '.join(follow_ups)}")
+        print(f"  served from cache {hits}/{len(follow_ups)} in {follow_up_s * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
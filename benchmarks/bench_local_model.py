@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Local model vs. remote API: latency and throughput on this (CPU-only) machine.
+
+Sends the same short /explain and FAQ prompts to
+- local:  llm_backend.LocalBackend (the GGUF model in --model / LOCAL_MODEL_PATH;
+          needs llama-cpp-python)
+- remote: Mistral (when MISTRAL_API_KEY is set and --remote api) or the fake
+          server with --latency seconds per call (default)
+- routed: RoutingBackend on a mix of simple and long/follow-up requests
+and reports model load/warm-up time, per-request latency percentiles, reply
+tokens per second and requests per second at --concurrency.
+
+    python benchmarks/bench_local_model.py --model models/qwen2.5-1.5b-instruct-q4_k_m.gguf
+    python benchmarks/bench_local_model.py --model model.gguf --remote api --requests 40
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_mistral import spawn_server
+
+TERMS = ["P/E ratio", "EPS", "dividend yield", "ETF", "bond", "beta", "NPV", "market cap"]
+QUESTIONS = ["What is a stock?", "What is an index fund?", "What is diversification?", "What is inflation?"]
+COMPLEX = ["I am 35 with $40,000 saved and a 6% mortgage; compare paying it down with investing in index funds "
+           "over 20 years, including taxes and risk."]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(backend, prompts, concurrency, max_tokens):
+    from history import count_tokens
+    from prompts import SYSTEM_PREFIX
+
+    def one(prompt):
+        start = time.perf_counter()
+        response = backend.complete(model=os.environ.get("MISTRAL_MODEL", "mistral-small-latest"),
+                                    messages=SYSTEM_PREFIX + [{"role": "user", "content": prompt}],
+                                    temperature=0.2, max_tokens=max_tokens)
+        return time.perf_counter() - start, count_tokens(response.choices[0].message.content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, prompts))
+    wall = time.perf_counter() - start
+    latencies = [r[0] for r in results]
+    tokens = sum(r[1] for r in results)
+    return {
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "requests_per_s": len(prompts) / wall,
+        "reply_tokens_per_s": tokens / wall,
+    }
+
+
+def report(name, result):
+    print(f"  {name:<8} p50 {result['p50_ms']:8.0f} ms  p95 {result['p95_ms']:8.0f} ms  "
+          f"{result['requests_per_s']:6.2f} req/s  {result['reply_tokens_per_s']:7.1f} reply tok/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.environ.get("LOCAL_MODEL_PATH"), help="GGUF model file")
+    parser.add_argument("--remote", choices=["fake", "api"], default="fake")
+    parser.add_argument("--latency", type=float, default=0.8, help="fake remote latency per call (s)")
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=128)
+    args = parser.parse_args()
+    if not args.model:
+        parser.error("give --model (or set LOCAL_MODEL_PATH) to a GGUF chat model")
+
+    from prompts import explain_prompt
+    simple = [explain_prompt(t) for t in TERMS] + QUESTIONS
+    simple = (simple * (args.requests // len(simple) + 1))[:args.requests]
+    mixed = [p for pair in zip(simple, COMPLEX * len(simple)) for p in pair][:args.requests]
+
+    def measure(url):
+        if url:
+            os.environ["MISTRAL_SERVER_URL"] = url
+            os.environ.setdefault("MISTRAL_API_KEY", "bench")
+        os.environ["LOCAL_MODEL_PATH"] = args.model
+        os.environ["LOCAL_MODEL_PRELOAD"] = "0"
+        from config import require_api_key
+        from llm_backend import LocalBackend, MistralBackend, RoutingBackend
+
+        local = LocalBackend(max_tokens=args.max_tokens)
+        start = time.perf_counter()
+        local.warm_up()
+        if not local.wait_ready():
+            sys.exit(f"Local model unavailable: {local.load_error}")
+        print(f"Local model {os.path.basename(args.model)}: loaded and warmed up in "
+              f"{time.perf_counter() - start:.1f}s ({local.threads} threads)")
+        remote = MistralBackend(require_api_key())
+        remote_label = "Mistral API" if not url else f"fake remote, {args.latency * 1000:.0f} ms/call"
+        # Untimed: the SDK import and the first connection
+        run(remote, simple[:1], 1, args.max_tokens)
+
+        print(f"\n{len(simple)} short /explain + FAQ requests ({remote_label}):")
+        for concurrency in sorted({1, args.concurrency}):
+            print(f" concurrency {concurrency}")
+            report("local", run(local, simple, concurrency, args.max_tokens))
+            report("remote", run(remote, simple, concurrency, args.max_tokens))
+
+        routing = RoutingBackend(local, remote)
+        print(f"\n{len(mixed)} mixed requests (half long/complex), concurrency {args.concurrency}:")
+        report("remote", run(remote, mixed, args.concurrency, args.max_tokens))
+        report("routed", run(routing, mixed, args.concurrency, args.max_tokens))
+        print(f"  routes   {routing.route_stats.snapshot()}")
+
+    if args.remote == "api":
+        measure(None)
+    else:
+        with spawn_server("--latency", str(args.latency)) as url:
+            measure(url)
+
+
+if __name__ == "__main__":
+    main()
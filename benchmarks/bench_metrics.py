@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the built-in metrics.
+
+Measures what instrumentation adds to one request (a few stage timers, a
+request record and token counters), enabled vs. disabled, and how long a
+Prometheus scrape (render) takes.
+    python benchmarks/bench_metrics.py --requests 100000
+"""
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics
+
+USAGE = SimpleNamespace(prompt_tokens=250, completion_tokens=120)
+
+
+def one_request(metrics: Metrics, i: int) -> None:
+    start = time.perf_counter()
+    with metrics.stage("route"):
+        pass
+    with metrics.stage("prompt"):
+        pass
+    with metrics.stage("api"):
+        pass
+    metrics.record_usage("mistral-small-latest", USAGE)
+    metrics.record_request(("question", "compound", "convert")[i % 3], time.perf_counter() - start)
+
+
+def per_request_us(metrics: Metrics, requests: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        one_request(metrics, i)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    disabled = per_request_us(Metrics(enabled=False), args.requests)
+    metrics = Metrics(price_input=0.1, price_output=0.3)
+    enabled = per_request_us(metrics, args.requests)
+    print(f"Per request: {enabled:.1f} µs enabled, {disabled:.1f} µs disabled")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"Render: {(time.perf_counter() - start) * 1e3:.2f} ms ({len(text.splitlines())} lines)")
+    print(metrics.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Monte Carlo engine throughput, in-process vs. a process pool.
+
+Runs the same seeded simulation with 1 and with --workers processes, checks
+that both give identical results, and reports paths per second.
+    python benchmarks/bench_montecarlo.py --paths 1000000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from montecarlo import simulate
+
+
+def run(args, workers):
+    start = time.perf_counter()
+    result = simulate(10000, 7, 15, args.years, args.contribution, args.paths, seed=42,
+                      workers=workers, time_budget=0)
+    return result["values"], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--years", type=float, default=30)
+    parser.add_argument("--contribution", type=float, default=500,
+                        help="monthly contribution (0 simulates terminal values directly)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    serial, serial_time = run(args, 1)
+    print(f"1 worker:   {serial_time:.2f} s ({args.paths / serial_time:,.0f} paths/s)")
+    if args.workers > 1:
+        parallel, parallel_time = run(args, args.workers)
+        assert np.array_equal(serial, parallel), "results differ between worker counts"
+        print(f"{args.workers} workers:  {parallel_time:.2f} s ({args.paths / parallel_time:,.0f} paths/s, "
+              f"{serial_time / parallel_time:.1f}x)")
+    print(f"Median final value: ${np.median(serial):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
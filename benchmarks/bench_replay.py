@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark: conversation transcripts through the bot and the Streamlit app.
+
+Each transcript is replayed turn by turn through FinancialBot.process_user_input
+(target "bot") and/or app.py's chat input via Streamlit's AppTest (target
+"app"), against the fake Mistral server, so no API key or quota is needed.
+Reports throughput, per-turn latency percentiles, prompt-token growth per
+turn, memory per bot session, and injected-error counts.
+
+Transcripts are JSONL, one conversation per line, either {"turns": ["...", ...]}
+or a recorded {"messages": [{"role": "user", "content": "..."}, ...]}; without
+--transcripts a seeded synthetic mix of questions, follow-ups and calculator
+commands is generated.
+
+Baselines: --save-baseline stores the results in benchmarks/baselines.json;
+--check compares against them and exits non-zero on a regression beyond
+--tolerance (timings) or 5% (prompt tokens, memory). Timing baselines are
+machine-specific; re-save them when moving machines.
+    python benchmarks/bench_replay.py --sessions 50 --turns 8 --check
+    python benchmarks/bench_replay.py --target app --error-rate 0.05
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_mistral import spawn_server
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# Deterministic quantities regress at a much tighter tolerance than timings
+STRICT_TOLERANCE = 0.05
+
+QUESTIONS = [
+    "What is an ETF?", "How do bonds work?", "What is diversification?",
+    "Should I pay off debt or invest?", "What is a Roth IRA?", "How does inflation affect savings?",
+    "What is dollar-cost averaging?", "What is a P/E ratio?", "How are dividends taxed?",
+    "What is an emergency fund?",
+]
+FOLLOW_UPS = [
+    "Can you give an example?", "How does that compare to a savings account?",
+    "What are the risks?", "Explain that more simply.", "What should a beginner watch out for?",
+]
+CALCULATIONS = [
+    "/compound 1000 5 10 12", "/calc_return 100 150", "/convert 100 USD EUR",
+    "/npv 8 -1000 300 400 500", "/fv 500 7 20",
+]
+TERMS = ["P/E ratio", "EPS", "yield curve", "expense ratio", "market cap"]
+
+
+# ==============================================================================
+# Transcripts
+# ==============================================================================
+
+def synthetic_transcripts(sessions: int, turns: int, seed: int) -> List[List[str]]:
+    """Conversations opening with a question, then follow-ups with some calculators mixed in"""
+    rng = random.Random(seed)
+    transcripts = []
+    for i in range(sessions):
+        conversation = [f"{rng.choice(QUESTIONS)} (session {i})"]
+        while len(conversation) < turns:
+            roll = rng.random()
+            if roll < 0.2:
+                conversation.append(rng.choice(CALCULATIONS))
+            elif roll < 0.3:
+                conversation.append(f"/explain {rng.choice(TERMS)}")
+            else:
+                conversation.append(rng.choice(FOLLOW_UPS))
+        transcripts.append(conversation)
+    return transcripts
+
+
+def load_transcripts(path: str) -> List[List[str]]:
+    transcripts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "turns" in record:
+                transcripts.append([str(t) for t in record["turns"]])
+            else:
+                transcripts.append([m["content"] for m in record["messages"] if m.get("role") == "user"])
+    return transcripts
+
+
+# ==============================================================================
+# Replay
+# ==============================================================================
+
+def is_error(reply: str) -> bool:
+    return reply.startswith(("❌", "Error:"))
+
+
+def replay_bot(transcript: List[str], stream: bool) -> Dict[str, list]:
+    """Replay one conversation through a fresh FinancialBot"""
+    from bot import FinancialBot
+
+    bot = FinancialBot()
+    latencies, tokens, errors = [], [], 0
+    for message in transcript:
+        start = time.perf_counter()
+        reply = bot.process_user_input(message, stream=stream)
+        if not isinstance(reply, str):
+            reply = "".join(reply)
+        latencies.append(time.perf_counter() - start)
+        tokens.append(bot.history.last_prompt_tokens)
+        errors += is_error(reply)
+    return {"latencies": latencies, "tokens": tokens, "errors": errors}
+
+
+def replay_app(transcript: List[str], stream: bool) -> Dict[str, list]:
+    """Replay one conversation as a fresh Streamlit session (always streamed)"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    app.secrets["MISTRAL_API_KEY"] = os.environ["MISTRAL_API_KEY"]
+    app.run()
+    latencies, tokens, errors = [], [], 0
+    for message in transcript:
+        start = time.perf_counter()
+        app.chat_input[0].set_value(message).run()
+        latencies.append(time.perf_counter() - start)
+        tokens.append(app.session_state.bot.history.last_prompt_tokens)
+        reply = app.chat_message[-1]
+        errors += reply.name == "assistant" and any(
+            is_error(str(getattr(e, "value", ""))) for e in reply.children.values())
+    return {"latencies": latencies, "tokens": tokens, "errors": errors}
+
+
+def bot_memory_per_session(transcripts: List[List[str]]) -> float:
+    """KiB retained per FinancialBot after replaying its conversation"""
+    from bot import FinancialBot
+
+    FinancialBot()  # warm-up: module-level singletons are not per-session memory
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    bots = []
+    for transcript in transcripts:
+        bot = FinancialBot()
+        for message in transcript:
+            reply = bot.process_user_input(message)
+            if not isinstance(reply, str):
+                "".join(reply)
+        bots.append(bot)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return retained / len(bots) / 1024
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run_target(target: str, transcripts: List[List[str]], args) -> Dict[str, float]:
+    replay = replay_bot if target == "bot" else replay_app
+    # Untimed warm-up: SDK import, client pool and Streamlit script compilation
+    replay(transcripts[0][:2], args.stream)
+    from scheduler import get_default_scheduler
+
+    retries = get_default_scheduler().stats()["retries"]
+    start = time.perf_counter()
+    if target == "bot" and args.concurrency > 1:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            runs = list(pool.map(lambda t: replay(t, args.stream), transcripts))
+    else:
+        # AppTest must run on the main thread
+        runs = [replay(t, args.stream) for t in transcripts]
+    elapsed = time.perf_counter() - start
+
+    latencies = [x for run in runs for x in run["latencies"]]
+    growth = []
+    for turn in range(max(len(t) for t in transcripts)):
+        sizes = [run["tokens"][turn] for run in runs if turn < len(run["tokens"])]
+        growth.append(sum(sizes) / len(sizes))
+    result = {
+        "turns_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "prompt_tokens_first_turn": growth[0],
+        "prompt_tokens_last_turn": growth[-1],
+        "errors": sum(run["errors"] for run in runs),
+        "retries": get_default_scheduler().stats()["retries"] - retries,
+    }
+    if target == "bot":
+        result["memory_kib_per_session"] = bot_memory_per_session(transcripts[:args.memory_sessions])
+    result["_growth"] = growth
+    return result
+
+
+# ==============================================================================
+# Baselines
+# ==============================================================================
+
+# metric -> (higher is better, strict)
+CHECKS = {
+    "turns_per_second": (True, False),
+    "p95_ms": (False, False),
+    "prompt_tokens_last_turn": (False, True),
+    "memory_kib_per_session": (False, True),
+}
+
+
+def compare(target: str, result: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Regression messages for metrics worse than the baseline by more than the tolerance"""
+    regressions = []
+    for metric, (higher_is_better, strict) in CHECKS.items():
+        if metric not in result or not baseline.get(metric):
+            continue
+        limit = STRICT_TOLERANCE if strict else tolerance
+        old, new = baseline[metric], result[metric]
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > limit:
+            regressions.append(f"{target} {metric}: {old:.1f} -> {new:.1f} ({change:+.0%}, limit {limit:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=("bot", "app", "both"), default="bot")
+    parser.add_argument("--transcripts", help="JSONL transcripts (default: synthetic)")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions replayed in parallel (bot)")
+    parser.add_argument("--stream", action="store_true", help="stream bot replies")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--memory-sessions", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed timing regression (fraction)")
+    args = parser.parse_args()
+
+    transcripts = (load_transcripts(args.transcripts) if args.transcripts
+                   else synthetic_transcripts(args.sessions, args.turns, args.seed))
+    targets = ("bot", "app") if args.target == "both" else (args.target,)
+    config = {"transcripts": args.transcripts or "synthetic", "sessions": len(transcripts), "turns": args.turns,
+              "seed": args.seed, "concurrency": args.concurrency, "stream": args.stream, "cache": args.cache,
+              "latency": args.latency, "token_delay": args.token_delay, "error_rate": args.error_rate}
+
+    fake_args = ["--latency", str(args.latency), "--token-delay", str(args.token_delay),
+                 "--error-rate", str(args.error_rate), "--error-status", str(args.error_status),
+                 "--seed", str(args.seed)]
+    results = {}
+    with spawn_server(*fake_args) as url:
+        # Settings are read once, so configure the environment before the bot is imported
+        os.environ.setdefault("MISTRAL_API_KEY", "bench")
+        os.environ["MISTRAL_SERVER_URL"] = url
+        os.environ.setdefault("MISTRAL_RETRY_BASE_DELAY", "0.01")
+        os.environ.setdefault("MISTRAL_RETRY_MAX_DELAY", "0.05")
+        if not args.cache:
+            os.environ["RESPONSE_CACHE_SIZE"] = "0"
+        for target in targets:
+            results[target] = run_target(target, transcripts, args)
+
+    regressions = []
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baselines = json.load(f)
+    for target, result in results.items():
+        growth = result.pop("_growth")
+        print(f"[{target}] {config['sessions']} sessions, {sum(map(len, transcripts))} turns")
+        print(f"  throughput     {result['turns_per_second']:.1f} turns/s")
+        print(f"  latency        p50 {result['p50_ms']:.1f} ms  p95 {result['p95_ms']:.1f} ms  "
+              f"p99 {result['p99_ms']:.1f} ms")
+        print("  prompt tokens  " + " ".join(f"{t:.0f}" for t in growth) + "  (mean per turn)")
+        if "memory_kib_per_session" in result:
+            print(f"  memory         {result['memory_kib_per_session']:.1f} KiB per session")
+        print(f"  error replies  {result['errors']} ({result['retries']} retried calls)")
+        baseline = baselines.get(target)
+        if args.check:
+            if baseline is None or baseline.get("config") != config:
+                print(f"  (no baseline for this configuration in {args.baseline})")
+            else:
+                regressions += compare(target, result, baseline["results"], args.tolerance)
+        if args.save_baseline:
+            baselines[target] = {"config": config, "results": {k: round(v, 2) for k, v in result.items()}}
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print("\nREGRESSION:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark: semantic cache lookup latency and paraphrase hit rate.
+
+Fills the index with --entries questions, then looks up paraphrases of
+known questions (should hit) and unrelated questions (should miss).
+    python benchmarks/bench_semantic_cache.py --entries 10000 --threshold 0.85
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MISTRAL_API_KEY", "bench")
+
+from semantic_cache import SemanticCache
+
+KNOWN = {
+    "What is an ETF?": ["explain ETFs", "ETF meaning", "what are etfs and how do they work"],
+    "What is the P/E ratio?": ["explain P/E ratio", "p/e ratio meaning"],
+    "What is compound interest?": ["how does compound interest work", "explain compound interest"],
+    "What is dividend yield?": ["dividend yield meaning", "define dividend yield"],
+    "What is a bond?": ["explain bonds", "what are bonds"],
+}
+UNRELATED = ["What is a mutual fund?", "What is simple interest?", "What is a bond ETF?",
+             "What is market cap?", "ETF vs mutual fund", "What is the PEG ratio?"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    cache = SemanticCache(threshold=args.threshold, max_entries=args.entries + len(KNOWN))
+    start = time.perf_counter()
+    for i in range(args.entries):
+        cache.set(f"filler question {i} about topic{i} and asset{i % 97}", "filler")
+    for question in KNOWN:
+        cache.set(question, question)
+    fill = time.perf_counter() - start
+
+    hits = sum(cache.get(p) == q for q, paraphrases in KNOWN.items() for p in paraphrases)
+    paraphrases = sum(len(p) for p in KNOWN.values())
+    false_hits = sum(cache.get(q) is not None for q in UNRELATED)
+
+    stats = cache.stats()
+    print(f"Entries: {len(cache):,} (filled in {fill:.1f} s)")
+    print(f"Paraphrase hits: {hits}/{paraphrases}, false hits: {false_hits}/{len(UNRELATED)}")
+    print(f"Mean lookup: {stats['mean_lookup_us']:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Load test: the multi-session server (server.py) against the fake LLM server.
+
+Starts both as child processes, opens --idle sessions that each exchange one
+message and then go quiet (they end up parked in the session store), then
+runs --active concurrent clients streaming replies over SSE. Reports
+time-to-first-token and full-reply latency percentiles, throughput, and the
+server's resident memory before and after.
+    python benchmarks/bench_server.py --idle 20000 --active 200 --turns 3
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_mistral import spawn_server
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return "n/a"
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1e3
+    return f"p50 {pick(0.5):7.1f} ms  p95 {pick(0.95):7.1f} ms  p99 {pick(0.99):7.1f} ms"
+
+
+def start_server(env: dict) -> tuple:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--port", str(port)],
+                               env=env, cwd=ROOT)
+    deadline = time.time() + 15
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            if time.time() > deadline or process.poll() is not None:
+                process.terminate()
+                raise RuntimeError("server.py failed to start")
+            time.sleep(0.05)
+
+
+async def open_idle_sessions(client, count: int, concurrency: int) -> int:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            try:
+                response = await client.post(f"/v1/sessions/idle-{i}/messages",
+                                             json={"message": f"What is an index fund? ({i})"})
+                failures += response.status_code != 200
+            except httpx.TransportError:
+                failures += 1
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return failures
+
+
+async def active_client(client, i: int, turns: int, first_token: list, total: list, errors: list) -> None:
+    for turn in range(turns):
+        start = time.perf_counter()
+        got_first = False
+        async with client.stream("POST", f"/v1/sessions/active-{i}/messages",
+                                 json={"message": f"Explain diversification ({i}.{turn})", "stream": True}) as response:
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                await response.aread()
+                continue
+            async for line in response.aiter_lines():
+                if line.startswith("event: delta") and not got_first:
+                    first_token.append(time.perf_counter() - start)
+                    got_first = True
+                elif line.startswith("event: done"):
+                    break
+        total.append(time.perf_counter() - start)
+
+
+async def run(args, url: str, pid: int) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.active + 64, max_keepalive_connections=args.active + 64)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        baseline = rss_mb(pid)
+        start = time.perf_counter()
+        failures = await open_idle_sessions(client, args.idle, 64)
+        elapsed = time.perf_counter() - start
+        print(f"Idle sessions: {args.idle} opened in {elapsed:.1f} s ({failures} failed)")
+        print(f"  RSS {baseline:.0f} MB -> {rss_mb(pid):.0f} MB")
+
+        first_token, total, errors = [], [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(active_client(client, i, args.turns, first_token, total, errors)
+                               for i in range(args.active)))
+        elapsed = time.perf_counter() - start
+        print(f"Active clients: {args.active} x {args.turns} streamed turns in {elapsed:.1f} s "
+              f"({len(total) / elapsed:.0f} replies/s, {len(errors)} rejected)")
+        print(f"  first token  {percentiles(first_token)}")
+        print(f"  full reply   {percentiles(total)}")
+        print(f"  RSS {rss_mb(pid):.0f} MB")
+        stats = (await client.get("/healthz")).json()
+        print("  " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--idle", type=int, default=20000)
+    parser.add_argument("--active", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--max-live", type=int, default=1000, help="SERVER_MAX_LIVE_SESSIONS")
+    parser.add_argument("--memory-mb", type=float, default=64, help="SERVER_SESSION_MEMORY_MB")
+    parser.add_argument("--db", default=None, help="SERVER_SESSION_DB (spill to SQLite)")
+    args = parser.parse_args()
+
+    with spawn_server("--latency", str(args.latency), "--token-delay", str(args.token_delay)) as fake_url:
+        env = dict(os.environ, MISTRAL_API_KEY=os.environ.get("MISTRAL_API_KEY", "bench"),
+                   MISTRAL_SERVER_URL=fake_url, SERVER_MAX_LIVE_SESSIONS=str(args.max_live),
+                   SERVER_SESSION_MEMORY_MB=str(args.memory_mb))
+        if args.db:
+            env["SERVER_SESSION_DB"] = args.db
+        process, url = start_server(env)
+        try:
+            asyncio.run(run(args, url, process.pid))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
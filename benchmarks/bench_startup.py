@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI cold start.
+
+Measures the cumulative `import bot` time (python -X importtime) and the time
+from launching `python bot.py` until the first "You: " prompt. Exits with
+status 1 if either exceeds its threshold, so it can guard against regressions.
+    python benchmarks/bench_startup.py --runs 5 --max-import-ms 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"You: "
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("MISTRAL_API_KEY", "bench")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def import_ms() -> float:
+    """Cumulative import time of the bot module in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import bot"],
+        cwd=ROOT, env=_env(), capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "bot":
+            return int(parts[1]) / 1000.0
+    raise RuntimeError("bot not found in -X importtime output")
+
+
+def first_prompt_ms() -> float:
+    """Wall time from process start until the CLI prints its first prompt"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "bot.py"], cwd=ROOT, env=_env(),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    output = b""
+    try:
+        while not output.endswith(PROMPT):
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError("bot.py exited before showing a prompt")
+            output += chunk
+        return (time.perf_counter() - start) * 1000.0
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=150.0)
+    parser.add_argument("--max-first-prompt-ms", type=float, default=500.0)
+    args = parser.parse_args()
+
+    imports = [import_ms() for _ in range(args.runs)]
+    prompts = [first_prompt_ms() for _ in range(args.runs)]
+    import_median = statistics.median(imports)
+    prompt_median = statistics.median(prompts)
+
+    print(f"import bot:        {import_median:.1f} ms (median of {args.runs})")
+    print(f"Time to prompt:    {prompt_median:.1f} ms (median of {args.runs})")
+    failed = False
+    if import_median > args.max_import_ms:
+        print(f"❌ import time above {args.max_import_ms:.0f} ms")
+        failed = True
+    if prompt_median > args.max_first_prompt_ms:
+        print(f"❌ time to prompt above {args.max_first_prompt_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
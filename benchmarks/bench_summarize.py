@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: map-reduce summarization of a folder of long reports.
+
+Generates synthetic reports, summarizes them with a single worker and with
+the parallel pipeline against the fake server, then edits one paragraph of
+one report and re-runs to show that only the changed chunks are re-sent.
+    python benchmarks/bench_summarize.py --reports 500 --latency 0.5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_mistral import spawn_server
+
+WORDS = ("revenue margin guidance quarter dividend outlook liquidity debt growth "
+         "earnings segment demand pricing costs capital buyback forecast risk").split()
+
+
+def write_reports(folder: str, reports: int, paragraphs: int) -> None:
+    rng = random.Random(0)
+    for i in range(reports):
+        text = "\n\n".join(
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 160))) + "."
+            for _ in range(paragraphs)
+        )
+        with open(os.path.join(folder, f"report_{i:04d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def run(paths, workers: int):
+    from summarizer import SummaryPipeline
+
+    pipeline = SummaryPipeline(workers=workers)
+    start = time.perf_counter()
+    pipeline.summarize_files(paths)
+    return time.perf_counter() - start, pipeline.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reports", type=int, default=50)
+    parser.add_argument("--paragraphs", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder, spawn_server("--latency", str(args.latency)) as url:
+        os.environ.setdefault("MISTRAL_API_KEY", "bench")
+        os.environ["MISTRAL_SERVER_URL"] = url
+        os.environ["MISTRAL_POOL_SIZE"] = str(max(args.workers, 10))
+        os.environ["RESPONSE_CACHE_PATH"] = os.path.join(folder, "cache.db")
+        import response_cache
+        from summarizer import find_text_files
+
+        write_reports(folder, args.reports, args.paragraphs)
+        paths = find_text_files(folder)
+
+        cache = response_cache.get_default_cache()
+        sequential, seq_stats = run(paths[:max(1, args.reports // 10)], workers=1)
+        per_report = sequential / max(1, args.reports // 10)
+        cache.clear()
+
+        parallel, par_stats = run(paths, workers=args.workers)
+        print(f"Reports: {args.reports}, API calls: {par_stats['api_calls']}")
+        print(f"1 worker:   {per_report * args.reports:8.1f} s (extrapolated)")
+        print(f"{args.workers} workers: {parallel:8.1f} s ({per_report * args.reports / parallel:.1f}x)")
+
+        # Change one paragraph of one report and summarize everything again
+        with open(paths[0], encoding="utf-8") as f:
+            paragraphs = f.read().split("\n\n")
+        paragraphs[len(paragraphs) // 2] = "Guidance was cut sharply after the quarter."
+        with open(paths[0], "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+        rerun, rerun_stats = run(paths, workers=args.workers)
+        print(f"Re-run after one edit: {rerun:.2f} s, "
+              f"{rerun_stats['api_calls']} API call(s), {rerun_stats['cached_calls']} cached")
+        if rerun_stats["api_calls"] >= par_stats["api_calls"] // args.reports:
+            print("❌ Unchanged chunks were not served from the cache")
+            sys.exit(1)
+        print("✅ Only changed chunks re-sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,21 @@
 Financial Bot - Uses Mistral AI API for financial information and calculations
 This bot provides educational information about finance and investing.
 """
+import os
 import re
-from typing import Optional, Dict, Any
-from config import MISTRAL_API_KEY, MISTRAL_MODEL
+import sys
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple, Union
+from config import get_settings, require_api_key
+from commands import Command, CommandRegistry
+from llm_backend import answered_locally, make_backend
+from response_cache import BaseCache, get_default_cache, make_key
+from history import HistoryManager, count_message_tokens, count_tokens
+from scheduler import BATCH, INTERACTIVE, get_default_scheduler
+from intent_router import Intent, get_default_router
+from metrics import get_default_metrics
+from prompts import (PROMPT_VERSION, SYSTEM_PREFIX, build_chat_messages, build_standalone_messages,
+                     explain_prompt, summarize_prompt)
 
 # ============================================================================
 # DISCLAIMER
@@ -29,61 +41,317 @@ DISCLAIMER = """
 ╚════════════════════════════════════════════════════════════════════════════╝
 """
 
+FILE_ACCESS_DISABLED = "Error: Commands that read files are not available here"
+
+SUMMARIZE_PASTE_PROMPT = "Please paste the market/financial text you'd like summarized. Finish with a line containing only /end:"
+
+ASK_MANY_PASTE_PROMPT = "Please paste your questions, one per line. Finish with a line containing only /end:"
+
 
 class FinancialBot:
     """Financial assistant bot powered by Mistral AI"""
     
-    def __init__(self):
-        self.api_key = MISTRAL_API_KEY
-        self.model = MISTRAL_MODEL
-        self.conversation_history = []
+    # Commands that read files on this machine; the server turns them off for remote users
+    allow_file_access = True
+    # Front-ends that read a multi-line paste after SUMMARIZE_PASTE_PROMPT/ASK_MANY_PASTE_PROMPT
+    # (the CLI) set this; elsewhere /summarize and /ask_many without text reply with their usage
+    collects_paste = False
+    # Calculator limits (None: SIMULATION_MAX_PATHS, CASHFLOW_MAX_YEARS, SIMULATION_WORKERS);
+    # the server lowers them for remote users
+    max_simulation_paths: Optional[int] = None
+    max_cashflow_years: Optional[float] = None
+    simulation_workers: Optional[int] = None
+    
+    def __init__(self, response_cache: Optional[BaseCache] = None,
+                 semantic_cache: Optional[BaseCache] = None,
+                 api_key: Optional[str] = None, backend=None, conversation_log=None):
+        self.api_key = api_key or require_api_key()
+        self.model = get_settings().mistral_model
+        self.temperature = 0.7
+        self.max_tokens = 1024
+        # Where chat requests go (see llm_backend.py)
+        self.backend = backend if backend is not None else make_backend(self.api_key)
+        self.history = HistoryManager()
+        # Turns are appended to the durable log (conversation_log.py) under this id, if enabled
+        self.session_id = os.urandom(16).hex()
+        self.conversation_log = conversation_log
+        # Why CONVERSATION_LOG_DIR is set but the bot runs without the log, if it does
+        self.conversation_log_error: Optional[str] = None
+        if conversation_log is None and get_settings().conversation_log_dir:
+            from conversation_log import get_default_conversation_log
+            try:
+                self.conversation_log = get_default_conversation_log()
+            except ValueError as e:
+                # e.g. another process is already writing this log directory; chat works without it
+                self.conversation_log_error = str(e)
+        self.router = get_default_router()
+        self.scheduler = get_default_scheduler()
+        self.response_cache = response_cache if response_cache is not None else get_default_cache()
+        self.semantic_cache = semantic_cache
+        if semantic_cache is None and get_settings().semantic_cache_threshold > 0:
+            # NumPy is only imported when the semantic cache is enabled
+            from semantic_cache import get_default_semantic_cache
+            self.semantic_cache = get_default_semantic_cache()
+        self._summarizer = None
+        self.metrics = get_default_metrics()
+        self.metrics.register("router", self.router.stats)
+        self.metrics.register("scheduler", self.scheduler.stats)
+        if hasattr(self.backend, "stats"):
+            self.metrics.register("backend", self.backend.stats)
+        if self.response_cache is not None:
+            self.metrics.register("response_cache", self.response_cache.stats)
+        if self.semantic_cache is not None:
+            self.metrics.register("semantic_cache", self.semantic_cache.stats)
+        # Called with (done, total) while a long local computation such as /simulate runs
+        self.on_progress: Optional[Callable[[int, int], None]] = None
+        # Called with the raw result of /simulate (e.g. to chart the distribution)
+        self.on_simulation: Optional[Callable[[Dict[str, Any]], None]] = None
+        # Whether the latest reply came from a local calculator (pre-formatted text)
+        self.last_reply_calculated = False
+    
+    @property
+    def conversation_history(self) -> List[Dict[str, str]]:
+        """Messages currently kept verbatim (older turns live in history.summary)"""
+        return self.history.messages
+    
+    def resume(self, session_id: str) -> int:
+        """Continue a logged conversation: adopt its id and rebuild history from its turns
+        
+        Returns how many turns were restored (0 if the log does not have it).
+        """
+        self.session_id = session_id
+        self.history.clear()
+        if self.conversation_log is None:
+            return 0
+        turns = [turn for turn in self.conversation_log.turns(session_id) if turn.in_history]
+        for turn in turns:
+            self.history.add_user(turn.history_user)
+            self.history.add_assistant(turn.reply)
+        return len(turns)
+    
+    def log_turn(self, user_input: str, reply: Union[str, Iterator[str]], label: str,
+                 answered: int) -> Union[str, Iterator[str]]:
+        """Append the exchange to the conversation log once the reply is complete
+        
+        answered is history.answered from before the request, to tell whether
+        the turn went into the conversation history.
+        """
+        if isinstance(reply, str):
+            self._append_turn(user_input, reply, label, answered)
+            return reply
+        return self._log_after_stream(user_input, reply, label, answered)
+    
+    def _log_after_stream(self, user_input: str, chunks: Iterator[str], label: str,
+                          answered: int) -> Iterator[str]:
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self._append_turn(user_input, "".join(parts), label, answered)
+    
+    def _append_turn(self, user_input: str, reply: str, label: str, answered: int) -> None:
+        in_history = self.history.answered != answered
+        self.conversation_log.append(
+            self.session_id, user_input, reply, label,
+            prompt_tokens=self.history.last_prompt_tokens if in_history else 0,
+            reply_tokens=count_tokens(reply),
+            history_user=self.history.last_user_entry if in_history else None,
+            in_history=in_history,
+            error=reply.startswith(("❌", "Error")),
+        )
+        
+    def _call_mistral_api(self, user_message: str, stream: bool = False,
+                          cache_key: Optional[str] = None,
+                          history_stub: Optional[str] = None,
+                          cache: Optional[BaseCache] = None) -> Union[str, Iterator[str]]:
+        """Call Mistral AI API using the official SDK
+        
+        With stream=True a generator of text chunks is returned instead of the
+        full reply; history is updated once the stream finishes.
+        
+        When cache_key is given the prompt is treated as context-free: it is
+        sent on its own (without earlier turns) so the answer can be safely
+        cached and reused, and the exchange is still recorded in history.
+        
+        cache selects the cache cache_key belongs to (default: the response cache).
+        
+        history_stub replaces a bulky user message in history once answered.
+        """
+        with self.metrics.stage("prompt"):
+            messages, cache_slot, cached = self._begin_call(user_message, cache_key, history_stub, cache)
+        if cached is not None:
+            return iter([cached]) if stream else cached
+        
+        if stream:
+            return self._stream_mistral_api(messages, cache_slot)
         
-    def _call_mistral_api(self, user_message: str) -> Optional[str]:
-        """Call Mistral AI API using the official SDK"""
+        history_len = len(self.conversation_history)
+        estimate = self._estimate_tokens(messages)
         try:
-            from mistralai import Mistral
+            # Call the backend (paced and retried by the scheduler)
+            with self.metrics.stage("api"):
+                response = self.scheduler.call(
+                    lambda: self.backend.complete(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    ),
+                    priority=INTERACTIVE,
+                    tokens=estimate,
+                )
             
-            # Add user message to history
-            self.conversation_history.append({
-                "role": "user",
-                "content": user_message
-            })
-            
-            # Call the API using official SDK
-            client = Mistral(api_key=self.api_key)
-            response = client.chat.complete(
-                model=self.model,
-                messages=self.conversation_history,
-                temperature=0.7,
-                max_tokens=1024,
-            )
+            if response.usage:
+                self.history.record_usage(response.usage.prompt_tokens)
+                self.scheduler.settle(estimate, response.usage.total_tokens)
+                self.metrics.record_usage(self.model, response.usage)
             
             # Extract the assistant's response
             if response.choices and len(response.choices) > 0:
                 assistant_message = response.choices[0].message.content
-                
-                # Add assistant response to history for context
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
-                
-                # Keep conversation history manageable (last 10 exchanges)
-                if len(self.conversation_history) > 20:
-                    self.conversation_history = self.conversation_history[-20:]
-                
+                self._record_assistant_message(assistant_message, None if answered_locally(response) else cache_slot)
                 return assistant_message
             else:
+                self._rollback(history_len)
                 return "Error: Could not get response from API"
                 
         except Exception as e:
-            error_msg = str(e)
-            if "401" in error_msg or "Unauthorized" in error_msg:
-                return "❌ API Error: Invalid or expired API key. Please check your .env file.\n   Visit: https://console.mistral.ai/ to verify your API key."
-            elif "timeout" in error_msg.lower():
-                return "❌ API Error: Request timed out. Check your internet connection."
-            else:
-                return f"❌ API Error: {error_msg}"
+            # Do not leave an unanswered question in the conversation
+            self._rollback(history_len)
+            self.metrics.inc("errors_total", error=type(e).__name__)
+            return self._format_api_error(e)
+    
+    def _begin_call(self, user_message: str, cache_key: Optional[str],
+                    history_stub: Optional[str] = None, cache: Optional[BaseCache] = None):
+        """Record the user message and decide what to send
+        
+        Returns (messages, cache_slot, cached_answer). cache_slot is the
+        (cache, key) pair the answer should be stored under, or None when
+        caching does not apply; cached_answer is set on a cache hit (and
+        already recorded in history).
+        """
+        # Add user message to history
+        user_entry = self.history.add_user(user_message, stub=history_stub)
+        
+        cache = cache if cache is not None else self.response_cache
+        if cache_key is None or cache is None:
+            return build_chat_messages(self.history), None, None
+        
+        messages = build_standalone_messages(self.history, user_entry)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            self._record_assistant_message(cached)
+        return messages, (cache, cache_key), cached
+    
+    def _stream_mistral_api(self, messages: List[Dict[str, str]],
+                            cache_slot: Optional[Tuple[BaseCache, str]] = None) -> Iterator[str]:
+        """Yield reply chunks from the streaming chat API as they arrive"""
+        history_len = len(self.conversation_history)
+        estimate = self._estimate_tokens(messages)
+        parts = []
+        start = time.perf_counter()
+        try:
+            # Only opening the stream is retried; a reply is never restarted halfway
+            events = self.scheduler.call(
+                lambda: self.backend.stream(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                ),
+                priority=INTERACTIVE,
+                tokens=estimate,
+            )
+            if answered_locally(events):
+                cache_slot = None
+            with events:
+                for event in events:
+                    if event.data.usage:
+                        self.history.record_usage(event.data.usage.prompt_tokens)
+                        self.scheduler.settle(estimate, event.data.usage.total_tokens)
+                        self.metrics.record_usage(self.model, event.data.usage)
+                    choices = event.data.choices
+                    if not choices:
+                        continue
+                    content = choices[0].delta.content
+                    if isinstance(content, str) and content:
+                        if not parts:
+                            self.metrics.observe("stage_seconds", time.perf_counter() - start, stage="first_token")
+                        parts.append(content)
+                        yield content
+        except GeneratorExit:
+            self._rollback(history_len)
+            raise
+        except Exception as e:
+            self._rollback(history_len)
+            self.metrics.inc("errors_total", error=type(e).__name__)
+            yield self._format_api_error(e)
+            return
+        
+        self.metrics.observe("stage_seconds", time.perf_counter() - start, stage="stream")
+        if parts:
+            self._record_assistant_message("".join(parts), cache_slot)
+        else:
+            self._rollback(history_len)
+            yield "Error: Could not get response from API"
+    
+    def _complete_standalone(self, prompt: str, priority: int = INTERACTIVE,
+                             max_tokens: Optional[int] = None, stage: str = "api") -> Tuple[str, bool]:
+        """Send one prompt without the conversation; returns (reply, cacheable) (raises on failure)
+        
+        History is not touched, so this is safe to call from worker threads.
+        Replies from the local model are not cacheable (see llm_backend.py).
+        """
+        messages = SYSTEM_PREFIX + [{"role": "user", "content": prompt}]
+        max_tokens = max_tokens or self.max_tokens
+        estimate = count_message_tokens(messages) + max_tokens
+        with self.metrics.stage(stage):
+            response = self.scheduler.call(
+                lambda: self.backend.complete(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                ),
+                priority=priority,
+                tokens=estimate,
+            )
+        if response.usage:
+            self.scheduler.settle(estimate, response.usage.total_tokens)
+            self.metrics.record_usage(self.model, response.usage)
+        if not response.choices:
+            raise RuntimeError("Could not get response from API")
+        return response.choices[0].message.content, not answered_locally(response)
+    
+    def _estimate_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Upper bound on the tokens a request will use (prompt plus max reply)"""
+        return count_message_tokens(messages) + self.max_tokens
+    
+    def _rollback(self, history_len: int) -> None:
+        """Drop the unanswered user message of a failed or cancelled request"""
+        if len(self.conversation_history) == history_len:
+            self.history.pop()
+    
+    def _record_assistant_message(self, assistant_message: str,
+                                  cache_slot: Optional[Tuple[BaseCache, str]] = None) -> None:
+        """Add assistant response to history for context (and to the cache if keyed)"""
+        if cache_slot is not None:
+            cache, cache_key = cache_slot
+            cache.set(cache_key, assistant_message)
+        
+        # Older turns are folded into a summary to stay within the token budget
+        self.history.add_assistant(assistant_message)
+    
+    @staticmethod
+    def _format_api_error(error: Exception) -> str:
+        """Turn an SDK/HTTP exception into a user-facing message"""
+        error_msg = str(error)
+        if "401" in error_msg or "Unauthorized" in error_msg:
+            return "❌ API Error: Invalid or expired API key. Please check your .env file.\n   Visit: https://console.mistral.ai/ to verify your API key."
+        elif "timeout" in error_msg.lower():
+            return "❌ API Error: Request timed out. Check your internet connection."
+        else:
+            return f"❌ API Error: {error_msg}"
     
     def calculate_percentage_return(self, buy_price: float, sell_price: float) -> str:
         """Calculate percentage return on investment"""
@@ -105,7 +373,7 @@ Return %:         {percentage_return:.2f}%
         except ValueError:
             return "Error: Please provide valid numeric values"
     
-    def calculate_compound_interest(self, principal: float, annual_rate: float, years: int, compounds_per_year: int = 1) -> str:
+    def calculate_compound_interest(self, principal: float, annual_rate: float, years: float, compounds_per_year: int = 1) -> str:
         """Calculate compound interest"""
         try:
             if principal <= 0 or annual_rate < 0 or years <= 0:
@@ -120,7 +388,7 @@ Compound Interest Calculation:
 ──────────────────────────────
 Principal:        ${principal:,.2f}
 Annual Rate:      {annual_rate}%
-Time Period:      {years} years
+Time Period:      {years:g} years
 Compounds:        {compounds_per_year}x per year
 ─────────────────────────────
 Final Amount:     ${amount:,.2f}
@@ -129,9 +397,20 @@ Interest Earned:  ${interest_earned:,.2f}
         except (ValueError, ZeroDivisionError):
             return "Error: Please provide valid numeric values"
     
-    def currency_conversion(self, amount: float, from_currency: str, to_currency: str, exchange_rate: float) -> str:
-        """Simple currency conversion with provided exchange rate"""
+    def currency_conversion(self, amount: float, from_currency: str, to_currency: str,
+                            exchange_rate: Optional[float] = None) -> str:
+        """Currency conversion with a provided rate, or one from the local FX table"""
         try:
+            source = ""
+            if exchange_rate is None:
+                from fx_rates import get_default_fx_store
+                store = get_default_fx_store()
+                exchange_rate = store.rate(from_currency, to_currency)
+                if exchange_rate is None:
+                    return (f"Error: No exchange rate for {from_currency.upper()}/{to_currency.upper()} in the local rate table; "
+                            f"add it to {store.path or 'FX_RATES_PATH'} or give the rate: /convert {amount:g} {from_currency} {to_currency} <rate>")
+                # The table is a snapshot; say how old the rate is
+                source = f"Rate Date:        {store.source()}\n"
             if exchange_rate <= 0:
                 return "Error: Exchange rate must be positive"
             
@@ -141,96 +420,492 @@ Interest Earned:  ${interest_earned:,.2f}
 Currency Conversion:
 ────────────────────
 Amount:           {amount:,.2f} {from_currency.upper()}
-Exchange Rate:    1 {from_currency.upper()} = {exchange_rate} {to_currency.upper()}
-Result:           {converted_amount:,.2f} {to_currency.upper()}
+Exchange Rate:    1 {from_currency.upper()} = {exchange_rate:.6g} {to_currency.upper()}
+{source}Result:           {converted_amount:,.2f} {to_currency.upper()}
 """
         except ValueError:
             return "Error: Please provide valid numeric values"
     
-    def explain_financial_term(self, term: str) -> str:
-        """Get AI explanation of a financial term"""
-        prompt = f"""Explain the financial term '{term}' in simple terms suitable for beginners. 
-Include a practical example if relevant. Keep the explanation concise (2-3 sentences)."""
+    def currency_conversion_batch(self, path: str, from_currency: str, to_currency: str,
+                                  output_path: Optional[str] = None) -> str:
+        """Convert the amount column of a CSV/Parquet file with the local FX table (vectorized)"""
+        from fx_rates import get_default_fx_store
+        from batch_calc import conversions_from_file, format_conversion_summary, save_table
         
-        return self._call_mistral_api(prompt)
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        exchange_rate = get_default_fx_store().rate(from_currency, to_currency)
+        if exchange_rate is None:
+            return f"Error: No exchange rate for {from_currency}/{to_currency} in the local rate table"
+        try:
+            table = conversions_from_file(path, exchange_rate)
+            if output_path:
+                save_table(output_path, table)
+            return format_conversion_summary(table, from_currency, to_currency, exchange_rate, output_path)
+        except (OSError, ValueError) as e:
+            return f"Error: {e}"
     
-    def answer_financial_question(self, question: str) -> str:
-        """Answer general financial questions"""
-        system_context = """You are a friendly financial educator. Answer questions about:
-- Basic investing concepts (stocks, bonds, ETFs, mutual funds)
-- Financial terms and metrics (P/E ratio, market cap, dividend yield, ROI, etc.)
-- Risk and diversification principles
-- Basic financial calculations and concepts
-- Market fundamentals
-
-IMPORTANT: Always remind users that you provide educational information only, not investment advice.
-Do not make specific investment recommendations or predict market movements.
-Keep responses concise and clear."""
+    def calculate_percentage_return_batch(self, path: str, output_path: Optional[str] = None) -> str:
+        """Calculate returns for every position in a CSV/Parquet file (vectorized)"""
+        # NumPy is only imported when a batch command is actually used
+        from batch_calc import format_return_summary, returns_from_file, save_table, summarize_returns
         
-        prompt = f"{system_context}\n\nUser Question: {question}"
-        return self._call_mistral_api(prompt)
+        try:
+            table = returns_from_file(path)
+            if output_path:
+                save_table(output_path, table)
+            return format_return_summary(summarize_returns(table), output_path)
+        except (OSError, ValueError) as e:
+            return f"Error: {e}"
     
-    def summarize_market_text(self, text: str) -> str:
-        """Summarize pasted market news or company information"""
-        prompt = f"""Summarize the following market/financial text in 3-4 key points. 
-Highlight the main investment-relevant facts. Keep it concise.
-
-Text to summarize:
-{text}"""
-        
-        return self._call_mistral_api(prompt)
+    def calculate_amortization(self, principal: float, annual_rate: float, years: float,
+                               periods_per_year: int = 12, extra_payment: float = 0.0) -> str:
+        """Loan payment plus a year-by-year amortization table"""
+        if principal <= 0 or years <= 0 or periods_per_year <= 0:
+            return "Error: Principal, years and payments per year must be positive"
+        if annual_rate < 0 or extra_payment < 0:
+            return "Error: Rate and extra payment cannot be negative"
+        error = self._check_term(years, periods_per_year)
+        if error:
+            return error
+        from cashflow import format_amortization
+        try:
+            return format_amortization(principal, annual_rate, years, periods_per_year, extra_payment)
+        except ValueError as e:
+            return f"Error: {e}"
+    
+    def calculate_future_value(self, payment: float, annual_rate: float, years: float,
+                               periods_per_year: int = 12, initial_amount: float = 0.0) -> str:
+        """Future value of regular contributions plus a year-by-year table"""
+        if years <= 0 or periods_per_year <= 0:
+            return "Error: Years and payments per year must be positive"
+        if payment < 0 or annual_rate < 0 or initial_amount < 0:
+            return "Error: Payment, rate and initial amount cannot be negative"
+        error = self._check_term(years, periods_per_year)
+        if error:
+            return error
+        from cashflow import format_future_value
+        try:
+            return format_future_value(payment, annual_rate, years, periods_per_year, initial_amount)
+        except ValueError as e:
+            return f"Error: {e}"
+    
+    def _check_term(self, years: float, periods_per_year: int) -> Optional[str]:
+        """Error message for a schedule that is too long or shorter than one payment, else None"""
+        max_years = self.max_cashflow_years if self.max_cashflow_years is not None else get_settings().cashflow_max_years
+        if years > max_years:
+            return f"Error: Years must be at most {max_years:g}"
+        if periods_per_year > 365:
+            return "Error: At most 365 payments per year (daily)"
+        if years * periods_per_year < 0.5:
+            return "Error: The term must cover at least one payment period"
+        return None
+    
+    def calculate_npv(self, rate: float, cashflows: List[float]) -> str:
+        """Net present value of cash flows, the first one at t=0"""
+        if rate <= -100:
+            return "Error: Discount rate must be above -100%"
+        if not cashflows:
+            return "Error: Provide at least one cash flow"
+        from cashflow import format_npv
+        return format_npv(rate, cashflows)
+    
+    def calculate_irr(self, cashflows: List[float]) -> str:
+        """Internal rate of return of cash flows, the first one at t=0"""
+        if len(cashflows) < 2:
+            return "Error: Provide at least two cash flows"
+        from cashflow import format_irr
+        result = format_irr(cashflows)
+        if result is None:
+            return "Error: These cash flows have no IRR (they need both negative and positive values)"
+        return result
+    
+    def run_simulation(self, initial: float, annual_return: float, volatility: float, years: float,
+                       contribution: float = 0.0, paths: int = 10_000, seed: Optional[int] = None) -> str:
+        """Monte Carlo projection of portfolio value (percentiles and shortfall probability)"""
+        max_paths = self.max_simulation_paths if self.max_simulation_paths is not None else get_settings().simulation_max_paths
+        if years <= 0 or not 0 < paths <= max_paths:
+            return f"Error: Years must be positive and paths between 1 and {max_paths:,}"
+        if initial < 0 or contribution < 0 or volatility < 0 or annual_return <= -100:
+            return "Error: Amounts and volatility cannot be negative; return must be above -100%"
+        if not initial and not contribution:
+            return "Error: Provide an initial amount or a monthly contribution"
+        from montecarlo import format_simulation, simulate
+        result = simulate(initial, annual_return, volatility, years, contribution, paths, seed,
+                          workers=self.simulation_workers, progress=self.on_progress)
+        if self.on_simulation is not None:
+            self.on_simulation(result)
+        return format_simulation(initial, annual_return, volatility, years, contribution, paths, result)
+    
+    def explain_financial_term(self, term: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Get AI explanation of a financial term"""
+        reply = self._call_mistral_api(explain_prompt(term), stream=stream, cache_key=self._explain_key(term))
+        if get_settings().prefetch_related and self.response_cache is not None:
+            return self._then_prefetch(reply, term)
+        return reply
+    
+    def _explain_key(self, term: str) -> str:
+        return make_key("explain", term, self.model, prompt=PROMPT_VERSION,
+                        temperature=self.temperature, max_tokens=self.max_tokens)
+    
+    def _then_prefetch(self, reply: Union[str, Iterator[str]], term: str) -> Union[str, Iterator[str]]:
+        """Prefetch terms related to term once the reply explaining it is complete"""
+        if isinstance(reply, str):
+            self.prefetch_related_terms(term)
+            return reply
+        return self._prefetch_after_stream(reply, term)
     
-    def process_user_input(self, user_input: str) -> str:
-        """Process user input and route to appropriate handler"""
-        user_input_lower = user_input.lower().strip()
+    def _prefetch_after_stream(self, chunks: Iterator[str], term: str) -> Iterator[str]:
+        yield from chunks
+        self.prefetch_related_terms(term)
+    
+    def prefetch_related_terms(self, term: str) -> int:
+        """Fetch explanations of terms related to term into the response cache, in the background
         
-        # Check for calculation commands
-        if user_input_lower.startswith('/calc_return'):
-            try:
-                parts = user_input.split()
-                buy_price = float(parts[1])
-                sell_price = float(parts[2])
-                return self.calculate_percentage_return(buy_price, sell_price)
-            except (IndexError, ValueError):
-                return "Usage: /calc_return <buy_price> <sell_price>\nExample: /calc_return 100 150"
+        Only done once term itself was answered (and cached); returns how many
+        terms were queued. See prefetch.py.
+        """
+        if self.response_cache is None or self._explain_key(term) not in self.response_cache:
+            return 0
+        from prefetch import get_default_prefetcher
+        prefetcher = get_default_prefetcher()
+        self.metrics.register("prefetch", prefetcher.stats)
+        return prefetcher.schedule(term, self.response_cache, self._explain_key, self._prefetch_explanation)
+    
+    def _prefetch_explanation(self, term: str) -> Optional[str]:
+        answer, cacheable = self._complete_standalone(explain_prompt(term), BATCH)
+        return answer if cacheable else None
+    
+    def answer_financial_question(self, question: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Answer general financial questions"""
+        # The educator context is the shared system message (see prompts.py)
+        if self._is_first_turn():
+            cache_slot = self._question_cache(question)
+            if cache_slot is not None:
+                # Asked without context, so an earlier answer (or a paraphrase's) can be reused
+                cache, cache_key = cache_slot
+                return self._call_mistral_api(question, stream=stream, cache_key=cache_key, cache=cache)
+        return self._call_mistral_api(question, stream=stream)
+    
+    def _is_first_turn(self) -> bool:
+        return not (self.history.messages or self.history.summary_lines)
+    
+    def _question_cache(self, question: str) -> Optional[Tuple[BaseCache, str]]:
+        """(cache, key) for the answer to a question asked without context, or None"""
+        if self.semantic_cache is not None and not any(ch.isdigit() for ch in question):
+            # Paraphrases share an answer; figures would change it, so those need the exact text
+            return self.semantic_cache, question
+        if self.response_cache is not None:
+            return self.response_cache, make_key("question", question, self.model, prompt=PROMPT_VERSION,
+                                                 temperature=self.temperature, max_tokens=self.max_tokens)
+        return None
+    
+    def answer_questions(self, questions: List[str], workers: Optional[int] = None,
+                         priority: int = INTERACTIVE) -> List[str]:
+        """Answer independent questions concurrently; answers come back in input order
         
-        elif user_input_lower.startswith('/compound'):
-            try:
-                parts = user_input.split()
-                principal = float(parts[1])
-                rate = float(parts[2])
-                years = int(parts[3])
-                compounds = int(parts[4]) if len(parts) > 4 else 1
-                return self.calculate_compound_interest(principal, rate, years, compounds)
-            except (IndexError, ValueError):
-                return "Usage: /compound <principal> <annual_rate> <years> [compounds_per_year]\nExample: /compound 1000 5 10 12"
+        Each question is sent on its own, without the conversation, by a pool
+        of at most workers (BATCH_WORKERS) threads. Cached answers are reused,
+        repeated questions are sent once and new answers fill the cache. A
+        failed question gets its error message in its slot. History is not
+        touched.
+        """
+        return self._fan_out(questions, lambda q: q, self._question_cache, workers, priority)
+    
+    def explain_terms(self, terms: List[str], workers: Optional[int] = None,
+                      priority: int = INTERACTIVE) -> List[str]:
+        """Explanations of several terms at once, cached like /explain (see answer_questions)"""
+        return self._fan_out(terms, explain_prompt, self._explain_cache, workers, priority)
+    
+    def _explain_cache(self, term: str) -> Optional[Tuple[BaseCache, str]]:
+        return (self.response_cache, self._explain_key(term)) if self.response_cache is not None else None
+    
+    def _fan_out(self, texts: List[str], prompt_for: Callable[[str], str],
+                 cache_for: Callable[[str], Optional[Tuple[BaseCache, str]]],
+                 workers: Optional[int], priority: int) -> List[str]:
+        from concurrent.futures import ThreadPoolExecutor
         
-        elif user_input_lower.startswith('/convert'):
-            try:
-                parts = user_input.split()
-                amount = float(parts[1])
-                from_curr = parts[2]
-                to_curr = parts[3]
-                rate = float(parts[4])
-                return self.currency_conversion(amount, from_curr, to_curr, rate)
-            except (IndexError, ValueError):
-                return "Usage: /convert <amount> <from_currency> <to_currency> <exchange_rate>\nExample: /convert 100 USD EUR 0.92"
+        texts = [t.strip() for t in texts]
+        answers: Dict[str, str] = {"": "Error: Nothing to ask"}
+        pending: Dict[str, Optional[Tuple[BaseCache, str]]] = {}
+        for text in texts:
+            if text in answers or text in pending:
+                continue
+            cache_slot = cache_for(text)
+            cached = cache_slot[0].get(cache_slot[1]) if cache_slot is not None else None
+            if cached is not None:
+                answers[text] = cached
+            else:
+                pending[text] = cache_slot
         
-        elif user_input_lower.startswith('/explain'):
-            term = user_input[8:].strip()
-            if not term:
-                return "Usage: /explain <financial_term>\nExample: /explain P/E ratio"
-            return self.explain_financial_term(term)
+        if pending:
+            workers = min(workers or get_settings().batch_workers, len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ask") as pool:
+                futures = {text: pool.submit(self._answer_standalone, prompt_for(text), cache_slot, priority)
+                           for text, cache_slot in pending.items()}
+                for text, future in futures.items():
+                    answers[text] = future.result()
+        return [answers[t] for t in texts]
+    
+    def _answer_standalone(self, prompt: str, cache_slot: Optional[Tuple[BaseCache, str]],
+                           priority: int) -> str:
+        try:
+            answer, cacheable = self._complete_standalone(prompt, priority)
+        except Exception as e:
+            self.metrics.inc("errors_total", error=type(e).__name__)
+            return self._format_api_error(e)
+        if cache_slot is not None and cacheable:
+            cache, cache_key = cache_slot
+            cache.set(cache_key, answer)
+        return answer
+    
+    def ask_many(self, questions: List[str]) -> str:
+        """Answer a list of questions at once, formatted as a numbered list"""
+        questions = [q for q in (q.strip() for q in questions) if q]
+        if not questions:
+            return "Error: No questions given"
+        answers = self.answer_questions(questions)
+        return "\n\n".join(f"{i}. {question}\n{answer.strip()}"
+                            for i, (question, answer) in enumerate(zip(questions, answers), 1))
+    
+    def summarize_market_text(self, text: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Summarize pasted market news or company information"""
+        from summarizer import chunk_text
         
-        elif user_input_lower.startswith('/summarize'):
-            return "Please paste the market/financial text you'd like summarized. Type on the next line:"
+        # The pasted text is sent once; history keeps only a short stub
+        stub = f"Summarize a pasted market/financial text ({len(text.split())} words, omitted from history)."
+        return self._summarize_chunks(chunk_text(text, get_settings().summary_chunk_tokens), stub, stream)
+    
+    def summarize_file(self, path: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Summarize a (possibly very long) text file, read incrementally"""
+        from summarizer import iter_file_chunks
         
-        elif user_input_lower.startswith('/help'):
-            return self.show_help()
+        try:
+            chunks = list(iter_file_chunks(path, get_settings().summary_chunk_tokens))
+        except (OSError, UnicodeDecodeError) as e:
+            return f"Error: {e}"
+        stub = f"Summarize the file {os.path.basename(path)} (omitted from history)."
+        return self._summarize_chunks(chunks, stub, stream)
+    
+    def summarize_folder(self, folder: str, output_dir: Optional[str] = None) -> str:
+        """Summarize every .txt/.md file in a folder in one parallel batch"""
+        from summarizer import find_text_files, write_summaries
         
+        try:
+            paths = find_text_files(folder)
+            if not paths:
+                return f"Error: No .txt or .md files found in {folder}"
+            summaries = self._summary_pipeline().summarize_files(paths)
+            if output_dir:
+                written = write_summaries(summaries, output_dir)
+                return f"Summarized {len(written)} file(s) into {output_dir}"
+        except (OSError, UnicodeDecodeError) as e:
+            return f"Error: {e}"
+        except Exception as e:
+            return self._format_api_error(e)
+        return "\n\n".join(f"=== {os.path.basename(path)} ===\n{summary.strip()}"
+                            for path, summary in summaries.items())
+    
+    def _summary_pipeline(self):
+        """Map-reduce pipeline for long documents, created on first use"""
+        if self._summarizer is None:
+            from summarizer import SummaryPipeline
+            self._summarizer = SummaryPipeline(self.api_key, self.model, cache=self.response_cache,
+                                               scheduler=self.scheduler, temperature=self.temperature,
+                                               complete=self._complete_standalone)
+        return self._summarizer
+    
+    def _summarize_chunks(self, chunks: List[str], stub: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Send one summary prompt; long documents are first condensed chunk by chunk"""
+        if not chunks:
+            return "Error: Nothing to summarize"
+        if len(chunks) == 1:
+            prompt = summarize_prompt(chunks[0])
         else:
+            # Chunks are summarized in parallel; only the final merge goes through history (and streams)
+            try:
+                prompt = self._summary_pipeline().final_prompt(chunks)
+            except Exception as e:
+                return self._format_api_error(e)
+        return self._call_mistral_api(prompt, stream=stream, history_stub=stub)
+    
+    def process_user_input(self, user_input: str, stream: bool = False) -> Union[str, Iterator[str]]:
+        """Process user input and route to appropriate handler
+        
+        Calculator and help commands always return a string; AI-backed
+        commands return a chunk generator when stream=True.
+        """
+        start = time.perf_counter()
+        command, args = self.commands.lookup(user_input.strip())
+        answered = self.history.answered
+        result = self._handle_user_input(command, args, user_input, stream)
+        label = command.name[1:] if command is not None else "question"
+        if self.conversation_log is not None:
+            result = self.log_turn(user_input, result, label, answered)
+        if isinstance(result, str):
+            self.metrics.record_request(label, time.perf_counter() - start)
+        elif isinstance(result, Iterator):
+            # Streamed replies are timed until their last chunk
+            return self.metrics.timed_stream(result, label, start)
+        return result
+    
+    @staticmethod
+    def command_label(user_input: str) -> str:
+        """Metrics label for a message: its slash command, or question for free text"""
+        return FinancialBot.commands.label(user_input)
+    
+    def _handle_user_input(self, command: Optional[Command], args: str, user_input: str,
+                           stream: bool = False) -> Union[str, Iterator[str]]:
+        self.last_reply_calculated = command is not None and command.calculator
+        if command is None:
+            # Plain-language calculations are answered locally, without an API call
+            with self.metrics.stage("route"):
+                intent = self.router.route(user_input)
+            if intent is not None:
+                self.last_reply_calculated = True
+                return self.run_local_intent(intent)
+            
             # General financial question
-            return self.answer_financial_question(user_input)
+            return self.answer_financial_question(user_input, stream=stream)
+        
+        if command.reads_files and not self.allow_file_access:
+            return FILE_ACCESS_DISABLED
+        try:
+            return command.handler(self, args, stream)
+        except (IndexError, ValueError):
+            return command.usage_reply()
+    
+    # ==========================================================================
+    # Commands (one dispatch table for the CLI, the Streamlit app and the server)
+    # ==========================================================================
+    
+    commands = CommandRegistry()
+    
+    @commands.command('/calc_return', "Usage: /calc_return <buy_price> <sell_price>",
+                      "Investment return", "/calc_return 100 150", calculator=True)
+    def _calc_return_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        return self.calculate_percentage_return(float(parts[0]), float(parts[1]))
+    
+    @commands.command('/calc_return_batch', "Usage: /calc_return_batch <positions.csv|.parquet> [output.csv]",
+                      "Returns for a file of positions", "/calc_return_batch portfolio.csv results.csv",
+                      reads_files=True)
+    def _calc_return_batch_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        return self.calculate_percentage_return_batch(parts[0], parts[1] if len(parts) > 1 else None)
+    
+    @commands.command('/compound', "Usage: /compound <principal> <annual_rate> <years> [compounds_per_year]",
+                      "Compound interest", "/compound 1000 5 10 12", calculator=True)
+    def _compound_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        compounds = int(parts[3]) if len(parts) > 3 else 1
+        return self.calculate_compound_interest(float(parts[0]), float(parts[1]), float(parts[2]), compounds)
+    
+    @commands.command('/convert', "Usage: /convert <amount> <from_currency> <to_currency> [exchange_rate]"
+                      " (without a rate, the local rate table is used)",
+                      "Currency conversion", "/convert 100 USD EUR", calculator=True)
+    def _convert_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        rate = float(parts[3]) if len(parts) > 3 else None
+        return self.currency_conversion(float(parts[0]), parts[1], parts[2], rate)
+    
+    @commands.command('/convert_batch', "Usage: /convert_batch <amounts.csv|.parquet> <from_currency> <to_currency> [output.csv]",
+                      "Convert the amounts in a file", "/convert_batch invoices.csv EUR USD converted.csv",
+                      reads_files=True)
+    def _convert_batch_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        return self.currency_conversion_batch(parts[0], parts[1], parts[2], parts[3] if len(parts) > 3 else None)
+    
+    @commands.command('/amortize', "Usage: /amortize <principal> <annual_rate> <years> [payments_per_year] [extra_payment]",
+                      "Loan amortization schedule", "/amortize 300000 6.5 30", calculator=True)
+    def _amortize_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        periods = int(parts[3]) if len(parts) > 3 else 12
+        extra = float(parts[4]) if len(parts) > 4 else 0.0
+        return self.calculate_amortization(float(parts[0]), float(parts[1]), float(parts[2]), periods, extra)
+    
+    @commands.command('/fv', "Usage: /fv <payment> <annual_rate> <years> [payments_per_year] [initial_amount]",
+                      "Future value of regular contributions", "/fv 500 7 20", calculator=True)
+    def _fv_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        periods = int(parts[3]) if len(parts) > 3 else 12
+        initial = float(parts[4]) if len(parts) > 4 else 0.0
+        return self.calculate_future_value(float(parts[0]), float(parts[1]), float(parts[2]), periods, initial)
+    
+    @commands.command('/npv', "Usage: /npv <rate> <cf0> <cf1> ...",
+                      "Net present value", "/npv 8 -1000 300 400 500", calculator=True)
+    def _npv_command(self, args: str, stream: bool) -> str:
+        parts = args.split()
+        return self.calculate_npv(float(parts[0]), [float(p) for p in parts[1:]])
+    
+    @commands.command('/irr', "Usage: /irr <cf0> <cf1> ...",
+                      "Internal rate of return", "/irr -1000 300 400 500", calculator=True)
+    def _irr_command(self, args: str, stream: bool) -> str:
+        return self.calculate_irr([float(p) for p in args.split()])
+    
+    @commands.command('/simulate', "Usage: /simulate <initial> <annual_return> <volatility> <years> [monthly_contribution] [paths] [seed]",
+                      "Monte Carlo projection", "/simulate 10000 7 15 30 500 100000 42", calculator=True)
+    def _simulate_command(self, args: str, stream: bool):
+        parts = args.split()
+        contribution = float(parts[4]) if len(parts) > 4 else 0.0
+        paths = int(parts[5]) if len(parts) > 5 else 10_000
+        seed = int(parts[6]) if len(parts) > 6 else None
+        return self.run_simulation(float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3]),
+                                   contribution, paths, seed)
+    
+    @commands.command('/explain', "Usage: /explain <financial_term>",
+                      "Explain a financial term", "/explain P/E ratio")
+    def _explain_command(self, args: str, stream: bool):
+        if not args:
+            raise ValueError("no term")
+        return self.explain_financial_term(args, stream=stream)
+    
+    @commands.command('/summarize', "Usage: /summarize [text | file | folder [output_folder]]",
+                      "Summarize market news or a report", "/summarize <pasted text>")
+    def _summarize_command(self, args: str, stream: bool):
+        if not args:
+            if not self.collects_paste:
+                raise ValueError("no text")
+            return SUMMARIZE_PASTE_PROMPT
+        if not self.allow_file_access:
+            return self.summarize_market_text(args, stream=stream)
+        if os.path.isfile(args):
+            return self.summarize_file(args, stream=stream)
+        parts = args.split()
+        if os.path.isdir(parts[0]):
+            return self.summarize_folder(parts[0], parts[1] if len(parts) > 1 else None)
+        return self.summarize_market_text(args, stream=stream)
+    
+    @commands.command('/ask_many', "Usage: /ask_many <one question per line | questions file>",
+                      "Answer several questions at once", "/ask_many <pasted questions>")
+    def _ask_many_command(self, args: str, stream: bool):
+        if not args:
+            if not self.collects_paste:
+                raise ValueError("no questions")
+            return ASK_MANY_PASTE_PROMPT
+        if self.allow_file_access and "\n" not in args and os.path.isfile(args):
+            try:
+                with open(args, encoding="utf-8") as f:
+                    args = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                return f"Error: {e}"
+        return self.ask_many(split_questions(args))
+    
+    @commands.command('/metrics', summary="Latency, token usage and cost")
+    def _metrics_command(self, args: str, stream: bool) -> str:
+        return self.metrics.summary()
+    
+    @commands.command('/help', summary="Show the help menu")
+    def _help_command(self, args: str, stream: bool) -> str:
+        return self.show_help()
+    
+    def run_local_intent(self, intent: Intent) -> str:
+        """Run the calculator selected by the intent router"""
+        handlers = {
+            "calc_return": self.calculate_percentage_return,
+            "compound": self.calculate_compound_interest,
+            "convert": self.currency_conversion,
+        }
+        return handlers[intent.name](**intent.args)
     
     def show_help(self) -> str:
         """Show available commands"""
@@ -247,21 +922,55 @@ AVAILABLE COMMANDS:
     Calculate percentage return on investment
     Example: /calc_return 100 150
 
+  /calc_return_batch <positions_file> [output_file]
+    Returns for a CSV/Parquet of buy_price,sell_price[,quantity]
+    Example: /calc_return_batch portfolio.csv results.csv
+
   /compound <principal> <annual_rate> <years> [compounds_per_year]
     Calculate compound interest
     Example: /compound 1000 5 10 12
 
-  /convert <amount> <from_currency> <to_currency> <exchange_rate>
-    Convert between currencies
-    Example: /convert 100 USD EUR 0.92
+  /convert <amount> <from_currency> <to_currency> [exchange_rate]
+    Convert between currencies (without a rate, the local rate table is used)
+    Example: /convert 100 USD JPY
+
+  /convert_batch <amounts_file> <from_currency> <to_currency> [output_file]
+    Convert the amount column of a CSV/Parquet file
+    Example: /convert_batch invoices.csv EUR USD converted.csv
+
+  /simulate <initial> <annual_return> <volatility> <years> [monthly] [paths] [seed]
+    Monte Carlo projection: percentiles and chance of ending below the amount invested
+    Example: /simulate 10000 7 15 30 500 100000 42
+
+  /amortize <principal> <annual_rate> <years> [payments_per_year] [extra]
+    Loan payment and year-by-year amortization schedule
+    Example: /amortize 300000 6.5 30
+
+  /fv <payment> <annual_rate> <years> [payments_per_year] [initial]
+    Future value of regular contributions
+    Example: /fv 500 7 20
+
+  /npv <rate> <cf0> <cf1> ...
+    Net present value (first cash flow at t=0)
+    Example: /npv 8 -1000 300 400 500
+
+  /irr <cf0> <cf1> ...
+    Internal rate of return
+    Example: /irr -1000 300 400 500
 
 📚 EDUCATION:
   /explain <term>
     Get explanation of a financial term
     Example: /explain dividend yield
 
-  /summarize
-    Summarize pasted market/financial text
+  /summarize [text | file | folder [output_folder]]
+    Summarize pasted text (end with /end), a long document,
+    or every .txt/.md file in a folder
+    Example: /summarize reports/ summaries/
+
+  /ask_many [questions_file]
+    Answer several questions at once (paste one per line, end with /end)
+    Example: /ask_many faq.txt
 
 ❓ GENERAL:
   Just type any financial question!
@@ -273,6 +982,9 @@ AVAILABLE COMMANDS:
 ⚠️  /disclaimer
     Show the important disclaimer
 
+📈 /metrics
+    Latency percentiles, token usage and estimated API cost
+
 📖 /help
     Show this help menu
 
@@ -286,6 +998,33 @@ AVAILABLE COMMANDS:
 """
 
 
+def split_questions(text: str) -> List[str]:
+    """One question per non-empty line, without list markers such as 1. or -"""
+    return [re.sub(r"^(?:[-*•]|\d+[.)])\s+", "", line.strip()) for line in text.splitlines() if line.strip()]
+
+
+def read_pasted_text() -> str:
+    """Read lines until a line with /end (or end of input)"""
+    lines = []
+    while True:
+        try:
+            line = input()
+        except EOFError:
+            break
+        if line.strip().lower() == '/end':
+            break
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def print_progress(done: int, total: int) -> None:
+    """Progress line for long local computations; cleared when finished"""
+    if done < total:
+        print(f"\rBot: ⏳ {done / total:.0%}", end="", flush=True)
+    else:
+        print("\rBot:         \rBot: ", end="", flush=True)
+
+
 def main():
     """Main bot loop"""
     print("\n" + "="*80)
@@ -294,7 +1033,18 @@ def main():
     print(DISCLAIMER)
     
     bot = FinancialBot()
+    bot.on_progress = print_progress
+    bot.collects_paste = True
     print("\n✅ Bot initialized successfully!")
+    if bot.conversation_log_error:
+        print(f"⚠️  Running without the conversation log: {bot.conversation_log_error}")
+    if bot.conversation_log is not None:
+        # python bot.py --resume <session_id> continues a logged conversation
+        if sys.argv[1:2] == ["--resume"] and len(sys.argv) > 2:
+            turns = bot.resume(sys.argv[2])
+            print(f"Resumed session {bot.session_id} ({turns} earlier turns).")
+        else:
+            print(f"Session {bot.session_id} is being logged; continue it later with: python bot.py --resume {bot.session_id}")
     print("Type '/help' for available commands or ask any financial question.\n")
     
     while True:
@@ -314,10 +1064,33 @@ def main():
                 print("\nBot:" + DISCLAIMER)
                 continue
             
-            # Process input
-            print("\nBot: ", end="", flush=True)
-            response = bot.process_user_input(user_input)
-            print(response + "\n")
+            # Process input, printing streamed tokens as they arrive
+            if user_input.lower() == '/summarize':
+                # Collect a multi-line paste first
+                print(f"\nBot: {SUMMARIZE_PASTE_PROMPT}")
+                text = read_pasted_text()
+                print("\nBot: ", end="", flush=True)
+                answered = bot.history.answered
+                response = bot.summarize_market_text(text, stream=True)
+                if bot.conversation_log is not None:
+                    response = bot.log_turn(f"/summarize {text}", response, "summarize", answered)
+            elif user_input.lower() == '/ask_many':
+                print(f"\nBot: {ASK_MANY_PASTE_PROMPT}")
+                questions = split_questions(read_pasted_text())
+                print("\nBot: ", end="", flush=True)
+                answered = bot.history.answered
+                response = bot.ask_many(questions)
+                if bot.conversation_log is not None:
+                    response = bot.log_turn("/ask_many " + "\n".join(questions), response, "ask_many", answered)
+            else:
+                print("\nBot: ", end="", flush=True)
+                response = bot.process_user_input(user_input, stream=True)
+            if isinstance(response, str):
+                print(response + "\n")
+            else:
+                for chunk in response:
+                    print(chunk, end="", flush=True)
+                print("\n")
             
         except KeyboardInterrupt:
             print("\n\nBot: Goodbye! Remember to consult with financial professionals. 👋")
@@ -0,0 +1,70 @@
+"""
+Slash-command registry shared by every front-end.
+
+FinancialBot declares its commands with the @commands.command(...) decorator;
+the CLI (bot.py), the Streamlit app (app.py) and the server (server.py) all
+dispatch through the same table. A message is looked up by its first word in
+a dict, so dispatch costs the same for the first command as for the last,
+instead of walking an if/elif chain of startswith() checks.
+
+Handlers are plain functions taking (bot, args, stream), where args is the
+text after the command word. A handler that raises IndexError or ValueError
+while parsing its arguments gets the command's usage line as the reply.
+"""
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Command(NamedTuple):
+    """One slash command and how it may be used"""
+    name: str
+    handler: Callable
+    usage: str
+    summary: str
+    example: str
+    # Answered locally from its arguments alone (no AI call, no files)
+    calculator: bool
+    # Reads files on this machine (disabled for remote users)
+    reads_files: bool
+
+    def usage_reply(self) -> str:
+        """Reply to a malformed call: usage line plus an example"""
+        return f"{self.usage}\nExample: {self.example}" if self.example else self.usage
+
+
+class CommandRegistry:
+    """Command word -> Command, with O(1) lookup"""
+
+    def __init__(self):
+        self._commands: Dict[str, Command] = {}
+
+    def command(self, name: str, usage: str = "", summary: str = "", example: str = "",
+                calculator: bool = False, reads_files: bool = False) -> Callable:
+        """Decorator registering a handler under /name"""
+        def register(handler: Callable) -> Callable:
+            self._commands[name] = Command(name, handler, usage, summary, example, calculator, reads_files)
+            return handler
+        return register
+
+    def lookup(self, user_input: str) -> Tuple[Optional[Command], str]:
+        """(command, argument text) for a message, or (None, "") if it is not a command"""
+        if not user_input.startswith("/"):
+            return None, ""
+        parts = user_input.split(None, 1)
+        command = self._commands.get(parts[0].lower())
+        if command is None:
+            return None, ""
+        return command, parts[1].strip() if len(parts) > 1 else ""
+
+    def label(self, user_input: str) -> str:
+        """Metrics label for a message: its command name, or question for free text"""
+        command, _ = self.lookup(user_input.strip())
+        return command.name[1:] if command is not None else "question"
+
+    def calculators(self) -> List[str]:
+        return [c.name for c in self._commands.values() if c.calculator]
+
+    def __iter__(self) -> Iterable[Command]:
+        return iter(self._commands.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._commands
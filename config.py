@@ -1,14 +1,239 @@
 """
 Configuration management for Financial Bot
+
+Settings are loaded lazily: importing this module does not read .env or the
+environment. The first call to get_settings() does, once per process, and a
+missing API key is only reported when something actually needs it
+(require_api_key()).
+
+For backwards compatibility ``config.MISTRAL_API_KEY`` and
+``config.MISTRAL_MODEL`` still work; they are resolved on first access.
 """
 import os
-from dotenv import load_dotenv
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+MISSING_KEY_MESSAGE = "MISTRAL_API_KEY not found in environment variables. Please set it in .env file."
+
+# The bundled rate snapshot, found wherever the bot is started from
+BUNDLED_FX_RATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.csv")
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _bool(name: str, default: bool) -> bool:
+    return os.getenv(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """All tunables of the bot, read from the environment (and .env)"""
+    mistral_api_key: Optional[str]
+    mistral_model: str
+    server_url: Optional[str]
+
+    # HTTP connection pool (llm_client.py)
+    pool_size: int
+    keepalive_seconds: float
+    timeout_seconds: float
+    connect_timeout_seconds: float
+    async_pool_size: int
+    async_pool_shards: int
+
+    # /explain response cache (response_cache.py)
+    response_cache_size: int
+    response_cache_ttl: float
+    response_cache_path: Optional[str]
+
+    # Semantic answer cache for free-form questions (semantic_cache.py); threshold 0 disables it
+    semantic_cache_threshold: float
+    semantic_cache_size: int
+    semantic_cache_ttl: float
+    semantic_cache_path: Optional[str]
+    semantic_cache_model: Optional[str]
+
+    # Conversation history (history.py)
+    history_token_budget: int
+    history_summary_tokens: int
+
+    # Rate limits and retries (scheduler.py); 0 disables a limit
+    rate_limit_rps: float
+    rate_limit_tpm: float
+    max_retries: int
+    retry_base_delay: float
+    retry_max_delay: float
+
+    # Intent router (intent_router.py)
+    router_model_path: Optional[str]
+
+    # Long-document /summarize pipeline (summarizer.py)
+    summary_workers: int
+    summary_chunk_tokens: int
+
+    # Multi-question fan-out and speculative /explain prefetch (bot.py, prefetch.py)
+    batch_workers: int
+    prefetch_related: bool
+    prefetch_max_terms: int
+    related_terms_path: Optional[str]
+
+    # Local exchange-rate snapshot for /convert (fx_rates.py)
+    fx_rates_path: Optional[str]
+    fx_pivot: str
+
+    # Multi-session server (server.py, session_store.py)
+    server_max_live_sessions: int
+    server_session_memory_mb: float
+    server_session_ttl: float
+    server_session_db: Optional[str]
+    server_idle_seconds: float
+    server_max_message_chars: int
+    server_max_simulation_paths: int
+    server_max_cashflow_years: float
+
+    # Local model for short requests (llm_backend.py); no path disables it, 0 threads = one per CPU
+    local_model_path: Optional[str]
+    local_model_threads: int
+    local_model_ctx: int
+    local_model_preload: bool
+    local_max_prompt_tokens: int
+    local_max_tokens: int
+    local_max_queue: int
+
+    # Durable conversation log (conversation_log.py); no directory disables it
+    conversation_log_dir: Optional[str]
+    conversation_log_segment_mb: float
+    conversation_log_retention_days: float
+    conversation_log_fsync: bool
+
+    # Metrics and tracing (metrics.py); prices are USD per million tokens
+    metrics_enabled: bool
+    metrics_path: Optional[str]
+    metrics_port: int
+    metrics_otel: bool
+    price_input_per_mtok: float
+    price_output_per_mtok: float
+
+    # /simulate Monte Carlo engine (montecarlo.py); 0 workers = one per CPU
+    simulation_workers: int
+    simulation_time_budget: float
+    simulation_max_paths: int
+
+    # /amortize and /fv schedules (cashflow.py)
+    cashflow_max_years: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        from dotenv import load_dotenv
+
+        # Load environment variables from .env file
+        load_dotenv()
+        return cls(
+            mistral_api_key=os.getenv('MISTRAL_API_KEY') or None,
+            mistral_model=os.getenv('MISTRAL_MODEL', 'mistral-small-latest'),
+            server_url=os.getenv('MISTRAL_SERVER_URL') or None,
+            pool_size=_int('MISTRAL_POOL_SIZE', 10),
+            keepalive_seconds=_float('MISTRAL_KEEPALIVE', 60),
+            timeout_seconds=_float('MISTRAL_TIMEOUT', 30),
+            connect_timeout_seconds=_float('MISTRAL_CONNECT_TIMEOUT', 5),
+            async_pool_size=_int('MISTRAL_ASYNC_POOL_SIZE', 256),
+            async_pool_shards=max(1, _int('MISTRAL_ASYNC_POOL_SHARDS', 8)),
+            rate_limit_rps=_float('RATE_LIMIT_RPS', 0),
+            rate_limit_tpm=_float('RATE_LIMIT_TPM', 0),
+            max_retries=_int('MISTRAL_MAX_RETRIES', 4),
+            retry_base_delay=_float('MISTRAL_RETRY_BASE_DELAY', 0.5),
+            retry_max_delay=_float('MISTRAL_RETRY_MAX_DELAY', 30),
+            response_cache_size=_int('RESPONSE_CACHE_SIZE', 1000),
+            response_cache_ttl=_float('RESPONSE_CACHE_TTL', 7 * 24 * 3600),
+            response_cache_path=os.getenv('RESPONSE_CACHE_PATH') or None,
+            semantic_cache_threshold=_float('SEMANTIC_CACHE_THRESHOLD', 0),
+            semantic_cache_size=_int('SEMANTIC_CACHE_SIZE', 5000),
+            semantic_cache_ttl=_float('SEMANTIC_CACHE_TTL', 7 * 24 * 3600),
+            semantic_cache_path=os.getenv('SEMANTIC_CACHE_PATH') or None,
+            semantic_cache_model=os.getenv('SEMANTIC_CACHE_MODEL') or None,
+            history_token_budget=_int('HISTORY_TOKEN_BUDGET', 3000),
+            history_summary_tokens=_int('HISTORY_SUMMARY_TOKENS', 300),
+            router_model_path=os.getenv('ROUTER_MODEL_PATH') or None,
+            summary_workers=max(1, _int('SUMMARY_WORKERS', 8)),
+            summary_chunk_tokens=_int('SUMMARY_CHUNK_TOKENS', 2000),
+            batch_workers=max(1, _int('BATCH_WORKERS', 8)),
+            prefetch_related=_bool('PREFETCH_RELATED', False),
+            prefetch_max_terms=_int('PREFETCH_MAX_TERMS', 3),
+            related_terms_path=os.getenv('RELATED_TERMS_PATH') or None,
+            fx_rates_path=os.getenv('FX_RATES_PATH', BUNDLED_FX_RATES) or None,
+            fx_pivot=os.getenv('FX_PIVOT', 'USD'),
+            server_max_live_sessions=_int('SERVER_MAX_LIVE_SESSIONS', 2000),
+            server_session_memory_mb=_float('SERVER_SESSION_MEMORY_MB', 256),
+            server_session_ttl=_float('SERVER_SESSION_TTL', 7 * 24 * 3600),
+            server_session_db=os.getenv('SERVER_SESSION_DB') or None,
+            server_idle_seconds=_float('SERVER_IDLE_SECONDS', 300),
+            server_max_message_chars=_int('SERVER_MAX_MESSAGE_CHARS', 20000),
+            server_max_simulation_paths=_int('SERVER_MAX_SIMULATION_PATHS', 200_000),
+            server_max_cashflow_years=_float('SERVER_MAX_CASHFLOW_YEARS', 50),
+            local_model_path=os.getenv('LOCAL_MODEL_PATH') or None,
+            local_model_threads=_int('LOCAL_MODEL_THREADS', 0),
+            local_model_ctx=_int('LOCAL_MODEL_CTX', 2048),
+            local_model_preload=_bool('LOCAL_MODEL_PRELOAD', True),
+            local_max_prompt_tokens=_int('LOCAL_MAX_PROMPT_TOKENS', 96),
+            local_max_tokens=_int('LOCAL_MAX_TOKENS', 256),
+            local_max_queue=max(1, _int('LOCAL_MAX_QUEUE', 2)),
+            conversation_log_dir=os.getenv('CONVERSATION_LOG_DIR') or None,
+            conversation_log_segment_mb=_float('CONVERSATION_LOG_SEGMENT_MB', 64),
+            conversation_log_retention_days=_float('CONVERSATION_LOG_RETENTION_DAYS', 0),
+            conversation_log_fsync=_bool('CONVERSATION_LOG_FSYNC', False),
+            metrics_enabled=_bool('METRICS_ENABLED', True),
+            metrics_path=os.getenv('METRICS_PATH') or None,
+            metrics_port=_int('METRICS_PORT', 0),
+            metrics_otel=_bool('METRICS_OTEL', False),
+            price_input_per_mtok=_float('MISTRAL_PRICE_INPUT', 0.1),
+            price_output_per_mtok=_float('MISTRAL_PRICE_OUTPUT', 0.3),
+            simulation_workers=_int('SIMULATION_WORKERS', 0),
+            simulation_time_budget=_float('SIMULATION_TIME_BUDGET', 10),
+            simulation_max_paths=_int('SIMULATION_MAX_PATHS', 5_000_000),
+            cashflow_max_years=_float('CASHFLOW_MAX_YEARS', 100),
+        )
+
+
+_settings: Optional[Settings] = None
+_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Return the process-wide settings, loading them on first use"""
+    global _settings
+    if _settings is None:
+        with _lock:
+            if _settings is None:
+                _settings = Settings.from_env()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Re-read the environment (e.g. after changing os.environ in a benchmark)"""
+    global _settings
+    with _lock:
+        _settings = Settings.from_env()
+    return _settings
+
 
-# Load environment variables from .env file
-load_dotenv()
+def require_api_key() -> str:
+    """Return the API key or raise the same error the bot always has"""
+    api_key = get_settings().mistral_api_key
+    if not api_key:
+        raise ValueError(MISSING_KEY_MESSAGE)
+    return api_key
 
-MISTRAL_API_KEY = os.getenv('MISTRAL_API_KEY')
-MISTRAL_MODEL = os.getenv('MISTRAL_MODEL', 'mistral-small-latest')
 
-if not MISTRAL_API_KEY:
-    raise ValueError("MISTRAL_API_KEY not found in environment variables. Please set it in .env file.")
+def __getattr__(name: str):
+    # Lazy module attributes (PEP 562) kept for backwards compatibility
+    if name == 'MISTRAL_API_KEY':
+        return require_api_key()
+    if name == 'MISTRAL_MODEL':
+        return get_settings().mistral_model
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
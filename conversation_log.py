@@ -0,0 +1,684 @@
+"""
+Durable, append-only conversation log (transcripts for auditing and analytics).
+
+Every turn (user message, bot reply, command, token counts) is appended as one
+length-prefixed binary record to the current segment file in
+CONVERSATION_LOG_DIR:
+
+    conversations-000001.log   8-byte file header, then records:
+
+    uint32 record length | uint32 crc32 of the rest | float64 timestamp |
+    uint8 flags | uint8 label length | uint16 session id length |
+    uint32 prompt tokens | uint32 reply tokens | uint32 user text length |
+    uint32 history entry length |
+    session id | label | user text | history entry | reply text
+                                                        (UTF-8, little-endian)
+
+The history entry is what the conversation history kept for the user's side
+of the turn when that differs from what was typed (the /explain prompt, the
+/summarize stub), so a resumed session gets back exactly the same history.
+
+Appending costs one small write (no JSON, no rewrite of earlier turns), so
+logging adds microseconds to a request. An in-memory index maps each session
+to the offsets of its records; it is rebuilt on open by walking the record
+headers, and a torn record at the end of the last segment (a crash mid-write)
+is truncated away. Reads memory-map the segments and decode only the fields
+they need, so analytics scans over the headers do not copy the texts.
+
+Segments rotate at CONVERSATION_LOG_SEGMENT_MB. compact() rewrites the closed
+segments into one, dropping turns older than CONVERSATION_LOG_RETENTION_DAYS
+and sessions erased with delete_session(). The bot's log (auto_compact) does
+this in a background thread on opening and after each rotation, whenever a
+retention period is set or a session was erased.
+
+One process writes a log directory at a time: a writer holds an exclusive
+lock on <dir>/.lock, and a second writer (another bot, server or app
+process, or compact/delete from the command line) fails to open; a bot that
+cannot get the lock runs without the log. Other processes may open the log
+read_only (e.g. for reports) while the bot runs.
+
+    python conversation_log.py report            # top terms, commands, tokens
+    python conversation_log.py show <session_id>
+    python conversation_log.py compact
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import get_settings
+
+FILE_HEADER = b"FBLOG\x00\x02\n"
+# length, crc, timestamp, flags, label length, session id length, prompt tokens, reply tokens,
+# user length, history entry length
+RECORD = struct.Struct("<IIdBBHIIII")
+LOCK_NAME = ".lock"
+
+IN_HISTORY = 1
+ERROR = 2
+# Erases every earlier record of the session (applied by compact())
+TOMBSTONE = 4
+
+SEGMENT_PATTERN = re.compile(r"conversations-(\d{6})\.log$")
+# Index entries pack (segment number, offset) into one 64-bit integer
+_OFFSET_BITS = 40
+
+
+class Turn(NamedTuple):
+    """One logged exchange"""
+    session_id: str
+    timestamp: float
+    label: str
+    user: str
+    # The user message as kept in the conversation history
+    history_user: str
+    reply: str
+    prompt_tokens: int
+    reply_tokens: int
+    in_history: bool
+    error: bool
+
+
+def _segment_name(number: int) -> str:
+    return f"conversations-{number:06d}.log"
+
+
+def _decode(buf, offset: int, header: Tuple) -> Turn:
+    length, _, timestamp, flags, label_len, sid_len, prompt_tokens, reply_tokens, user_len, entry_len = header
+    start = offset + RECORD.size
+    sid_end = start + sid_len
+    label_end = sid_end + label_len
+    user_end = label_end + user_len
+    entry_end = user_end + entry_len
+    user = str(buf[label_end:user_end], "utf-8")
+    return Turn(
+        str(buf[start:sid_end], "utf-8"),
+        timestamp,
+        str(buf[sid_end:label_end], "utf-8"),
+        user,
+        str(buf[user_end:entry_end], "utf-8") or user,
+        str(buf[entry_end:offset + length], "utf-8"),
+        prompt_tokens,
+        reply_tokens,
+        bool(flags & IN_HISTORY),
+        bool(flags & ERROR),
+    )
+
+
+def _records(buf, verify: bool = False) -> Iterator[Tuple[int, Tuple]]:
+    """(offset, header) of each complete record in a mapped segment"""
+    offset = len(FILE_HEADER)
+    end = len(buf)
+    while offset + RECORD.size <= end:
+        header = RECORD.unpack_from(buf, offset)
+        length = header[0]
+        if length < RECORD.size or offset + length > end:
+            return
+        if verify and zlib.crc32(buf[offset + 8:offset + length]) != header[1]:
+            return
+        yield offset, header
+        offset += length
+
+
+def _session_id(buf, offset: int, header: Tuple) -> str:
+    start = offset + RECORD.size
+    return str(buf[start:start + header[5]], "utf-8")
+
+
+class _Segment:
+    """A read-only memory map of one segment file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self.map[:len(FILE_HEADER)]
+        if header != FILE_HEADER:
+            self.map.close()
+            if header[:6] == FILE_HEADER[:6]:
+                raise ValueError(f"{path} was written in another conversation log format (version {header[6]})")
+            raise ValueError(f"{path} is not a conversation log segment")
+
+    def close(self) -> None:
+        self.map.close()
+
+
+class ConversationLog:
+    """Append-only segmented transcript log with a per-session offset index"""
+
+    def __init__(self, directory: Optional[str] = None, segment_bytes: Optional[int] = None,
+                 retention_days: Optional[float] = None, fsync: Optional[bool] = None,
+                 read_only: bool = False, auto_compact: bool = False):
+        settings = get_settings()
+        self.directory = directory if directory is not None else settings.conversation_log_dir
+        if not self.directory:
+            raise ValueError("No conversation log directory (set CONVERSATION_LOG_DIR)")
+        self.segment_bytes = (segment_bytes if segment_bytes is not None
+                              else int(settings.conversation_log_segment_mb * 1024 * 1024))
+        self.retention_days = retention_days if retention_days is not None else settings.conversation_log_retention_days
+        self.fsync = fsync if fsync is not None else settings.conversation_log_fsync
+        self.read_only = read_only
+        # Compact in the background on opening and after each rotation (see _compact_in_background)
+        self.auto_compact = auto_compact and not read_only
+        if not read_only:
+            os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._index: Dict[str, array] = {}
+        # Session -> position of its latest tombstone; earlier records are hidden until compacted
+        self._erased: Dict[str, int] = {}
+        # Closed segments are mapped once and kept
+        self._sealed: Dict[int, _Segment] = {}
+        self._file = None
+        self._lock_file = None
+        self._active = 0
+        self._size = 0
+        self.appended = 0
+        self.rotations = 0
+        self.compactions = 0
+        self.compaction_errors = 0
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+        self._compact_in_background()
+
+    # ------------------------------------------------------------------
+    # Segments and index
+    # ------------------------------------------------------------------
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, _segment_name(number))
+
+    def _take_writer_lock(self) -> None:
+        try:
+            import fcntl
+        except ImportError:
+            # No flock (Windows): the single-writer rule is not enforced
+            return
+        self._lock_file = open(os.path.join(self.directory, LOCK_NAME), "a")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise ValueError(f"Conversation log {self.directory} is already open for writing by another "
+                             f"process (one writer per directory; open it read_only to read)")
+
+    def _open(self) -> None:
+        if not self.read_only:
+            self._take_writer_lock()
+        numbers = self._segment_numbers() if os.path.isdir(self.directory) else []
+        if not numbers:
+            if self.read_only:
+                raise ValueError(f"No conversation log in {self.directory}")
+            self._start_segment(1)
+            return
+        *sealed, last = numbers
+        for number in sealed:
+            self._sealed[number] = _Segment(self._path(number))
+            self._index_segment(number, self._sealed[number].map)
+        end = self._recover(last)
+        self._active = last
+        self._size = end
+        if not self.read_only:
+            self._file = open(self._path(last), "ab")
+
+    def _recover(self, number: int) -> int:
+        """Index the last segment and return where its last complete record ends
+
+        A torn record left by a crash is cut off (unless read_only: the
+        writer may still be in the middle of it).
+        """
+        path = self._path(number)
+        end = len(FILE_HEADER)
+        if os.path.getsize(path) <= end:
+            if not self.read_only:
+                with open(path, "wb") as f:
+                    f.write(FILE_HEADER)
+            return end
+        segment = _Segment(path)
+        try:
+            for offset, header in _records(segment.map, verify=True):
+                self._add(_session_id(segment.map, offset, header), number, offset, header[3])
+                end = offset + header[0]
+            torn = end < len(segment.map)
+        finally:
+            segment.close()
+        if torn and not self.read_only:
+            os.truncate(path, end)
+        return end
+
+    def _index_segment(self, number: int, buf) -> None:
+        for offset, header in _records(buf):
+            self._add(_session_id(buf, offset, header), number, offset, header[3])
+
+    def _add(self, session_id: str, number: int, offset: int, flags: int) -> None:
+        if flags & TOMBSTONE:
+            self._index.pop(session_id, None)
+            self._erased[session_id] = number << _OFFSET_BITS | offset
+            return
+        offsets = self._index.get(session_id)
+        if offsets is None:
+            offsets = self._index[session_id] = array("Q")
+        offsets.append(number << _OFFSET_BITS | offset)
+
+    def _start_segment(self, number: int) -> None:
+        self._file = open(self._path(number), "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER)
+            self._file.flush()
+        self._active = number
+        self._size = self._file.tell()
+
+    def rotate(self) -> None:
+        """Close the current segment and start a new one"""
+        with self._lock:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        if self._size <= len(FILE_HEADER):
+            return
+        self._file.close()
+        self._sealed[self._active] = _Segment(self._path(self._active))
+        self._start_segment(self._active + 1)
+        self.rotations += 1
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, session_id: str, user: str, reply: str, label: str = "question",
+               prompt_tokens: int = 0, reply_tokens: int = 0, in_history: bool = False,
+               error: bool = False, timestamp: Optional[float] = None,
+               history_user: Optional[str] = None) -> None:
+        """Log one exchange
+
+        history_user is the user message as the conversation history kept it,
+        if that is not user itself.
+        """
+        if self.read_only:
+            raise ValueError("Conversation log opened read-only")
+        flags = (IN_HISTORY if in_history else 0) | (ERROR if error else 0)
+        entry = history_user if history_user is not None and history_user != user else ""
+        self._write(session_id, flags, label, user, entry, reply, prompt_tokens, reply_tokens, timestamp)
+
+    def delete_session(self, session_id: str) -> bool:
+        """Erase a session: it disappears now and its records are removed by the next compact()"""
+        if self.read_only:
+            raise ValueError("Conversation log opened read-only")
+        with self._lock:
+            if session_id not in self._index:
+                return False
+        self._write(session_id, TOMBSTONE, "", "", "", "", 0, 0, None)
+        return True
+
+    def _write(self, session_id: str, flags: int, label: str, user: str, entry: str, reply: str,
+               prompt_tokens: int, reply_tokens: int, timestamp: Optional[float]) -> None:
+        sid = session_id.encode("utf-8")
+        label_bytes = label.encode("utf-8")[:255]
+        user_bytes = user.encode("utf-8")
+        entry_bytes = entry.encode("utf-8")
+        body = b"".join((sid, label_bytes, user_bytes, entry_bytes, reply.encode("utf-8")))
+        length = RECORD.size + len(body)
+        head = RECORD.pack(length, 0, time.time() if timestamp is None else timestamp, flags,
+                           len(label_bytes), len(sid), prompt_tokens, reply_tokens, len(user_bytes),
+                           len(entry_bytes))
+        crc = zlib.crc32(body, zlib.crc32(head[8:]))
+        record = head[:4] + struct.pack("<I", crc) + head[8:] + body
+        with self._lock:
+            rotated = self._size + length > self.segment_bytes
+            if rotated:
+                self._rotate()
+            offset = self._size
+            self._file.write(record)
+            # Flushed per record so a crash of this process loses nothing
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += length
+            self._add(session_id, self._active, offset, flags)
+            self.appended += 1
+        if rotated:
+            self._compact_in_background()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._index
+
+    def __len__(self) -> int:
+        """Number of sessions"""
+        return len(self._index)
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def _maps(self) -> Tuple[Dict[str, int], List[Tuple[int, object]]]:
+        """Erased sessions and (segment number, buffer) for every segment, oldest first
+
+        Taken together under the lock; the caller closes the last buffer.
+        Maps replaced by compact() stay readable while the caller holds them.
+        """
+        with self._lock:
+            erased = dict(self._erased)
+            sealed = sorted(self._sealed.items())
+            active = self._active
+            size = self._size
+        active_map = None
+        if size > len(FILE_HEADER):
+            with open(self._path(active), "rb") as f:
+                active_map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        return erased, [(number, segment.map) for number, segment in sealed] + [(active, active_map)]
+
+    def turns(self, session_id: str) -> List[Turn]:
+        """Every logged turn of a session, oldest first"""
+        # Offsets and segments from one snapshot: compact() replaces both together
+        with self._lock:
+            offsets = array("Q", self._index.get(session_id, ()))
+            buffers = {number: segment.map for number, segment in self._sealed.items()}
+            active, size = self._active, self._size
+        if not offsets:
+            return []
+        mask = (1 << _OFFSET_BITS) - 1
+        active_map = None
+        if offsets[-1] >> _OFFSET_BITS == active:
+            # Only the segment still being written is mapped per call
+            with open(self._path(active), "rb") as f:
+                active_map = buffers[active] = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        try:
+            result = []
+            for packed in offsets:
+                buf = buffers[packed >> _OFFSET_BITS]
+                offset = packed & mask
+                result.append(_decode(buf, offset, RECORD.unpack_from(buf, offset)))
+            return result
+        finally:
+            if active_map is not None:
+                active_map.close()
+
+    def scan(self, since: Optional[float] = None) -> Iterator[Turn]:
+        """Every logged turn (of sessions not erased), oldest first"""
+        for buf, offset, header in self._headers(since):
+            yield _decode(buf, offset, header)
+
+    def _headers(self, since: Optional[float] = None) -> Iterator[Tuple[object, int, Tuple]]:
+        erased, maps = self._maps()
+        try:
+            for number, buf in maps:
+                if buf is None:
+                    continue
+                for offset, header in _records(buf):
+                    if header[3] & TOMBSTONE or (since is not None and header[2] < since):
+                        continue
+                    if erased:
+                        tombstone = erased.get(_session_id(buf, offset, header))
+                        if tombstone is not None and number << _OFFSET_BITS | offset < tombstone:
+                            continue
+                    yield buf, offset, header
+        finally:
+            if maps[-1][1] is not None:
+                maps[-1][1].close()
+
+    def analytics(self, top: int = 10, since: Optional[float] = None) -> Dict[str, object]:
+        """Turn, session, token and error totals plus the most asked terms and commands
+
+        Only the headers are decoded, except the user text of /explain turns
+        and questions (for the top lists).
+        """
+        from response_cache import normalize_term
+
+        turns = errors = prompt_tokens = reply_tokens = 0
+        first = last = None
+        sessions = set()
+        commands: Counter = Counter()
+        terms: Counter = Counter()
+        questions: Counter = Counter()
+        for buf, offset, header in self._headers(since):
+            length, _, timestamp, flags, label_len, sid_len, prompt, reply, user_len, _ = header
+            turns += 1
+            errors += bool(flags & ERROR)
+            prompt_tokens += prompt
+            reply_tokens += reply
+            first = timestamp if first is None else first
+            last = timestamp
+            start = offset + RECORD.size
+            sessions.add(bytes(buf[start:start + sid_len]))
+            label = str(buf[start + sid_len:start + sid_len + label_len], "utf-8")
+            commands[label] += 1
+            if label in ("explain", "question"):
+                user_start = start + sid_len + label_len
+                text = str(buf[user_start:user_start + user_len], "utf-8")
+                if label == "explain":
+                    parts = text.split(None, 1)
+                    if len(parts) > 1:
+                        terms[normalize_term(parts[1])] += 1
+                else:
+                    questions[normalize_term(text)] += 1
+        return {
+            "turns": turns,
+            "sessions": len(sessions),
+            "errors": errors,
+            "prompt_tokens": prompt_tokens,
+            "reply_tokens": reply_tokens,
+            "first": first,
+            "last": last,
+            "commands": commands.most_common(),
+            "top_terms": terms.most_common(top),
+            "top_questions": questions.most_common(top),
+        }
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def compact(self, retention_days: Optional[float] = None) -> Dict[str, int]:
+        """Rewrite the closed segments into one, without expired or erased turns
+
+        The current segment is closed first, so appends continue in a new
+        segment while the old ones are rewritten. Returns record and byte
+        counts before and after.
+        """
+        if self.read_only:
+            raise ValueError("Conversation log opened read-only")
+        retention_days = retention_days if retention_days is not None else self.retention_days
+        cutoff = time.time() - retention_days * 86400 if retention_days > 0 else None
+        with self._compact_lock:
+            with self._lock:
+                if self._file is None:
+                    raise ValueError("Conversation log is closed")
+                self._rotate()
+                sealed = sorted(self._sealed.items())
+            if not sealed:
+                return {"records_before": 0, "records_after": 0, "bytes_before": 0, "bytes_after": 0}
+
+            # A tombstone erases the records of its session that come before it
+            erased: Dict[str, Tuple[int, int]] = {}
+            for number, segment in sealed:
+                for offset, header in _records(segment.map):
+                    if header[3] & TOMBSTONE:
+                        erased[_session_id(segment.map, offset, header)] = (number, offset)
+
+            target = sealed[0][0]
+            tmp_path = self._path(target) + ".tmp"
+            records_before = records_after = bytes_before = 0
+            with open(tmp_path, "wb") as out:
+                out.write(FILE_HEADER)
+                for number, segment in sealed:
+                    buf = segment.map
+                    bytes_before += len(buf)
+                    for offset, header in _records(buf):
+                        records_before += 1
+                        if header[3] & TOMBSTONE or (cutoff is not None and header[2] < cutoff):
+                            continue
+                        tombstone = erased.get(_session_id(buf, offset, header))
+                        if tombstone is not None and (number, offset) < tombstone:
+                            continue
+                        out.write(buf[offset:offset + header[0]])
+                        records_after += 1
+                out.flush()
+                os.fsync(out.fileno())
+                bytes_after = out.tell()
+
+            with self._lock:
+                for number, segment in sealed:
+                    # Not closed here: a reader may still hold the map; it closes with its last reference
+                    del self._sealed[number]
+                os.replace(tmp_path, self._path(target))
+                for number, _ in sealed[1:]:
+                    os.remove(self._path(number))
+                self._sealed[target] = _Segment(self._path(target))
+                self._reindex()
+        return {"records_before": records_before, "records_after": records_after,
+                "bytes_before": bytes_before, "bytes_after": bytes_after}
+
+    def _reindex(self) -> None:
+        self._index.clear()
+        self._erased.clear()
+        for number, segment in sorted(self._sealed.items()):
+            self._index_segment(number, segment.map)
+        self._file.flush()
+        with open(self._path(self._active), "rb") as f:
+            if os.fstat(f.fileno()).st_size > len(FILE_HEADER):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                    self._index_segment(self._active, buf)
+
+    def _compact_in_background(self) -> None:
+        """With auto_compact, apply retention and erasures without stopping the writer
+
+        Runs only when there is something to drop (a retention period or an
+        erased session) and no compaction is already running.
+        """
+        if not self.auto_compact or self._compact_lock.locked():
+            return
+        if self.retention_days <= 0 and not self._erased:
+            return
+        threading.Thread(target=self._run_compaction, name="conversation-log-compact", daemon=True).start()
+
+    def _run_compaction(self) -> None:
+        try:
+            self.compact()
+            self.compactions += 1
+        except Exception:
+            # The log stays as it was; the next rotation tries again
+            self.compaction_errors += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Segment, session and byte counts"""
+        with self._lock:
+            return {
+                "segments": len(self._sealed) + 1,
+                "sessions": len(self._index),
+                "bytes": sum(len(s.map) for s in self._sealed.values()) + self._size,
+                "appended": self.appended,
+                "rotations": self.rotations,
+                "compactions": self.compactions,
+                "compaction_errors": self.compaction_errors,
+            }
+
+    def close(self) -> None:
+        # Let a background compaction finish first
+        with self._compact_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            for segment in self._sealed.values():
+                segment.close()
+            self._sealed.clear()
+            if self._lock_file is not None:
+                # Closing the file releases the flock
+                self._lock_file.close()
+                self._lock_file = None
+
+
+def format_report(report: Dict[str, object]) -> str:
+    """Plain-text rendering of ConversationLog.analytics()"""
+    def when(ts):
+        return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts)) if ts else "-"
+
+    lines = [
+        f"Turns:            {report['turns']:,} in {report['sessions']:,} sessions ({when(report['first'])} to {when(report['last'])})",
+        f"Errors:           {report['errors']:,}",
+        f"Tokens:           {report['prompt_tokens']:,} prompt / {report['reply_tokens']:,} reply",
+        "Commands:         " + ", ".join(f"{label or '-'} {count:,}" for label, count in report["commands"]),
+        "Top /explain terms:",
+    ]
+    lines += [f"  {count:>6,}  {term}" for term, count in report["top_terms"]] or ["  -"]
+    lines.append("Top questions:")
+    lines += [f"  {count:>6,}  {question}" for question, count in report["top_questions"]] or ["  -"]
+    return "\n".join(lines)
+
+
+_default_log: Optional[ConversationLog] = None
+_default_lock = threading.Lock()
+
+
+def get_default_conversation_log() -> Optional[ConversationLog]:
+    """Return the process-wide conversation log, or None when CONVERSATION_LOG_DIR is not set"""
+    global _default_log
+    if not get_settings().conversation_log_dir:
+        return None
+    if _default_log is None:
+        with _default_lock:
+            if _default_log is None:
+                _default_log = ConversationLog(auto_compact=True)
+    return _default_log
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and maintain the conversation log")
+    parser.add_argument("--dir", help="log directory (default CONVERSATION_LOG_DIR)")
+    sub = parser.add_subparsers(dest="action", required=True)
+    report = sub.add_parser("report", help="turn, token and error totals, top terms and questions")
+    report.add_argument("--top", type=int, default=10)
+    report.add_argument("--days", type=float, default=0, help="only the last N days (0 = all)")
+    show = sub.add_parser("show", help="print one session's transcript")
+    show.add_argument("session_id")
+    compact = sub.add_parser("compact", help="merge closed segments, dropping expired and erased turns")
+    compact.add_argument("--retention-days", type=float, default=None)
+    delete = sub.add_parser("delete", help="erase a session (removed from disk by the next compact)")
+    delete.add_argument("session_id")
+    args = parser.parse_args()
+
+    # Reports may run next to a live bot; maintenance needs the writer role
+    log = ConversationLog(args.dir, read_only=args.action in ("report", "show"))
+    try:
+        if args.action == "report":
+            since = time.time() - args.days * 86400 if args.days > 0 else None
+            print(format_report(log.analytics(args.top, since)))
+        elif args.action == "show":
+            turns = log.turns(args.session_id)
+            if not turns:
+                parser.exit(1, f"No session {args.session_id}\n")
+            for turn in turns:
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(turn.timestamp))}] You: {turn.user}")
+                print(f"Bot: {turn.reply.strip()}\n")
+        elif args.action == "compact":
+            result = log.compact(args.retention_days)
+            print(f"{result['records_before']:,} -> {result['records_after']:,} records, "
+                  f"{result['bytes_before']:,} -> {result['bytes_after']:,} bytes")
+        elif args.action == "delete":
+            if not log.delete_session(args.session_id):
+                parser.exit(1, f"No session {args.session_id}\n")
+            print(f"Erased {args.session_id}")
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Local fake Mistral AI server for offline testing and benchmarks.
+
+Implements just enough of ``POST /v1/chat/completions`` (plain and streamed
+server-sent events) for the official SDK to talk to it. Point the bot at it with ``MISTRAL_SERVER_URL=http://127.0.0.1:8765``.
+
+Run standalone:
+    python fake_mistral.py --port 8765 --latency 0.05 --token-delay 0.01
+
+Errors can be injected for resilience tests: --error-rate is the fraction of
+requests answered with --error-status (default 503) instead of a reply, and
+--seed makes the sequence of failures repeatable.
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, Optional
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token estimate (whitespace split) for the fake usage block"""
+    return max(1, len(text.split()))
+
+
+class FakeMistralHandler(BaseHTTPRequestHandler):
+    """Answers chat completion requests with a canned reply"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b"{}"
+        return json.loads(body or b"{}")
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        """Write one HTTP/1.1 chunked-transfer frame"""
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_stream(self, request: dict, reply: str, usage: dict) -> None:
+        """Send the reply word by word as chat.completion.chunk events"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chunk_id = uuid.uuid4().hex
+        created = int(time.time())
+        model = request.get("model", "fake-model")
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            event = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if last else word + " "},
+                    "finish_reason": "stop" if last else None,
+                }],
+            }
+            if last:
+                event["usage"] = usage
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            if self.server.token_delay and not last:
+                time.sleep(self.server.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"message": "Not found"})
+            return
+
+        request = self._read_json()
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        messages = request.get("messages", [])
+        last_user = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"),
+            "",
+        )
+        reply = server.reply or f"Fake answer to: {last_user[:80]}"
+        prompt_tokens = sum(_count_tokens(m.get("content", "")) for m in messages)
+        completion_tokens = _count_tokens(reply)
+
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+        with server.lock:
+            server.request_count += 1
+            failed = server.error_rate > 0 and server.random.random() < server.error_rate
+            if failed:
+                server.error_count += 1
+        if failed:
+            self._send_json(server.error_status, {"object": "error", "message": "Injected failure",
+                                                  "type": "fake_error", "code": server.error_status})
+            return
+
+        if request.get("stream"):
+            self._send_stream(request, reply, usage)
+            return
+
+        self._send_json(200, {
+            "id": uuid.uuid4().hex,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        })
+
+
+class FakeMistralServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fake's configuration and counters"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, reply: Optional[str] = None,
+                 token_delay: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: Optional[int] = None):
+        super().__init__((host, port), FakeMistralHandler)
+        self.latency = latency
+        self.reply = reply
+        self.token_delay = token_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+
+    def handle_error(self, request, client_address):
+        # Clients that hang up mid-response (cancelled requests) are expected
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMistralServer":
+        """Serve in a background thread and return self"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+@contextlib.contextmanager
+def spawn_server(*args: str) -> Iterator[str]:
+    """Run the fake server in a child process (own GIL) and yield its URL
+
+    Extra CLI arguments (e.g. "--latency", "0.1") are passed through.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    script = os.path.abspath(__file__)
+    process = subprocess.Popen(
+        [sys.executable, script, "--port", str(port), *args],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.time() > deadline or process.poll() is not None:
+                    raise RuntimeError("Fake Mistral server failed to start")
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Mistral AI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds to sleep before answering")
+    parser.add_argument("--reply", default=None, help="Fixed reply text")
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between streamed tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests that fail with --error-status")
+    parser.add_argument("--error-status", type=int, default=503,
+                        help="HTTP status of injected failures (e.g. 429, 500, 503)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the injected-failure sequence")
+    args = parser.parse_args()
+
+    server = FakeMistralServer(args.host, args.port, args.latency, args.reply,
+                               args.token_delay, args.error_rate, args.error_status,
+                               args.seed)
+    print(f"Fake Mistral server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
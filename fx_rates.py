@@ -0,0 +1,163 @@
+"""
+Local exchange-rate table for /convert.
+
+Rates come from a snapshot file (FX_RATES_PATH), so conversions work offline
+and never need the LLM:
+- CSV with a header row: base,quote,rate[,date] (one quoted pair per row)
+- JSON: {"base": "USD", "date": "2026-10-16", "rates": {"EUR": 0.92, ...}}
+
+On load every currency is expressed per unit of a pivot currency (FX_PIVOT,
+default USD), following chains of quotes where needed, and the full
+pair -> rate index is built up front, so a lookup is one dict access. Pairs
+quoted directly in the file keep their quoted rate. The file is re-read when
+it changes on disk; a broken file keeps the previous table.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import get_settings
+
+# How often (at most) a lookup checks the file for changes
+RELOAD_CHECK_SECONDS = 1.0
+
+Pair = Tuple[str, str]
+
+
+def _read_quotes(path: str) -> Tuple[List[Tuple[str, str, float]], Optional[str]]:
+    """(base, quote, rate) triples and the snapshot date, if the file has one"""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        base = data["base"].upper()
+        quotes = [(base, code.upper(), float(rate)) for code, rate in data["rates"].items()]
+        return quotes, data.get("date")
+
+    quotes, dates = [], set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            quotes.append((row["base"].strip().upper(), row["quote"].strip().upper(), float(row["rate"])))
+            if row.get("date"):
+                dates.add(row["date"].strip())
+    return quotes, max(dates) if dates else None
+
+
+def build_index(quotes: List[Tuple[str, str, float]], pivot: str) -> Dict[Pair, float]:
+    """Rate for every pair of currencies reachable from the pivot"""
+    direct: Dict[Pair, float] = {}
+    for base, quote, rate in quotes:
+        if rate <= 0:
+            raise ValueError(f"Invalid rate for {base}/{quote}: {rate}")
+        direct[(base, quote)] = rate
+        direct.setdefault((quote, base), 1.0 / rate)
+
+    # Units of each currency per one unit of the pivot, walking out from the pivot
+    neighbours: Dict[str, List[Tuple[str, float]]] = {}
+    for (base, quote), rate in direct.items():
+        neighbours.setdefault(base, []).append((quote, rate))
+    per_pivot = {pivot: 1.0}
+    frontier = [pivot]
+    while frontier:
+        currency = frontier.pop()
+        for other, rate in neighbours.get(currency, ()):
+            if other not in per_pivot:
+                per_pivot[other] = per_pivot[currency] * rate
+                frontier.append(other)
+
+    index = {(a, b): per_pivot[b] / per_pivot[a] for a in per_pivot for b in per_pivot}
+    index.update(direct)
+    return index
+
+
+class FxRateStore:
+    """In-memory pair -> rate index over a snapshot file, reloaded when the file changes"""
+
+    def __init__(self, path: Optional[str] = None, pivot: Optional[str] = None):
+        settings = get_settings()
+        self.path = path if path is not None else settings.fx_rates_path
+        self.pivot = (pivot or settings.fx_pivot).upper()
+        self._lock = threading.Lock()
+        self._index: Dict[Pair, float] = {}
+        self.as_of: Optional[str] = None
+        self.error: Optional[str] = None
+        self._signature: Optional[Tuple[float, int]] = None
+        self._checked = float("-inf")
+        self.reloads = 0
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < RELOAD_CHECK_SECONDS:
+            return
+        with self._lock:
+            if now - self._checked < RELOAD_CHECK_SECONDS:
+                return
+            self._checked = now
+            try:
+                stat = os.stat(self.path) if self.path else None
+            except OSError:
+                stat = None
+            signature = (stat.st_mtime, stat.st_size) if stat else None
+            if signature == self._signature:
+                return
+            self._signature = signature
+            if signature is None:
+                self._index, self.as_of, self.error = {}, None, None
+                return
+            try:
+                quotes, as_of = _read_quotes(self.path)
+                index = build_index(quotes, self.pivot)
+            except (OSError, KeyError, TypeError, ValueError) as e:
+                # Keep serving the last good table
+                self.error = f"Could not load {self.path}: {e}"
+                return
+            self._index, self.as_of, self.error = index, as_of, None
+            self.reloads += 1
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of to_currency per one from_currency, or None if unknown"""
+        self._refresh()
+        pair = (from_currency.upper(), to_currency.upper())
+        if pair[0] == pair[1]:
+            return 1.0
+        return self._index.get(pair)
+
+    def convert(self, amount: float, from_currency: str, to_currency: str) -> Optional[float]:
+        rate = self.rate(from_currency, to_currency)
+        return amount * rate if rate is not None else None
+
+    def convert_many(self, amounts, from_currency: str, to_currency: str):
+        """Convert an array of amounts at once; raises ValueError for an unknown pair"""
+        from batch_calc import currency_conversion
+
+        rate = self.rate(from_currency, to_currency)
+        if rate is None:
+            raise ValueError(f"No exchange rate for {from_currency.upper()}/{to_currency.upper()}")
+        return currency_conversion(amounts, rate)
+
+    def currencies(self) -> List[str]:
+        self._refresh()
+        return sorted({base for base, _ in self._index})
+
+    def source(self) -> str:
+        """File name and snapshot date, for display next to a looked-up rate"""
+        name = os.path.basename(self.path) if self.path else "no file"
+        if self.as_of:
+            return f"{self.as_of} snapshot in {name}, not a live rate"
+        return f"undated snapshot in {name}, not a live rate"
+
+
+_default_store: Optional[FxRateStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_fx_store() -> FxRateStore:
+    """Process-wide rate store over FX_RATES_PATH"""
+    global _default_store
+    if _default_store is None:
+        with _default_lock:
+            if _default_store is None:
+                _default_store = FxRateStore()
+    return _default_store
@@ -0,0 +1,175 @@
+"""
+Token-budgeted conversation history with a rolling summary.
+
+Instead of resending the last 20 messages verbatim, HistoryManager keeps the
+prompt under a token budget: whole user/assistant turns are folded, oldest
+first, into a short summary that is sent as a single system message. Bulky
+one-off payloads (e.g. a pasted /summarize article) are replaced by a short
+stub once they have been answered, so they are never sent twice.
+"""
+import math
+import re
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from config import get_settings
+
+Message = Dict[str, str]
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the token count of text (~4 characters per token for English)"""
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def count_message_tokens(messages: List[Message]) -> int:
+    """Estimate prompt tokens for a message list, including per-message overhead"""
+    return sum(count_tokens(m["content"]) + 4 for m in messages)
+
+
+def _first_words(text: str, limit: int) -> str:
+    words = re.sub(r"\s+", " ", text).strip().split(" ")
+    clipped = " ".join(words[:limit])
+    return clipped + ("..." if len(words) > limit else "")
+
+
+def extractive_summary(turn: List[Message]) -> str:
+    """Cheap local summary of one turn: the question and the start of the answer"""
+    parts = []
+    for message in turn:
+        if message["role"] == "user":
+            parts.append(f"User asked: {_first_words(message['content'], 25)}")
+        elif message["role"] == "assistant":
+            first_sentence = re.split(r"(?<=[.!?])\s", message["content"].strip(), maxsplit=1)[0]
+            parts.append(f"Assistant: {_first_words(first_sentence, 30)}")
+    return " | ".join(parts)
+
+
+class HistoryManager:
+    """Conversation history that stays within a prompt-token budget"""
+
+    def __init__(self, max_prompt_tokens: Optional[int] = None,
+                 max_summary_tokens: Optional[int] = None,
+                 summarizer: Callable[[List[Message]], str] = extractive_summary):
+        settings = get_settings()
+        self.max_prompt_tokens = max_prompt_tokens if max_prompt_tokens is not None else settings.history_token_budget
+        self.max_summary_tokens = max_summary_tokens if max_summary_tokens is not None else settings.history_summary_tokens
+        self.summarizer = summarizer
+        self.messages: List[Message] = []
+        self.summary_lines: List[str] = []
+        self._stubs: Dict[int, str] = {}
+        self.last_prompt_tokens = 0
+        # Replies recorded so far (tells callers whether a request went through history)
+        self.answered = 0
+        # The user message the latest reply answered, as kept in the history
+        self.last_user_entry: Optional[str] = None
+        self.prompt_token_counts: Deque[int] = deque(maxlen=1000)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def add_user(self, content: str, stub: Optional[str] = None) -> Message:
+        """Record a user message
+
+        If stub is given, the message is replaced by the stub once it has
+        been answered (use it for large one-off payloads).
+        """
+        message = {"role": "user", "content": content}
+        self.messages.append(message)
+        if stub is not None:
+            self._stubs[id(message)] = stub
+        return message
+
+    def add_assistant(self, content: str) -> None:
+        """Record an assistant reply and compact the history to the budget"""
+        question = self.messages[-1] if self.messages and self.messages[-1]["role"] == "user" else None
+        self.messages.append({"role": "assistant", "content": content})
+        self.answered += 1
+        for message in self.messages:
+            stub = self._stubs.pop(id(message), None)
+            if stub is not None:
+                message["content"] = stub
+        self.last_user_entry = question["content"] if question is not None else None
+        self._compact(self.max_prompt_tokens)
+
+    def pop(self) -> Message:
+        """Remove and return the most recent message (e.g. an unanswered question)"""
+        message = self.messages.pop()
+        self._stubs.pop(id(message), None)
+        return message
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.summary_lines.clear()
+        self._stubs.clear()
+        self.last_user_entry = None
+
+    def snapshot(self) -> Dict[str, object]:
+        """Plain-data copy of the conversation (for storing an idle session)"""
+        return {"messages": [dict(m) for m in self.messages], "summary": list(self.summary_lines)}
+
+    def restore(self, state: Dict[str, object]) -> None:
+        """Replace the conversation with one saved by snapshot()"""
+        self.clear()
+        self.messages.extend(state.get("messages", []))
+        self.summary_lines.extend(state.get("summary", []))
+
+    # ------------------------------------------------------------------
+    # Prompt assembly
+    # ------------------------------------------------------------------
+    @property
+    def summary(self) -> str:
+        return "\n".join(self.summary_lines)
+
+    def _summary_messages(self) -> List[Message]:
+        if not self.summary_lines:
+            return []
+        return [{"role": "system", "content": "Summary of the earlier conversation:\n" + self.summary}]
+
+    def build_messages(self, prefix: Optional[List[Message]] = None) -> List[Message]:
+        """Return the messages to send, folding old turns until they fit the budget
+
+        prefix (e.g. a system prompt) is always sent first and counts
+        toward the budget.
+        """
+        prefix = list(prefix or [])
+        self._compact(self.max_prompt_tokens - count_message_tokens(prefix))
+        messages = prefix + self._summary_messages() + self.messages
+        self.record_prompt_tokens(count_message_tokens(messages))
+        return messages
+
+    def record_prompt_tokens(self, tokens: int) -> None:
+        """Record the (estimated) prompt size of a request"""
+        self.last_prompt_tokens = tokens
+        self.prompt_token_counts.append(tokens)
+
+    def record_usage(self, prompt_tokens: int) -> None:
+        """Replace the latest estimate with the prompt size reported by the API"""
+        if self.prompt_token_counts:
+            self.prompt_token_counts[-1] = prompt_tokens
+        self.last_prompt_tokens = prompt_tokens
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+    def _compact(self, budget: int) -> None:
+        """Fold the oldest complete turns into the summary until under budget"""
+        while count_message_tokens(self._summary_messages() + self.messages) > budget:
+            turn_end = self._oldest_turn_end()
+            if turn_end is None:
+                break
+            turn = self.messages[:turn_end]
+            del self.messages[:turn_end]
+            for message in turn:
+                self._stubs.pop(id(message), None)
+            self.summary_lines.append(self.summarizer(turn))
+            while len(self.summary_lines) > 1 and count_tokens(self.summary) > self.max_summary_tokens:
+                self.summary_lines.pop(0)
+
+    def _oldest_turn_end(self) -> Optional[int]:
+        """Index just past the oldest answered user/assistant turn, if any"""
+        for i, message in enumerate(self.messages):
+            if message["role"] == "assistant":
+                # Never fold the final message: it may be the turn being answered
+                return i + 1 if i + 1 < len(self.messages) else None
+        return None
@@ -0,0 +1,318 @@
+"""
+Local fast-path intent router.
+
+Plain-language calculation requests ("what's 5% compounded monthly on 1000
+for 10 years", "convert 100 USD to EUR") do not need the LLM. The
+router matches them against a table of precompiled regexes, extracts the
+parameters and hands them to the local calculators, typically in a few
+microseconds. Anything it is not sure about returns None and goes to the LLM, including
+requests whose wording the calculators cannot honour: loans and debt, regular
+contributions ("$500 a month"), declines, inflation or real values, ages
+("I'm 30 years old") and advisory comparisons ("should I ... or ...").
+Calendar years are never read as prices ("the return from 2010 to 2020").
+Conversions without a rate are routed locally when the pair is in the local
+exchange-rate table (fx_rates.py).
+
+An optional keyword classifier (JSON file, see KeywordClassifier) can pick the
+intent for phrasings the trigger regexes miss; parameters are still extracted
+by regex, so a wrong guess simply falls through to the LLM.
+"""
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import get_settings
+from fx_rates import get_default_fx_store
+
+NUM = r"(\d[\d,]*(?:\.\d+)?|\.\d+)"
+
+CURRENCY_CODES = frozenset("""
+usd eur gbp jpy chf cad aud nzd cny hkd sgd inr krw sek nok dkk pln czk huf
+mxn brl zar try rub ils aed sar thb myr idr php twd
+""".split())
+
+FREQUENCIES = {
+    "annually": 1, "yearly": 1, "annual": 1,
+    "semiannually": 2, "semi-annually": 2, "biannually": 2,
+    "quarterly": 4,
+    "monthly": 12,
+    "weekly": 52,
+    "daily": 365,
+}
+
+
+class Intent(NamedTuple):
+    """A routed request: calculator name plus extracted keyword arguments"""
+    name: str
+    args: Dict[str, object]
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+# ============================================================================
+# PARAMETER EXTRACTORS
+# ============================================================================
+_RATE_RE = re.compile(NUM + r"\s*(?:%|percent\b|pct\b)", re.I)
+_YEARS_RE = re.compile(NUM + r"\s*(?:years?|yrs?)\b", re.I)
+_TIMES_RE = re.compile(r"(\d+)\s*times\s*(?:a|per|each)\s*year", re.I)
+_FREQ_RE = re.compile(r"\b(" + "|".join(sorted(map(re.escape, FREQUENCIES), key=len, reverse=True)) + r")\b", re.I)
+# A principal needs a cue: a currency sign/word or a lead-in such as "on" or "invest"
+# Cues that a request needs the LLM even though the numbers look like a calculation
+_LLM_CUES_RE = re.compile(
+    r"\b(?:mortgages?|loans?|debts?|borrow\w*|owe[sd]?|owing|credit\s+cards?)\b"
+    r"|\bshould\b.*\bor\b"
+    # Inflation and real values: growth at +rate is the wrong direction
+    r"|\b(?:inflation|deflation|purchasing\s+power|real\s+(?:value|terms|returns?)|today'?s\s+(?:dollars|money))\b"
+    # Ages read as terms
+    r"|\b(?:years?|yrs?)[\s-]+old\b|\b(?:age|aged|i'?m|i\s+am)\s+\d+\b",
+    re.I | re.S,
+)
+# Compound growth is a single lump sum growing at a positive rate
+_CONTRIBUTION_RE = re.compile(
+    r"\b(?:months?|weeks?)\b|/\s*mo\b"
+    r"|\b(?:monthly|weekly)\s+(?:deposits?|contributions?|payments?|savings?|investments?|installments?)\b"
+    r"|\b(?:deposit|contribut|sav|invest|add|put|pay)\w*\s+\$?" + NUM + r"\s*(?:dollars\s+)?(?:monthly|weekly)\b",
+    re.I,
+)
+_DECLINE_RE = re.compile(r"\b(?:los(?:e|es|ing)|lost|declin\w*|drop\w*|fall(?:s|ing)?|fell|shrink\w*|depreciat\w*)\b", re.I)
+_PRINCIPAL_RE = re.compile(
+    r"(?:\$\s*|\b(?:on|of|invest(?:ed|ing)?|principal|deposit(?:ed|ing)?|put|with|compound(?:ed|ing)?)\s+\$?)" + NUM
+    + r"|" + NUM + r"\s*(?:dollars|usd|eur|euros?|gbp|pounds)\b",
+    re.I,
+)
+
+
+def _extract_compound(text: str) -> Optional[Dict[str, object]]:
+    rate = _RATE_RE.search(text)
+    years = _YEARS_RE.search(text)
+    if not rate or not years:
+        return None
+    if _CONTRIBUTION_RE.search(text) or _DECLINE_RE.search(text):
+        return None
+
+    compounds = 1
+    spans = [rate.span(), years.span()]
+    times = _TIMES_RE.search(text)
+    if times:
+        compounds = int(times.group(1))
+        spans.append(times.span())
+    else:
+        freq = _FREQ_RE.search(text)
+        if freq:
+            compounds = FREQUENCIES[freq.group(1).lower()]
+
+    # Principal: the first cued amount that is not the rate, the years or the frequency
+    for match in _PRINCIPAL_RE.finditer(text):
+        group = 1 if match.group(1) else 2
+        if any(s <= match.start(group) < e for s, e in spans):
+            continue
+        return {
+            "principal": _number(match.group(group)),
+            "annual_rate": _number(rate.group(1)),
+            "years": _number(years.group(1)),
+            "compounds_per_year": compounds,
+        }
+    return None
+
+
+_CONVERT_RES = [
+    re.compile(r"\$?" + NUM + r"\s*([a-z]{3})\s+(?:to|into|in)\s+([a-z]{3})\b"
+               r"(?:.*?(?:\bat\b|\brate\b(?:\s+of)?|@|=)\s*" + NUM + r")?", re.I),
+]
+
+
+def _extract_convert(text: str) -> Optional[Dict[str, object]]:
+    for pattern in _CONVERT_RES:
+        match = pattern.search(text)
+        if not match:
+            continue
+        from_currency, to_currency = match.group(2).lower(), match.group(3).lower()
+        if from_currency not in CURRENCY_CODES or to_currency not in CURRENCY_CODES:
+            continue
+        if not match.group(4) and get_default_fx_store().rate(from_currency, to_currency) is None:
+            # No rate given and none in the local table: nothing to compute locally
+            return None
+        return {
+            "amount": _number(match.group(1)),
+            "from_currency": from_currency.upper(),
+            "to_currency": to_currency.upper(),
+            "exchange_rate": _number(match.group(4)) if match.group(4) else None,
+        }
+    return None
+
+
+_RETURN_RES = [
+    re.compile(r"\b(?:bought|buy|buying|purchased?)\b(?:\s+\w+){0,3}?\s+(?:at|for)\s+\$?" + NUM +
+               r".*?\b(?:sold|sell|selling)\b(?:\s+\w+){0,3}?\s+(?:at|for)\s+\$?" + NUM, re.I),
+    re.compile(r"\breturn\b.*?\bfrom\s+\$?" + NUM + r"\s+to\s+\$?" + NUM, re.I),
+    re.compile(r"\bfrom\s+\$?" + NUM + r"\s+to\s+\$?" + NUM + r".*?\breturn\b", re.I),
+]
+
+
+def _year_like(match: "re.Match", group: int) -> bool:
+    """A bare four-digit number that reads as a calendar year (1900-2100)"""
+    value = match.group(group)
+    dollar = match.string[:match.start(group)].rstrip().endswith("$")
+    return not dollar and value.isdigit() and len(value) == 4 and 1900 <= int(value) <= 2100
+
+
+def _extract_return(text: str) -> Optional[Dict[str, object]]:
+    for pattern in _RETURN_RES:
+        match = pattern.search(text)
+        if match:
+            if _year_like(match, 1) or _year_like(match, 2):
+                # "the return from 2010 to 2020" is a period, not two prices
+                return None
+            return {"buy_price": _number(match.group(1)), "sell_price": _number(match.group(2))}
+    return None
+
+
+# Intent table: (name, trigger regex, parameter extractor). Checked in order.
+INTENT_TABLE: List[Tuple[str, "re.Pattern", Callable[[str], Optional[Dict[str, object]]]]] = [
+    ("convert", re.compile(r"\bconvert\b|\bexchange\b|\b[a-z]{3}\s+(?:to|into|in)\s+[a-z]{3}\b", re.I), _extract_convert),
+    ("compound", re.compile(r"\bcompound|\binterest\b|\bgrow|\binvest|\bworth\b", re.I), _extract_compound),
+    ("calc_return", re.compile(r"\breturn\b|\bprofit\b|\bgain\b|\bloss\b|\bbought\b|\bsold\b", re.I), _extract_return),
+]
+_EXTRACTORS = {name: extract for name, _, extract in INTENT_TABLE}
+
+
+# ============================================================================
+# OPTIONAL CLASSIFIER
+# ============================================================================
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+class KeywordClassifier:
+    """Tiny linear bag-of-words intent classifier stored as JSON
+
+    File format: {"threshold": 0.0, "intents": {"compound": {"bias": -1.0,
+    "weights": {"compounded": 2.3, ...}}, ...}}
+    """
+
+    def __init__(self, intents: Dict[str, Dict[str, object]], threshold: float = 0.0):
+        self.intents = intents
+        self.threshold = threshold
+
+    @classmethod
+    def load(cls, path: str) -> "KeywordClassifier":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["intents"], data.get("threshold", 0.0))
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"threshold": self.threshold, "intents": self.intents}, f, indent=2)
+
+    @classmethod
+    def fit(cls, examples: Iterable[Tuple[str, str]], threshold: float = 0.0) -> "KeywordClassifier":
+        """Train log-odds keyword weights from (text, intent) pairs; use intent "llm" for negatives"""
+        counts: Dict[str, Counter] = {}
+        for text, label in examples:
+            counts.setdefault(label, Counter()).update(set(_TOKEN_RE.findall(text.lower())))
+        totals = {label: sum(c.values()) for label, c in counts.items()}
+        vocab = set().union(*counts.values()) if counts else set()
+        intents = {}
+        for label, counter in counts.items():
+            if label == "llm":
+                continue
+            rest = Counter()
+            for other, c in counts.items():
+                if other != label:
+                    rest.update(c)
+            rest_total = sum(rest.values())
+            weights = {
+                token: math.log((counter[token] + 1) / (totals[label] + len(vocab)))
+                - math.log((rest[token] + 1) / (rest_total + len(vocab)))
+                for token in vocab
+            }
+            intents[label] = {"bias": 0.0, "weights": {t: round(w, 4) for t, w in weights.items() if abs(w) > 0.1}}
+        return cls(intents, threshold)
+
+    def predict(self, text: str) -> Optional[str]:
+        tokens = set(_TOKEN_RE.findall(text.lower()))
+        best, best_score = None, self.threshold
+        for name, model in self.intents.items():
+            weights = model["weights"]
+            score = model.get("bias", 0.0) + sum(weights.get(t, 0.0) for t in tokens)
+            if score > best_score:
+                best, best_score = name, score
+        return best
+
+
+# ============================================================================
+# ROUTER
+# ============================================================================
+class IntentRouter:
+    """Routes free-form input to a local calculator or to the LLM"""
+
+    def __init__(self, classifier: Optional[KeywordClassifier] = None):
+        self.classifier = classifier
+        self._lock = threading.Lock()
+        self.local = 0
+        self.llm = 0
+        self.by_intent: Counter = Counter()
+        self.route_seconds = 0.0
+
+    def route(self, text: str) -> Optional[Intent]:
+        """Return the local Intent for text, or None if it should go to the LLM"""
+        start = time.perf_counter()
+        intent = self._match(text)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.route_seconds += elapsed
+            if intent is None:
+                self.llm += 1
+            else:
+                self.local += 1
+                self.by_intent[intent.name] += 1
+        return intent
+
+    def _match(self, text: str) -> Optional[Intent]:
+        # Every calculation needs at least one number
+        if not any(ch.isdigit() for ch in text):
+            return None
+        if _LLM_CUES_RE.search(text):
+            return None
+        for name, trigger, extract in INTENT_TABLE:
+            if trigger.search(text):
+                args = extract(text)
+                if args is not None:
+                    return Intent(name, args)
+        if self.classifier is not None:
+            name = self.classifier.predict(text)
+            if name in _EXTRACTORS:
+                args = _EXTRACTORS[name](text)
+                if args is not None:
+                    return Intent(name, args)
+        return None
+
+    def stats(self) -> Dict[str, object]:
+        """Routing counters: local vs. LLM, per intent, and mean routing time"""
+        with self._lock:
+            total = self.local + self.llm
+            return {
+                "local": self.local,
+                "llm": self.llm,
+                "local_ratio": self.local / total if total else 0.0,
+                "by_intent": dict(self.by_intent),
+                "mean_route_us": self.route_seconds / total * 1e6 if total else 0.0,
+            }
+
+
+_default_router: Optional[IntentRouter] = None
+
+
+def get_default_router() -> IntentRouter:
+    """Process-wide router (loads ROUTER_MODEL_PATH if set)"""
+    global _default_router
+    if _default_router is None:
+        model_path = get_settings().router_model_path
+        classifier = KeywordClassifier.load(model_path) if model_path else None
+        _default_router = IntentRouter(classifier)
+    return _default_router
@@ -0,0 +1,401 @@
+"""
+Pluggable chat-completion backends.
+
+FinancialBot (and AsyncSession) send every chat request through
+``self.backend``, so the model provider can be swapped without touching the
+command handlers, history, caching or scheduling. A backend implements:
+
+    complete(**request)            -> response with .choices[0].message.content and .usage
+    stream(**request)              -> context manager yielding events with .data.choices / .data.usage
+    complete_async(**request)      -> awaitable of the same response
+    stream_async(**request)        -> awaitable of an async context manager of events
+
+where request is model, messages, temperature and max_tokens, i.e. the
+shapes of the Mistral SDK's chat API. MistralBackend is the default.
+
+With LOCAL_MODEL_PATH set, bots get a RoutingBackend instead: short
+context-free requests (/explain, first questions without figures) are
+answered by a quantized model on this machine (LocalBackend, llama.cpp via
+llama-cpp-python), everything else and every local failure goes to Mistral.
+Local replies are marked (answered_locally) and never cached: caches are keyed
+by the Mistral model, so a later identical request must not get the small
+model's answer.
+"""
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+
+from config import get_settings
+from llm_client import get_async_client, get_client
+
+
+class MistralBackend:
+    """Mistral AI through the shared pooled clients (llm_client.py)"""
+
+    name = "mistral"
+    # One per bot session; keep it small
+    __slots__ = ("api_key", "server_url")
+
+    def __init__(self, api_key: str, server_url: Optional[str] = None):
+        self.api_key = api_key
+        self.server_url = server_url
+
+    def complete(self, **request):
+        return get_client(self.api_key, self.server_url).chat.complete(**request)
+
+    def stream(self, **request):
+        return get_client(self.api_key, self.server_url).chat.stream(**request)
+
+    def complete_async(self, **request):
+        return get_async_client(self.api_key, self.server_url).chat.complete_async(**request)
+
+    def stream_async(self, **request):
+        return get_async_client(self.api_key, self.server_url).chat.stream_async(**request)
+
+
+# ============================================================================
+# Local model
+# ============================================================================
+
+class _LocalStream:
+    """Context manager over a local completion's chunks, shaped like SDK stream events"""
+
+    backend = "local"
+
+    def __init__(self, first: Optional[str], chunks: Iterator[str]):
+        self._first = first
+        self._chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+    def __iter__(self):
+        if self._first is not None:
+            yield _delta_event(self._first)
+        for text in self._chunks:
+            yield _delta_event(text)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.__exit__(*exc)
+
+    async def __aiter__(self):
+        import asyncio
+
+        if self._first is not None:
+            yield _delta_event(self._first)
+        while True:
+            # Each token is produced on a worker thread; the event loop stays free
+            text = await asyncio.to_thread(next, self._chunks, None)
+            if text is None:
+                return
+            yield _delta_event(text)
+
+
+def _delta_event(text: str):
+    return SimpleNamespace(data=SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None))
+
+
+class LocalBackend:
+    """A quantized GGUF chat model run on the CPU by llama.cpp (optional dependency)
+
+    The model is loaded on first use, or in the background by warm_up(), and
+    then shared by every session; one completion runs at a time. Replies are
+    capped at LOCAL_MAX_TOKENS. Usage is not reported, so local answers do
+    not count as API tokens or cost.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: Optional[str] = None, threads: Optional[int] = None,
+                 context_tokens: Optional[int] = None, max_tokens: Optional[int] = None):
+        settings = get_settings()
+        self.model_path = model_path if model_path is not None else settings.local_model_path
+        self.threads = (threads if threads is not None else settings.local_model_threads) or os.cpu_count() or 1
+        self.context_tokens = context_tokens if context_tokens is not None else settings.local_model_ctx
+        self.max_tokens = max_tokens if max_tokens is not None else settings.local_max_tokens
+        self._model = None
+        self._load_lock = threading.Lock()
+        # llama.cpp contexts are not thread-safe
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._loading: Optional[threading.Thread] = None
+        self.load_error: Optional[str] = None
+        self.load_seconds = 0.0
+        self.in_flight = 0
+        self.completions = 0
+        self.busy_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    def _load(self):
+        if self._model is not None:
+            return self._model
+        with self._load_lock:
+            if self._model is None:
+                if self.load_error is not None:
+                    raise RuntimeError(self.load_error)
+                try:
+                    from llama_cpp import Llama
+                except ImportError:
+                    self.load_error = "LOCAL_MODEL_PATH requires llama-cpp-python (pip install llama-cpp-python)"
+                    raise ValueError(self.load_error)
+                start = time.perf_counter()
+                try:
+                    model = Llama(model_path=self.model_path, n_ctx=self.context_tokens,
+                                  n_threads=self.threads, verbose=False)
+                    # One token through the model pages the weights in and sets up its buffers
+                    model.create_chat_completion(messages=[{"role": "user", "content": "Hi"}], max_tokens=1)
+                except Exception as e:
+                    self.load_error = f"Could not load local model {self.model_path}: {e}"
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self._model = model
+        return self._model
+
+    def warm_up(self) -> None:
+        """Start loading the model in a background thread (no-op once started)"""
+        with self._load_lock:
+            if self._loading is not None or self._model is not None:
+                return
+            self._loading = threading.Thread(target=self._warm_up, name="local-model", daemon=True)
+            self._loading.start()
+
+    def _warm_up(self) -> None:
+        try:
+            self._load()
+        except Exception:
+            # Recorded in load_error; requests keep going to the remote API
+            pass
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until a background warm-up finished; True if the model is usable"""
+        if self._loading is not None:
+            self._loading.join(timeout)
+        return self.ready
+
+    # ------------------------------------------------------------------
+    # Completions
+    # ------------------------------------------------------------------
+    def _request(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, **_):
+        return {"messages": messages, "temperature": temperature,
+                "max_tokens": min(max_tokens or self.max_tokens, self.max_tokens)}
+
+    def complete(self, **request):
+        model = self._load()
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            with self._run_lock:
+                start = time.perf_counter()
+                result = model.create_chat_completion(**self._request(**request))
+                self._record(time.perf_counter() - start)
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+        content = result["choices"][0]["message"]["content"]
+        if not content or not content.strip():
+            raise RuntimeError("Local model returned an empty reply")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content.strip()))],
+                               usage=None, backend=self.name)
+
+    def stream(self, **request):
+        """Open a streamed completion; fails here (not mid-reply) if the model cannot start one"""
+        model = self._load()
+        chunks = self._stream_chunks(model, self._request(**request))
+        first = next(chunks, None)
+        if first is None:
+            raise RuntimeError("Local model returned an empty reply")
+        return _LocalStream(first, chunks)
+
+    def _stream_chunks(self, model, request) -> Iterator[str]:
+        with self._stats_lock:
+            self.in_flight += 1
+        try:
+            with self._run_lock:
+                start = time.perf_counter()
+                for chunk in model.create_chat_completion(stream=True, **request):
+                    text = chunk["choices"][0]["delta"].get("content")
+                    if text:
+                        yield text
+                self._record(time.perf_counter() - start)
+        finally:
+            with self._stats_lock:
+                self.in_flight -= 1
+
+    def _record(self, seconds: float) -> None:
+        with self._stats_lock:
+            self.completions += 1
+            self.busy_seconds += seconds
+
+    async def complete_async(self, **request):
+        import asyncio
+
+        return await asyncio.to_thread(self.complete, **request)
+
+    async def stream_async(self, **request):
+        import asyncio
+
+        return await asyncio.to_thread(self.stream, **request)
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "ready": int(self.ready),
+                "load_seconds": round(self.load_seconds, 3),
+                "completions": self.completions,
+                "in_flight": self.in_flight,
+                "mean_seconds": self.busy_seconds / self.completions if self.completions else 0.0,
+            }
+
+
+def answered_locally(response) -> bool:
+    """True for a response or stream from LocalBackend (its replies are not cached)"""
+    return getattr(response, "backend", None) == LocalBackend.name
+
+
+# ============================================================================
+# Routing between the local model and the remote API
+# ============================================================================
+
+class RouteStats:
+    """Where requests went; shared by every session's RoutingBackend"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"local": 0, "remote": 0, "fallback": 0, "busy": 0, "loading": 0}
+
+    def inc(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def is_simple_request(messages: List[Dict[str, str]], max_prompt_tokens: int) -> bool:
+    """Short and context-free: the system prefix plus one /explain prompt or question without figures"""
+    from history import count_tokens
+    from prompts import SYSTEM_PREFIX, explained_term
+
+    if len(messages) != len(SYSTEM_PREFIX) + 1 or messages[:len(SYSTEM_PREFIX)] != SYSTEM_PREFIX:
+        return False
+    text = messages[-1]["content"]
+    if count_tokens(text) > max_prompt_tokens:
+        return False
+    # Figures usually mean a calculation or a personal situation: leave those to the larger model
+    return explained_term(text) is not None or not any(ch.isdigit() for ch in text)
+
+
+class RoutingBackend:
+    """Simple requests to the local model, the rest (and local failures) to the remote backend
+
+    A simple request still goes remote while the model is loading or when
+    LOCAL_MAX_QUEUE local completions are already waiting, since the remote
+    API then answers sooner. Once the model failed to load, everything goes
+    remote.
+    """
+
+    name = "routing"
+    # One per bot session; keep it small
+    __slots__ = ("local", "remote", "route_stats", "max_prompt_tokens", "max_queue")
+
+    def __init__(self, local: LocalBackend, remote, route_stats: Optional[RouteStats] = None,
+                 max_prompt_tokens: Optional[int] = None, max_queue: Optional[int] = None):
+        settings = get_settings()
+        self.local = local
+        self.remote = remote
+        self.route_stats = route_stats if route_stats is not None else RouteStats()
+        self.max_prompt_tokens = max_prompt_tokens if max_prompt_tokens is not None else settings.local_max_prompt_tokens
+        self.max_queue = max_queue if max_queue is not None else settings.local_max_queue
+
+    def _use_local(self, messages: List[Dict[str, str]]) -> bool:
+        if self.local.load_error is not None or not is_simple_request(messages, self.max_prompt_tokens):
+            self.route_stats.inc("remote")
+            return False
+        if not self.local.ready:
+            # The first simple request starts the warm-up; it is not kept waiting for it
+            self.local.warm_up()
+            self.route_stats.inc("loading")
+            return False
+        if self.local.in_flight >= self.max_queue:
+            self.route_stats.inc("busy")
+            return False
+        self.route_stats.inc("local")
+        return True
+
+    def complete(self, **request):
+        if self._use_local(request["messages"]):
+            try:
+                return self.local.complete(**request)
+            except Exception:
+                self.route_stats.inc("fallback")
+        return self.remote.complete(**request)
+
+    def stream(self, **request):
+        if self._use_local(request["messages"]):
+            try:
+                return self.local.stream(**request)
+            except Exception:
+                self.route_stats.inc("fallback")
+        return self.remote.stream(**request)
+
+    async def complete_async(self, **request):
+        if self._use_local(request["messages"]):
+            try:
+                return await self.local.complete_async(**request)
+            except Exception:
+                self.route_stats.inc("fallback")
+        return await self.remote.complete_async(**request)
+
+    async def stream_async(self, **request):
+        if self._use_local(request["messages"]):
+            try:
+                return await self.local.stream_async(**request)
+            except Exception:
+                self.route_stats.inc("fallback")
+        return await self.remote.stream_async(**request)
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.route_stats.snapshot(), **{f"local_{k}": v for k, v in self.local.stats().items()}}
+
+
+_default_local: Optional[LocalBackend] = None
+_route_stats = RouteStats()
+_default_lock = threading.Lock()
+
+
+def get_default_local_backend() -> LocalBackend:
+    """Process-wide local model (one copy of the weights for every session)"""
+    global _default_local
+    if _default_local is None:
+        with _default_lock:
+            if _default_local is None:
+                _default_local = LocalBackend()
+                if get_settings().local_model_preload:
+                    _default_local.warm_up()
+    return _default_local
+
+
+def make_backend(api_key: str, server_url: Optional[str] = None):
+    """The backend a new bot session uses: Mistral, or local-first routing when LOCAL_MODEL_PATH is set"""
+    remote = MistralBackend(api_key, server_url)
+    if not get_settings().local_model_path:
+        return remote
+    return RoutingBackend(get_default_local_backend(), remote, _route_stats)
@@ -0,0 +1,191 @@
+"""
+Shared Mistral AI client with a persistent HTTP connection pool.
+
+Building a new ``Mistral`` client per message means a new TCP connection and
+TLS handshake on every chat turn. This module keeps one long-lived client per
+API key/server, backed by a pooled ``httpx.Client`` with keep-alive, and counts
+how often connections are reused so the pooling can be verified.
+
+httpx and mistralai are imported on first use, so importing this module is
+cheap for runs that never call the API. Pool tuning comes from config.Settings
+(MISTRAL_POOL_SIZE, MISTRAL_KEEPALIVE, MISTRAL_TIMEOUT, ...).
+"""
+import itertools
+import threading
+import weakref
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class ConnectionStats:
+    """Thread-safe counters for requests and connection reuse"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen_streams = weakref.WeakSet()
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    def record(self, response: "httpx.Response") -> None:
+        """Classify a response as served over a new or a reused connection"""
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.requests += 1
+            if stream is None:
+                return
+            if stream in self._seen_streams:
+                self.reused_connections += 1
+            else:
+                self._seen_streams.add(stream)
+                self.new_connections += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": self.reused_connections,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seen_streams = weakref.WeakSet()
+            self.requests = 0
+            self.new_connections = 0
+            self.reused_connections = 0
+
+
+stats = ConnectionStats()
+
+_clients: Dict[Tuple[str, Optional[str]], object] = {}
+_http_clients = []
+_lock = threading.Lock()
+
+# Async clients are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _build_http_client() -> "httpx.Client":
+    """Create the pooled HTTP transport shared by all chat calls"""
+    import httpx
+
+    settings = get_settings()
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.pool_size,
+            max_keepalive_connections=settings.pool_size,
+            keepalive_expiry=settings.keepalive_seconds,
+        ),
+        timeout=httpx.Timeout(settings.timeout_seconds, connect=settings.connect_timeout_seconds),
+        event_hooks={"response": [stats.record]},
+    )
+
+
+async def _record_async(response: "httpx.Response") -> None:
+    stats.record(response)
+
+
+def _build_async_http_client() -> "httpx.AsyncClient":
+    """Create one shard of the pooled async HTTP transport
+
+    httpcore scans every pooled connection for each queued request, so one
+    large async pool degrades quadratically; connections are spread over
+    several shards instead.
+    """
+    import httpx
+
+    settings = get_settings()
+    shard_size = -(-settings.async_pool_size // settings.async_pool_shards)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=shard_size,
+            max_keepalive_connections=shard_size,
+            keepalive_expiry=settings.keepalive_seconds,
+        ),
+        timeout=httpx.Timeout(settings.timeout_seconds, connect=settings.connect_timeout_seconds),
+        event_hooks={"response": [_record_async]},
+    )
+
+
+def get_client(api_key: str, server_url: Optional[str] = None):
+    """Return the shared Mistral client for this API key, creating it once"""
+    server_url = server_url or get_settings().server_url
+    key = (api_key, server_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            from mistralai import Mistral
+
+            http_client = _build_http_client()
+            client = Mistral(
+                api_key=api_key,
+                server_url=server_url,
+                client=http_client,
+                timeout_ms=int(get_settings().timeout_seconds * 1000),
+            )
+            _http_clients.append(http_client)
+            _clients[key] = client
+    return client
+
+
+def get_async_client(api_key: str, server_url: Optional[str] = None):
+    """Return a shared async-capable Mistral client for the running event loop
+
+    Successive calls rotate over async_pool_shards clients, each with its own
+    slice of the connection pool.
+    """
+    import asyncio
+
+    settings = get_settings()
+    server_url = server_url or settings.server_url
+    loop = asyncio.get_running_loop()
+    per_loop = _async_clients.setdefault(loop, {})
+    key = (api_key, server_url)
+    shards = per_loop.get(key)
+    if shards is None:
+        from mistralai import Mistral
+
+        clients = [
+            Mistral(
+                api_key=api_key,
+                server_url=server_url,
+                async_client=_build_async_http_client(),
+                timeout_ms=int(settings.timeout_seconds * 1000),
+            )
+            for _ in range(settings.async_pool_shards)
+        ]
+        shards = per_loop[key] = (clients, itertools.cycle(clients))
+    return next(shards[1])
+
+
+def get_stats() -> Dict[str, int]:
+    """Return request and connection-reuse counters for the shared pool"""
+    return stats.snapshot()
+
+
+def close_clients() -> None:
+    """Close every pooled connection (used on shutdown and in benchmarks)"""
+    with _lock:
+        for http_client in _http_clients:
+            http_client.close()
+        _http_clients.clear()
+        _clients.clear()
+
+
+async def aclose_clients() -> None:
+    """Close the async connection pools of the running event loop"""
+    import asyncio
+
+    per_loop = _async_clients.pop(asyncio.get_running_loop(), {})
+    for clients, _ in per_loop.values():
+        for client in clients:
+            await client.sdk_configuration.async_client.aclose()
@@ -0,0 +1,391 @@
+"""
+Built-in metrics: per-stage latency, token usage and estimated cost.
+
+One process-wide Metrics registry (get_default_metrics) collects:
+- financial_bot_requests_total / financial_bot_request_seconds by command
+- financial_bot_stage_seconds by stage (route, prompt, api, first_token, ...)
+- financial_bot_tokens_total by model and kind (prompt/completion) and
+  financial_bot_cost_usd_total, priced with MISTRAL_PRICE_INPUT/OUTPUT
+- gauges from registered collectors (response cache, semantic cache, intent
+  router, scheduler), read when the metrics are rendered
+
+Latencies go into fixed-bucket histograms (Prometheus style), so recording
+is a bisect and two additions under a lock; p50/p95/p99 are estimated from
+the buckets. Everything renders as Prometheus text, served on METRICS_PORT
+and/or written to METRICS_PATH (node_exporter textfile format). With
+METRICS_OTEL=1 every stage is also an OpenTelemetry span (requires
+opentelemetry-api). METRICS_ENABLED=0 turns recording into no-ops.
+"""
+import atexit
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import get_settings
+
+PREFIX = "financial_bot_"
+# Seconds; from sub-millisecond local work to slow LLM replies
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+# Minimum seconds between two writes of METRICS_PATH
+FLUSH_SECONDS = 10.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+HELP = {
+    "requests_total": "Requests handled, by command",
+    "request_seconds": "End-to-end request latency (streamed replies: until the last chunk)",
+    "stage_seconds": "Latency of one processing stage",
+    "tokens_total": "Tokens reported by the API",
+    "cost_usd_total": "Estimated API cost in USD",
+    "errors_total": "API calls that failed, by error type",
+}
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate (linear within the bucket, like Prometheus' histogram_quantile)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Stage:
+    """Times a block into stage_seconds (and an OpenTelemetry span when enabled)"""
+
+    __slots__ = ("metrics", "stage", "labels", "key", "start", "span")
+
+    def __init__(self, metrics: "Metrics", stage: str, labels: Dict[str, object], key: Tuple[str, Labels]):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+        self.key = key
+        self.span = None
+
+    def __enter__(self) -> "_Stage":
+        if self.metrics.tracer is not None:
+            self.span = self.metrics.tracer.start_as_current_span(
+                f"financial_bot.{self.stage}", attributes={k: str(v) for k, v in self.labels.items()})
+            self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.metrics._observe(self.key, time.perf_counter() - self.start)
+        if self.span is not None:
+            self.span.__exit__(exc_type, exc, tb)
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class Metrics:
+    """Counters, latency histograms and stats collectors, rendered as Prometheus text"""
+
+    def __init__(self, enabled: bool = True, price_input: float = 0.0, price_output: float = 0.0,
+                 path: Optional[str] = None, otel: bool = False):
+        self.enabled = enabled
+        self.price_input = price_input
+        self.price_output = price_output
+        self.path = path
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, object]]] = {}
+        # Series keys of the hottest calls, built once instead of on every call
+        self._stage_keys: Dict[str, Tuple[str, Labels]] = {}
+        self._usage_keys: Dict[str, Tuple[Tuple[str, Labels], ...]] = {}
+        self._flushed = time.monotonic()
+        self._server = None
+        self.tracer = None
+        if otel and enabled:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ValueError("METRICS_OTEL requires opentelemetry-api (pip install opentelemetry-api)")
+            self.tracer = trace.get_tracer("financial_bot")
+        if path and enabled:
+            atexit.register(self.write)
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        if self.enabled:
+            self._inc((name, _labels(labels)), value)
+
+    def _inc(self, key: Tuple[str, Labels], value: float) -> None:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if self.enabled:
+            self._observe((name, _labels(labels)), seconds)
+
+    def _observe(self, key: Tuple[str, Labels], seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def stage(self, stage: str, **labels):
+        """Context manager timing one stage: with metrics.stage("api"): ..."""
+        if not self.enabled:
+            return _NO_STAGE
+        if labels:
+            key = ("stage_seconds", _labels(dict(labels, stage=stage)))
+        else:
+            key = self._stage_keys.get(stage)
+            if key is None:
+                key = self._stage_keys[stage] = ("stage_seconds", (("stage", stage),))
+        return _Stage(self, stage, labels, key)
+
+    def record_request(self, command: str, seconds: float) -> None:
+        self.inc("requests_total", command=command)
+        self.observe("request_seconds", seconds, command=command)
+        self.maybe_flush()
+
+    def timed_stream(self, chunks: Iterator[str], command: str, start: float) -> Iterator[str]:
+        """Pass chunks through and record the request once the stream ends"""
+        try:
+            yield from chunks
+        finally:
+            self.record_request(command, time.perf_counter() - start)
+
+    def record_usage(self, model: str, usage) -> None:
+        """Token counters and estimated cost from an SDK UsageInfo"""
+        if not self.enabled or usage is None:
+            return
+        keys = self._usage_keys.get(model)
+        if keys is None:
+            keys = self._usage_keys[model] = (
+                ("tokens_total", _labels({"model": model, "kind": "prompt"})),
+                ("tokens_total", _labels({"model": model, "kind": "completion"})),
+                ("cost_usd_total", _labels({"model": model})),
+            )
+        prompt = usage.prompt_tokens or 0
+        completion = usage.completion_tokens or 0
+        cost = (prompt * self.price_input + completion * self.price_output) / 1e6
+        with self._lock:
+            for key, value in zip(keys, (prompt, completion, cost)):
+                self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def register(self, name: str, collect: Callable[[], Dict[str, object]]) -> None:
+        """Export collect()'s numbers as financial_bot_<name>_<key> gauges (replaces an earlier one)"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def quantiles(self, name: str, **labels) -> Dict[str, float]:
+        """p50/p95/p99 estimates and the count of one histogram series"""
+        with self._lock:
+            histogram = self._histograms.get((name, _labels(labels)))
+            if histogram is None:
+                return {}
+            result = {f"p{int(q * 100)}": histogram.quantile(q) for q in QUANTILES}
+            result["count"] = histogram.count
+            return result
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0.0)
+
+    def _collected(self) -> Iterable[Tuple[str, Labels, float]]:
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for prefix, collect in collectors:
+            try:
+                stats = collect()
+            except Exception:
+                continue
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for label, item in value.items():
+                        yield f"{prefix}_{key}", (("key", str(label)),), float(item)
+                elif isinstance(value, (int, float)):
+                    yield f"{prefix}_{key}", (), float(value)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            snapshots = [(key, list(h.counts), h.sum, h.count, h.buckets) for key, h in histograms]
+
+        described = set()
+
+        def describe(name: str, kind: str, text: str) -> None:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {PREFIX}{name} {text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter", HELP.get(name, name))
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:.10g}")
+        for (name, labels), counts, total, count, buckets in snapshots:
+            describe(name, "histogram", HELP.get(name, name))
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                le = 'le="%g"' % bound
+                lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le)} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {total:.10g}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {count}")
+        for name, labels, value in self._collected():
+            describe(name, "gauge", name.replace("_", " "))
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value:.10g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Human-readable latency, token and cost overview"""
+        text = """
+Metrics:
+─────────────────────
+"""
+        with self._lock:
+            series = sorted(self._histograms)
+        for name, title in (("request_seconds", "Requests"), ("stage_seconds", "Stages")):
+            rows = [labels for key, labels in series if key == name]
+            if rows:
+                text += f"{title}:\n"
+            for labels in rows:
+                q = self.quantiles(name, **dict(labels))
+                label = ",".join(v for _, v in labels)
+                text += (f"  {label:<16}n={q['count']:<6} p50 {q['p50'] * 1e3:8.1f} ms  "
+                         f"p95 {q['p95'] * 1e3:8.1f} ms  p99 {q['p99'] * 1e3:8.1f} ms\n")
+        with self._lock:
+            tokens = {labels: value for (name, labels), value in self._counters.items() if name == "tokens_total"}
+            cost = sum(value for (name, _), value in self._counters.items() if name == "cost_usd_total")
+        prompt = sum(v for labels, v in tokens.items() if ("kind", "prompt") in labels)
+        completion = sum(v for labels, v in tokens.items() if ("kind", "completion") in labels)
+        text += f"Tokens:           {prompt:,.0f} prompt / {completion:,.0f} completion\n"
+        text += f"Estimated Cost:   ${cost:,.6f}\n"
+        return text
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def write(self, path: Optional[str] = None) -> None:
+        """Write the Prometheus text to path (atomically)"""
+        path = path or self.path
+        if not path or not self.enabled:
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def maybe_flush(self) -> None:
+        if not self.path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._flushed < FLUSH_SECONDS:
+                return
+            self._flushed = now
+        self.write()
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        """Serve /metrics over HTTP from a daemon thread"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+
+_default_metrics: Optional[Metrics] = None
+_default_lock = threading.Lock()
+
+
+def get_default_metrics() -> Metrics:
+    """Process-wide metrics registry (starts the METRICS_PORT endpoint on first use)"""
+    global _default_metrics
+    if _default_metrics is None:
+        with _default_lock:
+            if _default_metrics is None:
+                settings = get_settings()
+                metrics = Metrics(
+                    enabled=settings.metrics_enabled,
+                    price_input=settings.price_input_per_mtok,
+                    price_output=settings.price_output_per_mtok,
+                    path=settings.metrics_path,
+                    otel=settings.metrics_otel,
+                )
+                if settings.metrics_enabled and settings.metrics_port:
+                    metrics.serve(settings.metrics_port)
+                _default_metrics = metrics
+    return _default_metrics
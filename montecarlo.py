@@ -0,0 +1,155 @@
+"""
+Monte Carlo projection of a portfolio's value.
+
+Returns are lognormal (geometric Brownian motion) with a given expected
+annual return and volatility, with an optional contribution at the end of
+every month. Paths are simulated in chunks of CHUNK_PATHS, vectorized across
+the paths of a chunk, so memory stays bounded for any path count; without
+contributions only the terminal value matters and each path is a single draw.
+
+Every chunk gets its own random stream spawned from one seed, so a run is
+reproducible from its seed whether the chunks run in this process or on a
+process pool (used for large runs). A time budget stops the run early,
+keeping the chunks finished so far, and a progress callback reports
+(paths_done, paths_total) after every chunk.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import get_settings
+
+CHUNK_PATHS = 20_000
+# Below this many paths, starting worker processes costs more than it saves
+PARALLEL_MIN_PATHS = 500_000
+STEPS_PER_YEAR = 12
+PERCENTILES = (5, 25, 50, 75, 95)
+
+Progress = Callable[[int, int], None]
+
+
+def _simulate_chunk(seed: np.random.SeedSequence, paths: int, initial: float, annual_return: float,
+                    volatility: float, years: float, contribution: float) -> np.ndarray:
+    """Terminal values of one chunk of paths"""
+    rng = np.random.default_rng(seed)
+    # Log-return drift chosen so that the expected yearly growth is 1 + annual_return
+    drift = np.log1p(annual_return / 100.0) - 0.5 * (volatility / 100.0) ** 2
+    sigma = volatility / 100.0
+
+    if not contribution:
+        # Only the sum of the log returns matters: one draw per path
+        log_growth = rng.normal(drift * years, sigma * np.sqrt(years), size=paths)
+        return initial * np.exp(log_growth)
+
+    steps = int(round(years * STEPS_PER_YEAR))
+    dt = 1.0 / STEPS_PER_YEAR
+    values = np.full(paths, float(initial))
+    growth = np.empty(paths)
+    for _ in range(steps):
+        rng.standard_normal(out=growth)
+        growth *= sigma * np.sqrt(dt)
+        growth += drift * dt
+        np.exp(growth, out=growth)
+        values *= growth
+        values += contribution
+    return values
+
+
+def _chunk_sizes(paths: int) -> List[int]:
+    full, rest = divmod(paths, CHUNK_PATHS)
+    return [CHUNK_PATHS] * full + ([rest] if rest else [])
+
+
+def simulate(initial: float, annual_return: float, volatility: float, years: float,
+             contribution: float = 0.0, paths: int = 10_000, seed: Optional[int] = None,
+             workers: Optional[int] = None, time_budget: Optional[float] = None,
+             progress: Optional[Progress] = None) -> Dict[str, object]:
+    """Simulate terminal portfolio values; see summarize() for the statistics
+
+    Returns a dict with the terminal "values" array (chunks finished within
+    the time budget), the "seed" used and whether the run "completed".
+    """
+    settings = get_settings()
+    workers = workers if workers is not None else settings.simulation_workers
+    workers = workers or os.cpu_count() or 1
+    time_budget = time_budget if time_budget is not None else settings.simulation_time_budget
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2 ** 32)
+
+    sizes = _chunk_sizes(paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = (initial, annual_return, volatility, years, contribution)
+    deadline = time.monotonic() + time_budget if time_budget > 0 else None
+    results: Dict[int, np.ndarray] = {}
+    done = 0
+
+    def finished(index: int, values: np.ndarray) -> None:
+        nonlocal done
+        results[index] = values
+        done += values.size
+        if progress is not None:
+            progress(done, paths)
+
+    if workers > 1 and paths >= PARALLEL_MIN_PATHS:
+        pool = ProcessPoolExecutor(min(workers, len(sizes)))
+        try:
+            pending = {pool.submit(_simulate_chunk, s, n, *args): i
+                       for i, (s, n) in enumerate(zip(seeds, sizes))}
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                ready, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not ready:
+                    break
+                for future in ready:
+                    finished(pending.pop(future), future.result())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+    else:
+        for i, (s, n) in enumerate(zip(seeds, sizes)):
+            if deadline is not None and results and time.monotonic() > deadline:
+                break
+            finished(i, _simulate_chunk(s, n, *args))
+
+    # Chunk order, not completion order, so the result only depends on the seed
+    values = np.concatenate([results[i] for i in sorted(results)]) if results else np.empty(0)
+    return {"values": values, "seed": seed, "completed": values.size == paths}
+
+
+def summarize(values: np.ndarray, invested: float) -> Dict[str, float]:
+    """Percentiles, mean and probability of ending below the amount invested"""
+    stats = {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    stats["mean"] = float(values.mean())
+    stats["shortfall"] = float((values < invested).mean())
+    return stats
+
+
+def format_simulation(initial: float, annual_return: float, volatility: float, years: float,
+                      contribution: float, paths: int, result: Dict[str, object]) -> str:
+    """Summary statistics of a simulate() result"""
+    values = result["values"]
+    invested = initial + contribution * int(round(years * STEPS_PER_YEAR))
+    stats = summarize(values, invested)
+    text = f"""
+Monte Carlo Projection:
+─────────────────────
+Initial Amount:   ${initial:,.2f}
+Contribution:     ${contribution:,.2f} per month
+Expected Return:  {annual_return:.2f}% per year
+Volatility:       {volatility:.2f}% per year
+Years:            {years:g}
+Paths:            {values.size:,} (seed {result['seed']})
+"""
+    if not result["completed"]:
+        text += f"                  stopped by the time budget ({paths:,} requested)\n"
+    text += f"""─────────────────────
+Total Invested:   ${invested:,.2f}
+Mean:             ${stats['mean']:,.2f}
+"""
+    for p in PERCENTILES:
+        label = f"{p}th Percentile:"
+        text += f"{label:<18}${stats[f'p{p}']:,.2f}\n"
+    text += f"Below Invested:   {stats['shortfall'] * 100:.1f}% of paths\n"
+    return text
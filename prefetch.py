@@ -0,0 +1,159 @@
+"""
+Speculative prefetch of likely follow-up explanations.
+
+After /explain <term>, users often ask about a closely related term next
+("P/E ratio" -> "EPS"). With PREFETCH_RELATED=1 the bot looks the term up in
+a local relation table and, in a background thread, fetches explanations of
+up to PREFETCH_MAX_TERMS related terms into the response cache, so the next
+/explain is a cache hit. Prefetch calls run at batch priority, so they wait
+while chat requests are queued, and terms already cached are skipped.
+
+The built-in table can be replaced with a JSON file (RELATED_TERMS_PATH)
+mapping a term to a list of related terms.
+"""
+import json
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+from config import get_settings
+from response_cache import BaseCache, normalize_term
+
+RELATED_TERMS: Dict[str, List[str]] = {
+    "p/e ratio": ["EPS", "earnings yield", "PEG ratio"],
+    "eps": ["P/E ratio", "net income", "dividend payout ratio"],
+    "peg ratio": ["P/E ratio", "EPS growth"],
+    "dividend yield": ["dividend payout ratio", "ex-dividend date", "total return"],
+    "dividend payout ratio": ["dividend yield", "EPS", "free cash flow"],
+    "market cap": ["enterprise value", "float", "large-cap stock"],
+    "enterprise value": ["market cap", "EBITDA", "EV/EBITDA"],
+    "ebitda": ["operating income", "EV/EBITDA", "free cash flow"],
+    "free cash flow": ["operating cash flow", "capital expenditures", "EBITDA"],
+    "roi": ["ROE", "annualized return", "IRR"],
+    "roe": ["ROA", "ROI", "debt-to-equity ratio"],
+    "irr": ["NPV", "discount rate", "ROI"],
+    "npv": ["IRR", "discount rate", "present value"],
+    "etf": ["expense ratio", "index fund", "mutual fund"],
+    "index fund": ["ETF", "expense ratio", "passive investing"],
+    "mutual fund": ["ETF", "NAV", "expense ratio"],
+    "expense ratio": ["ETF", "index fund", "management fee"],
+    "bond": ["yield to maturity", "coupon rate", "duration"],
+    "yield to maturity": ["coupon rate", "bond price", "yield curve"],
+    "yield curve": ["inverted yield curve", "yield to maturity", "interest rate risk"],
+    "duration": ["interest rate risk", "convexity", "bond"],
+    "diversification": ["asset allocation", "correlation", "rebalancing"],
+    "asset allocation": ["diversification", "rebalancing", "risk tolerance"],
+    "volatility": ["standard deviation", "beta", "VIX"],
+    "beta": ["volatility", "alpha", "systematic risk"],
+    "compound interest": ["APY", "simple interest", "rule of 72"],
+    "apr": ["APY", "compound interest"],
+    "apy": ["APR", "compound interest"],
+    "inflation": ["real return", "CPI", "purchasing power"],
+    "stock": ["share", "dividend", "market cap"],
+    "dollar-cost averaging": ["lump-sum investing", "volatility"],
+}
+
+
+def load_related_terms(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Relation table keyed by normalized term (RELATED_TERMS_PATH, else the built-in one)"""
+    path = path if path is not None else get_settings().related_terms_path
+    table = RELATED_TERMS
+    if path:
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+    return {normalize_term(term): list(related) for term, related in table.items()}
+
+
+class Prefetcher:
+    """One background thread filling the response cache with likely follow-ups"""
+
+    def __init__(self, related: Optional[Dict[str, List[str]]] = None,
+                 max_terms: Optional[int] = None, max_pending: int = 64):
+        self.related = related if related is not None else load_related_terms()
+        self.max_terms = max_terms if max_terms is not None else get_settings().prefetch_max_terms
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self.scheduled = 0
+        self.skipped = 0
+        self.fetched = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def related_terms(self, term: str) -> List[str]:
+        return self.related.get(normalize_term(term), [])[:self.max_terms]
+
+    def schedule(self, term: str, cache: BaseCache, key_for: Callable[[str], str],
+                 fetch: Callable[[str], Optional[str]]) -> int:
+        """Queue the terms related to term that are not cached yet; returns how many"""
+        queued = 0
+        for other in self.related_terms(term):
+            key = key_for(other)
+            with self._lock:
+                if key in self._pending:
+                    continue
+                if key in cache:
+                    self.skipped += 1
+                    continue
+                try:
+                    self._queue.put_nowait((other, key, cache, fetch))
+                except queue.Full:
+                    self.dropped += 1
+                    continue
+                self._pending.add(key)
+                self.scheduled += 1
+                queued += 1
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+                    self._thread.start()
+        return queued
+
+    def _run(self) -> None:
+        while True:
+            term, key, cache, fetch = self._queue.get()
+            try:
+                if key not in cache:
+                    answer = fetch(term)
+                    # None: an answer that must not be cached (e.g. from the local model)
+                    if answer is not None:
+                        cache.set(key, answer)
+                    with self._lock:
+                        self.fetched += 1
+            except Exception:
+                # A failed guess costs nothing; the user's own request will retry it
+                with self._lock:
+                    self.failed += 1
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+                self._queue.task_done()
+
+    def join(self) -> None:
+        """Wait until everything queued so far has been fetched (tests and benchmarks)"""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "fetched": self.fetched,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "pending": len(self._pending),
+            }
+
+
+_default_prefetcher: Optional[Prefetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_default_prefetcher() -> Prefetcher:
+    """Process-wide prefetcher shared by every session"""
+    global _default_prefetcher
+    if _default_prefetcher is None:
+        with _default_lock:
+            if _default_prefetcher is None:
+                _default_prefetcher = Prefetcher()
+    return _default_prefetcher
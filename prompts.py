@@ -0,0 +1,90 @@
+"""
+Prompt assembly shared by bot.py and app.py.
+
+Every request starts with the same system message, byte for byte, so the
+provider can reuse its cached prefix. The system context is sent once per
+request instead of being pasted into each user message, and history only
+stores what the user actually asked.
+"""
+import hashlib
+from typing import Dict, List, Optional
+
+from history import HistoryManager, count_message_tokens
+
+Message = Dict[str, str]
+
+SYSTEM_PROMPT = """You are a friendly financial educator. Answer questions about:
+- Basic investing concepts (stocks, bonds, ETFs, mutual funds)
+- Financial terms and metrics (P/E ratio, market cap, dividend yield, ROI, etc.)
+- Risk and diversification principles
+- Basic financial calculations and concepts
+- Market fundamentals
+
+IMPORTANT: Always remind users that you provide educational information only, not investment advice.
+Do not make specific investment recommendations or predict market movements.
+Keep responses concise and clear."""
+
+EXPLAIN_TEMPLATE = """Explain the financial term '{term}' in simple terms suitable for beginners.
+Include a practical example if relevant. Keep the explanation concise (2-3 sentences)."""
+
+SUMMARIZE_TEMPLATE = """Summarize the following market/financial text in 3-4 key points.
+Highlight the main investment-relevant facts. Keep it concise.
+
+Text to summarize:
+{text}"""
+
+CHUNK_SUMMARIZE_TEMPLATE = """The following is one part of a longer market/financial document.
+Summarize it in at most 5 short bullet points. Keep figures, dates and company names exact.
+
+Text:
+{text}"""
+
+REDUCE_TEMPLATE = """Below are summaries of consecutive parts of one market/financial document.
+Merge them into 3-4 key points. Highlight the main investment-relevant facts. Keep it concise.
+
+Summaries:
+{text}"""
+
+# Static prefix of every request; never mutate
+SYSTEM_PREFIX: List[Message] = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+# Changes whenever a prompt changes, so cached answers from old prompts are not reused
+PROMPT_VERSION = hashlib.sha256(
+    (SYSTEM_PROMPT + EXPLAIN_TEMPLATE + SUMMARIZE_TEMPLATE + CHUNK_SUMMARIZE_TEMPLATE + REDUCE_TEMPLATE).encode("utf-8")
+).hexdigest()[:12]
+
+
+def explain_prompt(term: str) -> str:
+    return EXPLAIN_TEMPLATE.format(term=term)
+
+
+def explained_term(prompt: str) -> Optional[str]:
+    """The term of a prompt built by explain_prompt(), or None for any other prompt"""
+    head, tail = EXPLAIN_TEMPLATE.split("{term}")
+    if prompt.startswith(head) and prompt.endswith(tail) and len(prompt) > len(head) + len(tail):
+        return prompt[len(head):len(prompt) - len(tail)]
+    return None
+
+
+def summarize_prompt(text: str) -> str:
+    return SUMMARIZE_TEMPLATE.format(text=text)
+
+
+def chunk_summarize_prompt(text: str) -> str:
+    return CHUNK_SUMMARIZE_TEMPLATE.format(text=text)
+
+
+def reduce_prompt(summaries: List[str]) -> str:
+    return REDUCE_TEMPLATE.format(text="\n\n".join(summaries))
+
+
+def build_chat_messages(history: HistoryManager) -> List[Message]:
+    """System prefix followed by the (token-budgeted) conversation"""
+    return history.build_messages(prefix=SYSTEM_PREFIX)
+
+
+def build_standalone_messages(history: HistoryManager, user_message: Message) -> List[Message]:
+    """System prefix followed by a single context-free user message"""
+    messages = SYSTEM_PREFIX + [dict(user_message)]
+    history.record_prompt_tokens(count_message_tokens(messages))
+    return messages
@@ -0,0 +1,224 @@
+"""
+Response cache for deterministic-prompt LLM calls (e.g. /explain <term>).
+
+Two backends share one interface:
+- LRUCache: in-process, bounded by entry count, with TTL expiry
+- SQLiteCache: on-disk, survives restarts and can be shared by several bot
+  processes (WAL mode), with the same LRU/TTL policy
+
+Both count hits, misses and evictions.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import get_settings
+
+
+def normalize_term(term: str) -> str:
+    """Normalize a term so trivial variants share a cache entry"""
+    term = term.casefold().strip()
+    term = re.sub(r"\s+", " ", term)
+    return term.strip(" ?!.,;:'\"")
+
+
+def make_key(kind: str, text: str, model: str, **params) -> str:
+    """Build a cache key from the request kind, normalized text, model and sampling params"""
+    payload = json.dumps(
+        [kind, normalize_term(text), model, sorted(params.items())],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BaseCache(ABC):
+    """Hit/miss bookkeeping shared by the cache backends"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        settings = get_settings()
+        self.max_entries = max_entries if max_entries is not None else settings.response_cache_size
+        self.ttl = ttl if ttl is not None else settings.response_cache_ttl
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _count(self, hit: bool) -> None:
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and the current hit rate"""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """The cached value for key, or None (counted as a hit or miss)"""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry"""
+
+    @abstractmethod
+    def __contains__(self, key: str) -> bool:
+        """Whether key holds a live entry (not counted as a hit or miss, recency unchanged)"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries"""
+
+
+class LRUCache(BaseCache):
+    """In-memory LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        super().__init__(max_entries, ttl)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() - entry[1] > self.ttl:
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        self._count(entry is not None)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+        return entry is not None and time.time() - entry[1] <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(BaseCache):
+    """On-disk LRU/TTL cache that several processes can share"""
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        import sqlite3
+
+        super().__init__(max_entries, ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            elif row is not None:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        self._count(row is not None)
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM responses WHERE key = ? AND created >= ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache: Optional[BaseCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[BaseCache]:
+    """Return the process-wide response cache configured from the environment
+
+    Returns None when caching is disabled (RESPONSE_CACHE_SIZE=0).
+    """
+    global _default_cache
+    settings = get_settings()
+    if settings.response_cache_size <= 0:
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                if settings.response_cache_path:
+                    _default_cache = SQLiteCache(settings.response_cache_path)
+                else:
+                    _default_cache = LRUCache()
+    return _default_cache
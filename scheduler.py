@@ -0,0 +1,269 @@
+"""
+Rate-limit-aware request scheduler for Mistral API calls.
+
+Every API call goes through a RequestScheduler, which:
+- paces requests with token buckets for requests/second and tokens/minute,
+  so bursts are smoothed to just under the provider quota
+- serves interactive chat before batch work (e.g. /summarize chunks): batch
+  calls wait while a chat call is waiting and never use the last
+  BATCH_RESERVE of the buckets
+- retries 429s, 5xx responses and connection errors with jittered
+  exponential backoff, honouring Retry-After (capped at max_delay); a 429
+  pauses every caller, not just the one that hit it
+
+Works from threads (call) and from asyncio (acall).
+"""
+import random
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from config import get_settings
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Share of each bucket that batch calls leave for interactive ones
+BATCH_RESERVE = 0.2
+# Longest single sleep while waiting, so a newly waiting chat call is noticed
+MAX_POLL_SECONDS = 0.25
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Continuously refilling bucket; the level may go negative to carry debt"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float, now: float) -> float:
+        """Seconds until amount can be taken while keeping reserve * capacity in the bucket"""
+        self._refill(now)
+        # Requests larger than the bucket wait for a full bucket, then run into debt
+        needed = min(amount + reserve * self.capacity, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Parse the Retry-After header of an SDK error (seconds or HTTP date)"""
+    headers = getattr(error, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limits, transient server errors and connection failures"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    import httpx
+    return isinstance(error, httpx.TransportError)
+
+
+class RequestScheduler:
+    """Token-bucket pacing, priority classes and retries around API calls"""
+
+    def __init__(self, requests_per_second: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        settings = get_settings()
+        rps = requests_per_second if requests_per_second is not None else settings.rate_limit_rps
+        tpm = tokens_per_minute if tokens_per_minute is not None else settings.rate_limit_tpm
+        self.max_retries = max_retries if max_retries is not None else settings.max_retries
+        self.base_delay = base_delay if base_delay is not None else settings.retry_base_delay
+        self.max_delay = max_delay if max_delay is not None else settings.retry_max_delay
+
+        # 0 disables a limit. Requests are paced one at a time; the token
+        # bucket allows a 10 s burst but refills slower, so that no sliding
+        # minute ever exceeds tokens_per_minute.
+        self.requests = TokenBucket(rps, 1.0) if rps > 0 else None
+        self.tokens = TokenBucket(tpm * 5 / 6 / 60, tpm / 6) if tpm > 0 else None
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._waiting: Counter = Counter()
+        self.sent = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def _try_acquire(self, priority: int, tokens: float) -> float:
+        """Take capacity and return 0, or return how long to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if priority > INTERACTIVE and self._waiting[INTERACTIVE]:
+                return MAX_POLL_SECONDS
+            reserve = 0.0 if priority == INTERACTIVE else BATCH_RESERVE
+            wait = 0.0
+            if self.requests is not None:
+                wait = self.requests.wait_time(1, reserve, now)
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, reserve, now))
+            if wait > 0:
+                return wait
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            self.sent += 1
+            return 0.0
+
+    def acquire(self, priority: int = INTERACTIVE, tokens: float = 0) -> None:
+        """Block the calling thread until the request may be sent"""
+        start = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(priority, tokens)
+                if not wait:
+                    break
+                time.sleep(min(wait, MAX_POLL_SECONDS))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+                self.wait_seconds += time.monotonic() - start
+
+    async def aacquire(self, priority: int = INTERACTIVE, tokens: float = 0) -> None:
+        """Async counterpart of acquire"""
+        import asyncio
+
+        start = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(priority, tokens)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, MAX_POLL_SECONDS))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+                self.wait_seconds += time.monotonic() - start
+
+    def settle(self, estimated_tokens: float, actual_tokens: Optional[float]) -> None:
+        """Correct the token bucket once the API has reported the real usage"""
+        if self.tokens is None or actual_tokens is None:
+            return
+        with self._lock:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.tokens.give(difference)
+            else:
+                self.tokens.take(-difference)
+
+    # ------------------------------------------------------------------
+    # Retries
+    # ------------------------------------------------------------------
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is final"""
+        if attempt >= self.max_retries or not is_retryable(error):
+            with self._lock:
+                self.failures += 1
+            return None
+        delay = retry_after_seconds(error)
+        if delay is None:
+            # Full jitter keeps retrying callers from stampeding together
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        else:
+            # One huge Retry-After must not stall every queued caller
+            delay = min(delay, self.max_delay)
+        with self._lock:
+            self.retries += 1
+            if getattr(error, "status_code", None) == 429:
+                # Over quota: hold back every caller, not only this one
+                self.rate_limited += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def call(self, send: Callable[[], T], priority: int = INTERACTIVE, tokens: float = 0) -> T:
+        """Run send() once admitted, retrying transient failures"""
+        attempt = 0
+        while True:
+            self.acquire(priority, tokens)
+            try:
+                return send()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            time.sleep(delay)
+
+    async def acall(self, send: Callable[[], Awaitable[T]], priority: int = INTERACTIVE,
+                    tokens: float = 0) -> T:
+        """Async counterpart of call; send() must return a new awaitable on each attempt"""
+        import asyncio
+
+        attempt = 0
+        while True:
+            await self.aacquire(priority, tokens)
+            try:
+                return await send()
+            except Exception as error:
+                delay = self._retry_delay(error, attempt)
+                if delay is None:
+                    raise
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Request, retry and throttling counters"""
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failures": self.failures,
+                "wait_seconds": round(self.wait_seconds, 3),
+            }
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RequestScheduler:
+    """Process-wide scheduler shared by the bot, async sessions and the summarizer"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = RequestScheduler()
+    return _default_scheduler
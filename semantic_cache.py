@@ -0,0 +1,300 @@
+"""
+Semantic answer cache for free-form questions.
+
+Most free-form traffic is paraphrases of the same beginner questions ("what
+is an ETF", "explain ETFs", "ETF meaning"). SemanticCache embeds a question,
+looks up the nearest stored question in a flat inner-product index (NumPy,
+one matrix multiply) and returns its answer when the cosine similarity is
+above a threshold.
+
+Embeddings come from HashingEmbedder (hashed word/bigram/character n-grams,
+no model download) or, if sentence-transformers is installed and
+SEMANTIC_CACHE_MODEL is set, from a local sentence-transformers model.
+
+The index is bounded (least recently used entries are evicted), entries
+expire after a TTL, and it can be persisted to a single .npz file. Answers
+depend on the model and prompts, so a file written under another
+model/PROMPT_VERSION is ignored.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import get_settings
+from response_cache import BaseCache
+
+# Question framing that does not change what is being asked
+STOP_WORDS = frozenset("""
+a an the is are was were be what whats what's how does do did can could would
+should i me my you your we our it its they them their this that these those
+of in on for to and or about with
+please tell explain explanation define definition meaning mean means describe
+term concept work works simple simply terms
+""".split())
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9/&'-]*")
+
+
+def _stem(word: str) -> str:
+    # Crude plural folding: "etfs" -> "etf", "bonds" -> "bond"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+class HashingEmbedder:
+    """Signed feature hashing of word, bigram and character-trigram features"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if (h >> 31) & 1 else -weight
+
+    def embed(self, text: str) -> np.ndarray:
+        words = [_stem(w) for w in _WORD_RE.findall(text.lower()) if w not in STOP_WORDS]
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in words:
+            self._add(vector, "w:" + word, 1.0)
+            # Character trigrams tolerate typos and inflections
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[i:i + 3], 0.25)
+        for first, second in zip(words, words[1:]):
+            self._add(vector, "b:" + first + " " + second, 0.5)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model (optional dependency)"""
+
+    def __init__(self, model_name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("SEMANTIC_CACHE_MODEL requires sentence-transformers (pip install sentence-transformers)")
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st:{model_name}"
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.model.encode([text], normalize_embeddings=True)[0].astype(np.float32)
+
+
+class SemanticCache(BaseCache):
+    """Nearest-neighbour question -> answer cache with LRU eviction and TTL"""
+
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None, path: Optional[str] = None,
+                 embedder=None, namespace: str = ""):
+        settings = get_settings()
+        super().__init__(max_entries if max_entries is not None else settings.semantic_cache_size,
+                         ttl if ttl is not None else settings.semantic_cache_ttl)
+        self.threshold = threshold if threshold is not None else settings.semantic_cache_threshold
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        self.namespace = f"{namespace}|{self.embedder.name}"
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._questions: List[str] = []
+        self._answers: List[str] = []
+        self._created = np.zeros(0)
+        self._used = np.zeros(0)
+        self._size = 0
+        self._unsaved = 0
+        self.lookup_seconds = 0.0
+        if path:
+            self.load()
+            atexit.register(self.save)
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _grow(self) -> None:
+        capacity = max(64, 2 * len(self._vectors))
+        vectors = np.zeros((capacity, self.embedder.dim), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        self._vectors = vectors
+        self._created = np.resize(self._created, capacity)
+        self._used = np.resize(self._used, capacity)
+
+    def _remove(self, index: int) -> None:
+        # Move the last entry into the hole so the index stays contiguous
+        last = self._size - 1
+        if index != last:
+            self._vectors[index] = self._vectors[last]
+            self._questions[index] = self._questions[last]
+            self._answers[index] = self._answers[last]
+            self._created[index] = self._created[last]
+            self._used[index] = self._used[last]
+        self._questions.pop()
+        self._answers.pop()
+        self._size = last
+        self._unsaved += 1
+
+    def _search(self, vector: np.ndarray):
+        """Best (index, similarity) among live entries, or (None, 0.0)"""
+        if not self._size:
+            return None, 0.0
+        scores = self._vectors[:self._size] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    # ------------------------------------------------------------------
+    # Cache interface
+    # ------------------------------------------------------------------
+    def get(self, key: str) -> Optional[str]:
+        """Answer of the most similar stored question, if similar enough"""
+        start = time.perf_counter()
+        vector = self.embedder.embed(key)
+        now = time.time()
+        answer = None
+        with self._lock:
+            index, score = self._search(vector)
+            if index is not None and score >= self.threshold:
+                if now - self._created[index] > self.ttl:
+                    self._remove(index)
+                else:
+                    self._used[index] = now
+                    answer = self._answers[index]
+            self.lookup_seconds += time.perf_counter() - start
+        self._count(answer is not None)
+        return answer
+
+    def set(self, key: str, value: str) -> None:
+        vector = self.embedder.embed(key)
+        if not vector.any():
+            # Nothing but filler words; it could never be matched
+            return
+        now = time.time()
+        with self._lock:
+            index, score = self._search(vector)
+            if index is None or score < 0.999:
+                if self._size == len(self._vectors):
+                    self._grow()
+                index = self._size
+                self._size += 1
+                self._questions.append(key)
+                self._answers.append(value)
+            else:
+                # Same question again: refresh the stored answer
+                self._questions[index] = key
+                self._answers[index] = value
+            self._vectors[index] = vector
+            self._created[index] = now
+            self._used[index] = now
+            while self._size > self.max_entries:
+                self._remove(int(np.argmin(self._used[:self._size])))
+                self.evictions += 1
+            self._unsaved += 1
+            autosave = self.path and self._unsaved >= 20
+        if autosave:
+            self.save()
+
+    def invalidate(self, question: str, threshold: Optional[float] = None) -> int:
+        """Drop every entry that would answer question; returns how many were removed"""
+        vector = self.embedder.embed(question)
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            scores = self._vectors[:self._size] @ vector
+            matches = sorted(np.flatnonzero(scores >= threshold).tolist(), reverse=True)
+            for index in matches:
+                self._remove(index)
+        return len(matches)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._questions.clear()
+            self._answers.clear()
+            self._size = 0
+            self._unsaved += 1
+
+    def __contains__(self, key: str) -> bool:
+        vector = self.embedder.embed(key)
+        now = time.time()
+        with self._lock:
+            index, score = self._search(vector)
+            return index is not None and score >= self.threshold and now - self._created[index] <= self.ttl
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters plus mean lookup latency"""
+        stats = super().stats()
+        lookups = self.hits + self.misses
+        stats["mean_lookup_us"] = self.lookup_seconds / lookups * 1e6 if lookups else 0.0
+        return stats
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> None:
+        """Write the index to path (atomically)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            meta = json.dumps({
+                "namespace": self.namespace,
+                "questions": self._questions,
+                "answers": self._answers,
+            })
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, vectors=self._vectors[:self._size], created=self._created[:self._size],
+                         used=self._used[:self._size], meta=np.array(meta))
+            os.replace(tmp_path, self.path)
+            self._unsaved = 0
+
+    def load(self) -> None:
+        """Load the index from path; files from another model/prompt version are ignored"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["namespace"] != self.namespace or data["vectors"].shape[1:] != (self.embedder.dim,):
+                return
+            with self._lock:
+                self._vectors = data["vectors"].astype(np.float32)
+                self._created = data["created"].astype(np.float64)
+                self._used = data["used"].astype(np.float64)
+                self._questions = list(meta["questions"])
+                self._answers = list(meta["answers"])
+                self._size = len(self._questions)
+                self._unsaved = 0
+
+
+_default_cache: Optional[SemanticCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide semantic cache, or None when SEMANTIC_CACHE_THRESHOLD is 0"""
+    global _default_cache
+    settings = get_settings()
+    if settings.semantic_cache_threshold <= 0:
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                from prompts import PROMPT_VERSION
+
+                embedder = SentenceTransformerEmbedder(settings.semantic_cache_model) if settings.semantic_cache_model else None
+                _default_cache = SemanticCache(
+                    path=settings.semantic_cache_path,
+                    embedder=embedder,
+                    namespace=f"{settings.mistral_model}|{PROMPT_VERSION}",
+                )
+    return _default_cache
@@ -0,0 +1,292 @@
+"""
+Multi-session HTTP/WebSocket server for the Financial Bot.
+
+An ASGI app (Starlette) in front of one AsyncFinancialBot. Session state is
+bounded: at most SERVER_MAX_LIVE_SESSIONS sessions are kept live, sessions
+idle for SERVER_IDLE_SECONDS are parked, and parked conversations live in a
+SessionStore (compressed, under SERVER_SESSION_MEMORY_MB, optionally
+spilling to SERVER_SESSION_DB).
+
+Sessions are created lazily: POST /v1/sessions only hands out a fresh random
+id, and any well-formed id (1-64 of A-Z a-z 0-9 _ -) gets a session on its
+first message, or gets its parked/logged conversation back. A malformed id is
+a 400; there is no "unknown session".
+
+Endpoints:
+    POST   /v1/sessions                     -> {"session_id": ...}
+    POST   /v1/sessions/{id}/messages       {"message": ..., "stream": false}
+           (JSON reply, or server-sent events with "stream": true)
+    DELETE /v1/sessions/{id}
+    WS     /v1/sessions/{id}/ws             send {"message": ...}, receive delta/done events
+    POST   /v1/calculate                    {"command": "/compound 1000 5 10"}
+    GET    /metrics, GET /healthz
+
+Run:
+    python server.py --host 127.0.0.1 --port 8000
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import re
+import uuid
+from typing import AsyncIterator, Optional
+
+try:
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+except ImportError as e:
+    raise ImportError("server.py requires starlette and uvicorn (pip install starlette uvicorn)") from e
+
+from async_bot import AsyncFinancialBot, AsyncSession, BotOverloadedError
+from bot import FinancialBot
+from config import get_settings
+from metrics import get_default_metrics
+from session_store import SessionStore
+
+SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Seconds a client is asked to wait after a 503
+RETRY_AFTER = 1
+
+
+def _error(status: int, message: str, **headers) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers or None)
+
+
+def _overloaded(e: BotOverloadedError) -> JSONResponse:
+    return _error(503, str(e), **{"Retry-After": str(RETRY_AFTER)})
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class BotServer:
+    """Request handlers around one AsyncFinancialBot"""
+
+    def __init__(self, bot: Optional[AsyncFinancialBot] = None):
+        settings = get_settings()
+        self.settings = settings
+        self.bot = bot if bot is not None else AsyncFinancialBot(
+            store=SessionStore(),
+            max_live_sessions=settings.server_max_live_sessions,
+            allow_file_access=False,
+            max_simulation_paths=settings.server_max_simulation_paths,
+            max_cashflow_years=settings.server_max_cashflow_years,
+            # No process pool forked from the server; one thread per /simulate
+            simulation_workers=1,
+        )
+        self.metrics = get_default_metrics()
+        self.metrics.register("server", self.bot.stats)
+        if self.bot.store is not None:
+            self.metrics.register("session_store", self.bot.store.stats)
+        self._calculator: Optional[FinancialBot] = None
+
+    @property
+    def calculator(self) -> FinancialBot:
+        """Session-less bot for /v1/calculate (also reports a missing API key at startup)"""
+        if self._calculator is None:
+            self._calculator = AsyncSession(self.bot, "_calculator")
+        return self._calculator
+
+    # ==========================================================================
+    # Lifecycle
+    # ==========================================================================
+
+    @contextlib.asynccontextmanager
+    async def lifespan(self, app):
+        self.calculator  # fail fast on a missing API key
+        task = asyncio.create_task(self._park_idle_loop())
+        try:
+            yield
+        finally:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+            import llm_client
+
+            await llm_client.aclose_clients()
+            if self.bot.store is not None:
+                self.bot.store.close()
+
+    async def _park_idle_loop(self) -> None:
+        idle = self.settings.server_idle_seconds
+        interval = min(60.0, max(1.0, idle / 2))
+        while True:
+            await asyncio.sleep(interval)
+            # SQLite work in park_idle/expire is short; the event loop owns the sessions
+            self.bot.park_idle(idle)
+
+    # ==========================================================================
+    # Input checks
+    # ==========================================================================
+
+    async def _read_field(self, request: Request, field: str):
+        """(value, body) from a JSON body, or (None, error response)"""
+        limit = self.settings.server_max_message_chars
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > limit * 4 + 1024:
+            return None, _error(413, f"Message longer than {limit} characters")
+        try:
+            body = await request.json()
+        except ValueError:
+            return None, _error(400, "Body must be JSON")
+        value = body.get(field) if isinstance(body, dict) else None
+        if not isinstance(value, str) or not value.strip():
+            return None, _error(400, f'Missing "{field}"')
+        if len(value) > limit:
+            return None, _error(413, f"Message longer than {limit} characters")
+        return value, body
+
+    @staticmethod
+    def _session_id(request) -> Optional[str]:
+        session_id = request.path_params["session_id"]
+        return session_id if SESSION_ID.match(session_id) else None
+
+    # ==========================================================================
+    # HTTP endpoints
+    # ==========================================================================
+
+    async def create_session(self, request: Request) -> Response:
+        # Nothing is allocated until the first message arrives
+        return JSONResponse({"session_id": uuid.uuid4().hex}, status_code=201)
+
+    async def delete_session(self, request: Request) -> Response:
+        session_id = self._session_id(request)
+        if session_id is None:
+            return _error(400, "Invalid session id")
+        self.bot.end_session(session_id)
+        return Response(status_code=204)
+
+    async def post_message(self, request: Request) -> Response:
+        session_id = self._session_id(request)
+        if session_id is None:
+            return _error(400, "Invalid session id")
+        message, body = await self._read_field(request, "message")
+        if message is None:
+            return body
+        if body.get("stream"):
+            return await self._stream_reply(session_id, message)
+        try:
+            reply = await self.bot.process_user_input(session_id, message)
+        except BotOverloadedError as e:
+            return _overloaded(e)
+        return JSONResponse({"session_id": session_id, "reply": reply})
+
+    async def _stream_reply(self, session_id: str, message: str) -> Response:
+        chunks = self.bot.stream_user_input(session_id, message)
+        # Wait for the first chunk so an overload is still a plain 503
+        try:
+            first = await chunks.__anext__()
+        except BotOverloadedError as e:
+            return _overloaded(e)
+        except StopAsyncIteration:
+            first = None
+
+        async def events() -> AsyncIterator[str]:
+            if first is not None:
+                yield _sse("delta", {"text": first})
+            async for chunk in chunks:
+                yield _sse("delta", {"text": chunk})
+            yield _sse("done", {"session_id": session_id})
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    async def calculate(self, request: Request) -> Response:
+        command, body = await self._read_field(request, "command")
+        if command is None:
+            return body
+        # Only commands answered locally (no AI call, no session)
+        calculator, _ = FinancialBot.commands.lookup(command.strip())
+        if calculator is None or not calculator.calculator:
+            return _error(400, "Not a calculator command: " + ", ".join(FinancialBot.commands.calculators()))
+        try:
+            result = await self.bot.calculate(self.calculator, command)
+        except BotOverloadedError as e:
+            return _overloaded(e)
+        return JSONResponse({"result": result})
+
+    async def metrics_endpoint(self, request: Request) -> Response:
+        return PlainTextResponse(self.metrics.render(), media_type="text/plain; version=0.0.4")
+
+    async def healthz(self, request: Request) -> Response:
+        stats = self.bot.stats()
+        if self.bot.store is not None:
+            stats["stored"] = len(self.bot.store)
+        return JSONResponse(stats)
+
+    # ==========================================================================
+    # WebSocket
+    # ==========================================================================
+
+    async def websocket(self, websocket: WebSocket) -> None:
+        session_id = self._session_id(websocket)
+        if session_id is None:
+            await websocket.close(code=4400)
+            return
+        await websocket.accept()
+        limit = self.settings.server_max_message_chars
+        try:
+            while True:
+                text = await websocket.receive_text()
+                try:
+                    message = json.loads(text).get("message")
+                except (ValueError, AttributeError):
+                    message = text
+                if not isinstance(message, str) or not message.strip():
+                    await websocket.send_json({"type": "error", "status": 400, "error": 'Missing "message"'})
+                    continue
+                if len(message) > limit:
+                    await websocket.send_json({"type": "error", "status": 413,
+                                               "error": f"Message longer than {limit} characters"})
+                    continue
+                try:
+                    async for chunk in self.bot.stream_user_input(session_id, message):
+                        await websocket.send_json({"type": "delta", "text": chunk})
+                except BotOverloadedError as e:
+                    await websocket.send_json({"type": "error", "status": 503, "error": str(e),
+                                               "retry_after": RETRY_AFTER})
+                    continue
+                await websocket.send_json({"type": "done"})
+        except WebSocketDisconnect:
+            pass
+
+    def routes(self):
+        return [
+            Route("/v1/sessions", self.create_session, methods=["POST"]),
+            Route("/v1/sessions/{session_id}", self.delete_session, methods=["DELETE"]),
+            Route("/v1/sessions/{session_id}/messages", self.post_message, methods=["POST"]),
+            WebSocketRoute("/v1/sessions/{session_id}/ws", self.websocket),
+            Route("/v1/calculate", self.calculate, methods=["POST"]),
+            Route("/metrics", self.metrics_endpoint, methods=["GET"]),
+            Route("/healthz", self.healthz, methods=["GET"]),
+        ]
+
+
+def create_app(bot: Optional[AsyncFinancialBot] = None) -> Starlette:
+    """ASGI app; for uvicorn use `uvicorn server:create_app --factory`"""
+    server = BotServer(bot)
+    app = Starlette(routes=server.routes(), lifespan=server.lifespan)
+    app.state.server = server
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Financial Bot multi-session server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
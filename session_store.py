@@ -0,0 +1,161 @@
+"""
+Compact storage for idle chat sessions.
+
+A live session (AsyncSession) carries a full FinancialBot; an idle one only
+needs its conversation. SessionStore keeps idle conversations as
+zlib-compressed JSON, least recently used first, under a hard byte ceiling
+(SERVER_SESSION_MEMORY_MB). When the ceiling is reached the oldest
+conversations spill to SQLite (SERVER_SESSION_DB) or, without a database,
+are dropped. Conversations idle for longer than SERVER_SESSION_TTL expire.
+"""
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import get_settings
+
+State = Dict[str, object]
+
+
+def _pack(state: State) -> bytes:
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes) -> State:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class SessionStore:
+    """Idle conversations: compressed in memory, spilling to SQLite past a byte ceiling"""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 path: Optional[str] = None):
+        settings = get_settings()
+        self.max_bytes = max_bytes if max_bytes is not None else settings.server_session_memory_mb * 1024 * 1024
+        self.ttl = ttl if ttl is not None else settings.server_session_ttl
+        self.path = path if path is not None else settings.server_session_db
+        self._lock = threading.Lock()
+        # session id -> (compressed state, time stored)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self.bytes = 0
+        self.spilled = 0
+        self.dropped = 0
+        self.expired = 0
+        self._db = None
+        if self.path:
+            import sqlite3
+
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, state BLOB NOT NULL, used REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS sessions_used ON sessions (used)")
+            self._db.commit()
+
+    def put(self, session_id: str, state: State, used: Optional[float] = None) -> None:
+        """Store a conversation; empty ones are not kept at all"""
+        used = used if used is not None else time.time()
+        with self._lock:
+            self._discard(session_id)
+            if not state.get("messages") and not state.get("summary"):
+                return
+            blob = _pack(state)
+            self._memory[session_id] = (blob, used)
+            self.bytes += len(blob)
+            self._enforce_ceiling()
+
+    def take(self, session_id: str) -> Optional[State]:
+        """Remove and return a stored conversation (it becomes live again)"""
+        with self._lock:
+            entry = self._memory.pop(session_id, None)
+            if entry is not None:
+                self.bytes -= len(entry[0])
+                blob, used = entry
+            elif self._db is not None:
+                row = self._db.execute("SELECT state, used FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is None:
+                    return None
+                self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._db.commit()
+                blob, used = row
+            else:
+                return None
+        if time.time() - used > self.ttl:
+            self.expired += 1
+            return None
+        return _unpack(blob)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._discard(session_id)
+
+    def _discard(self, session_id: str) -> None:
+        entry = self._memory.pop(session_id, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+        elif self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._db.commit()
+
+    def _enforce_ceiling(self) -> None:
+        spill = []
+        while self.bytes > self.max_bytes and self._memory:
+            session_id, (blob, used) = self._memory.popitem(last=False)
+            self.bytes -= len(blob)
+            spill.append((session_id, blob, used))
+        if not spill:
+            return
+        if self._db is None:
+            self.dropped += len(spill)
+            return
+        self._db.executemany("INSERT OR REPLACE INTO sessions (id, state, used) VALUES (?, ?, ?)", spill)
+        self._db.commit()
+        self.spilled += len(spill)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop conversations idle for longer than the TTL; returns how many"""
+        cutoff = (now if now is not None else time.time()) - self.ttl
+        removed = 0
+        with self._lock:
+            # Least recently used first, so stop at the first fresh entry
+            while self._memory:
+                session_id, (blob, used) = next(iter(self._memory.items()))
+                if used >= cutoff:
+                    break
+                del self._memory[session_id]
+                self.bytes -= len(blob)
+                removed += 1
+            if self._db is not None:
+                removed += self._db.execute("DELETE FROM sessions WHERE used < ?", (cutoff,)).rowcount
+                self._db.commit()
+            self.expired += removed
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            stored = len(self._memory)
+            if self._db is not None:
+                stored += self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return stored
+
+    def stats(self) -> Dict[str, int]:
+        """Stored-session counts and memory use"""
+        with self._lock:
+            on_disk = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] if self._db is not None else 0
+            return {
+                "in_memory": len(self._memory),
+                "on_disk": on_disk,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "spilled": self.spilled,
+                "dropped": self.dropped,
+                "expired": self.expired,
+            }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Map-reduce summarization for long market/financial documents.
+
+A filing or news dump does not fit in one /summarize prompt. The pipeline
+reads the text as a stream, splits it into token-bounded chunks on paragraph
+boundaries, summarizes the chunks concurrently on a bounded thread pool and
+then merges the partial summaries level by level until one summary is left.
+Inside the bot, calls go through the bot's own completion path (backend,
+scheduler, retries, metrics); on its own, the pipeline uses the pooled
+Mistral client from llm_client.py.
+
+Every call is cached by a hash of its prompt, so re-running an updated
+document only pays for the chunks that changed. Set RESPONSE_CACHE_PATH to
+keep the cache across runs.
+
+    python summarizer.py report.txt
+    cat news.txt | python summarizer.py -
+    python summarizer.py reports/ --output summaries/
+"""
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import sys
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import get_settings, require_api_key
+from history import count_message_tokens, count_tokens
+from llm_client import get_client
+from metrics import get_default_metrics
+from prompts import (PROMPT_VERSION, SYSTEM_PREFIX, chunk_summarize_prompt, reduce_prompt,
+                     summarize_prompt)
+from response_cache import BaseCache, get_default_cache, make_key
+from scheduler import BATCH, RequestScheduler, get_default_scheduler
+
+TEXT_EXTENSIONS = (".txt", ".md")
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+# ============================================================================
+# CHUNKING
+# ============================================================================
+def iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """Group lines (e.g. a file object or sys.stdin) into blank-line separated paragraphs"""
+    paragraph: List[str] = []
+    for line in lines:
+        line = line.rstrip()
+        if line.strip():
+            paragraph.append(line)
+        elif paragraph:
+            yield "\n".join(paragraph)
+            paragraph = []
+    if paragraph:
+        yield "\n".join(paragraph)
+
+
+def _split_oversized(paragraph: str, max_tokens: int) -> Iterator[str]:
+    """Split a paragraph that alone exceeds the budget on sentence boundaries"""
+    for sentence in _SENTENCE_RE.split(paragraph):
+        # A single over-long "sentence" (tables, lists) is cut by length
+        while count_tokens(sentence) > max_tokens:
+            yield sentence[:max_tokens * 4]
+            sentence = sentence[max_tokens * 4:]
+        if sentence:
+            yield sentence
+
+
+def _is_cut_point(piece: str) -> bool:
+    # Content-defined boundary (~1 in 4 paragraphs): after an edit, chunk
+    # boundaries re-align with the old ones, so later chunks hit the cache
+    return zlib.crc32(piece.encode("utf-8")) & 3 == 0
+
+
+def iter_chunks(lines: Iterable[str], max_tokens: int) -> Iterator[str]:
+    """Stream chunks of at most max_tokens, keeping paragraphs whole where possible"""
+    chunk: List[str] = []
+    size = 0
+    for paragraph in iter_paragraphs(lines):
+        pieces = [paragraph] if count_tokens(paragraph) <= max_tokens else _split_oversized(paragraph, max_tokens)
+        for piece in pieces:
+            tokens = count_tokens(piece) + 1
+            if chunk and size + tokens > max_tokens:
+                yield "\n\n".join(chunk)
+                chunk, size = [], 0
+            chunk.append(piece)
+            size += tokens
+            if size >= max_tokens // 2 and _is_cut_point(piece):
+                yield "\n\n".join(chunk)
+                chunk, size = [], 0
+    if chunk:
+        yield "\n\n".join(chunk)
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Split an in-memory text into token-bounded chunks"""
+    return list(iter_chunks(text.splitlines(), max_tokens))
+
+
+def iter_file_chunks(path: str, max_tokens: int) -> Iterator[str]:
+    """Stream the chunks of a text file ("-" reads stdin) without loading it whole"""
+    if path == "-":
+        yield from iter_chunks(sys.stdin, max_tokens)
+        return
+    with open(path, encoding="utf-8") as f:
+        yield from iter_chunks(f, max_tokens)
+
+
+def find_text_files(folder: str) -> List[str]:
+    """Text documents (.txt/.md) directly inside folder, sorted by name"""
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(TEXT_EXTENSIONS) and os.path.isfile(os.path.join(folder, name))
+    )
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+class SummaryPipeline:
+    """Chunk -> parallel map -> hierarchical reduce, with per-call caching
+
+    complete(prompt, priority=, max_tokens=, stage=) -> (reply, cacheable)
+    sends one standalone prompt; FinancialBot passes its _complete_standalone
+    so summaries use its backend and scheduler. Without it, calls go to
+    Mistral through the pooled client.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_tokens: Optional[int] = None,
+                 cache: Optional[BaseCache] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 temperature: float = 0.7, max_tokens: int = 400,
+                 complete: Optional[Callable[..., Tuple[str, bool]]] = None):
+        settings = get_settings()
+        self.api_key = api_key or require_api_key()
+        self.send = complete if complete is not None else self._send
+        self.model = model or settings.mistral_model
+        self.workers = workers or settings.summary_workers
+        self.chunk_tokens = chunk_tokens or settings.summary_chunk_tokens
+        self.cache = cache if cache is not None else get_default_cache()
+        self.scheduler = scheduler if scheduler is not None else get_default_scheduler()
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.metrics = get_default_metrics()
+        self._lock = threading.Lock()
+        self.api_calls = 0
+        self.cached_calls = 0
+
+    def _complete(self, prompt: str) -> str:
+        """One standalone summarization call, answered from the cache when possible"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        key = make_key("summarize", digest, self.model, prompt=PROMPT_VERSION,
+                       temperature=self.temperature, max_tokens=self.max_tokens)
+        cached = self.cache.get(key) if self.cache is not None else None
+        if cached is not None:
+            with self._lock:
+                self.cached_calls += 1
+            return cached
+
+        # Batch priority: interactive chat is served first when near the rate limit
+        summary, cacheable = self.send(prompt, priority=BATCH, max_tokens=self.max_tokens, stage="summarize_api")
+        with self._lock:
+            self.api_calls += 1
+        if self.cache is not None and cacheable:
+            self.cache.set(key, summary)
+        return summary
+
+    def _send(self, prompt: str, priority: int, max_tokens: int, stage: str) -> Tuple[str, bool]:
+        """Default completion: Mistral through the pooled client and the shared scheduler"""
+        client = get_client(self.api_key)
+        messages = SYSTEM_PREFIX + [{"role": "user", "content": prompt}]
+        estimate = count_message_tokens(messages) + max_tokens
+        with self.metrics.stage(stage):
+            response = self.scheduler.call(
+                lambda: client.chat.complete(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                ),
+                priority=priority,
+                tokens=estimate,
+            )
+        if response.usage:
+            self.scheduler.settle(estimate, response.usage.total_tokens)
+            self.metrics.record_usage(self.model, response.usage)
+        if not response.choices:
+            raise RuntimeError("Could not get response from API")
+        return response.choices[0].message.content, True
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        """Pack consecutive partial summaries into groups that fit one reduce prompt"""
+        groups: List[List[str]] = []
+        group: List[str] = []
+        size = 0
+        for summary in summaries:
+            tokens = count_tokens(summary) + 1
+            # At least two per group, so every level shrinks even with a tiny budget
+            if len(group) > 1 and size + tokens > self.chunk_tokens:
+                groups.append(group)
+                group, size = [], 0
+            group.append(summary)
+            size += tokens
+        if group:
+            groups.append(group)
+        return groups
+
+    def _final_prompts(self, pool: ThreadPoolExecutor,
+                       documents: Dict[str, Iterable[str]]) -> Dict[str, str]:
+        # Map: every chunk of every document is queued up front, so many small
+        # documents keep the pool as busy as one large one
+        finals: Dict[str, str] = {}
+        pending: Dict[str, List[Future]] = {}
+        for name, chunks in documents.items():
+            chunks = iter(chunks)
+            head = list(itertools.islice(chunks, 2))
+            if len(head) < 2:
+                # Short document: a single plain summary, nothing to merge
+                finals[name] = summarize_prompt(head[0]) if head else ""
+                continue
+            pending[name] = [pool.submit(self._complete, chunk_summarize_prompt(chunk))
+                             for chunk in itertools.chain(head, chunks)]
+
+        # Reduce one level at a time across all documents
+        while pending:
+            next_level: Dict[str, List[Future]] = {}
+            for name, futures in pending.items():
+                groups = self._group([future.result() for future in futures])
+                if len(groups) == 1:
+                    finals[name] = reduce_prompt(groups[0])
+                else:
+                    next_level[name] = [pool.submit(self._complete, reduce_prompt(group)) for group in groups]
+            pending = next_level
+        return finals
+
+    def final_prompt(self, chunks: Iterable[str]) -> str:
+        """Summarize and merge the chunks until one prompt is left; return it unsent
+
+        Lets the caller send (and stream) the last merge itself.
+        """
+        with ThreadPoolExecutor(self.workers) as pool:
+            return self._final_prompts(pool, {"": chunks})[""]
+
+    def summarize_documents(self, documents: Dict[str, Iterable[str]]) -> Dict[str, str]:
+        """Summarize several documents (name -> chunks) on one worker pool"""
+        with ThreadPoolExecutor(self.workers) as pool:
+            finals = self._final_prompts(pool, documents)
+            futures = {name: pool.submit(self._complete, prompt)
+                       for name, prompt in finals.items() if prompt}
+            return {name: futures[name].result() if name in futures else "" for name in documents}
+
+    def summarize(self, text: str) -> str:
+        return self.summarize_documents({"": chunk_text(text, self.chunk_tokens)})[""]
+
+    def summarize_files(self, paths: List[str]) -> Dict[str, str]:
+        """Summarize text files, streaming each one from disk"""
+        return self.summarize_documents({path: iter_file_chunks(path, self.chunk_tokens) for path in paths})
+
+    def stats(self) -> Dict[str, int]:
+        return {"api_calls": self.api_calls, "cached_calls": self.cached_calls}
+
+
+def write_summaries(summaries: Dict[str, str], output_dir: str) -> List[str]:
+    """Write each summary to <output_dir>/<name>.summary.txt"""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for path, summary in summaries.items():
+        name = os.path.splitext(os.path.basename(path))[0] if path != "-" else "stdin"
+        target = os.path.join(output_dir, f"{name}.summary.txt")
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(summary.strip() + "\n")
+        written.append(target)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize long market/financial documents")
+    parser.add_argument("paths", nargs="+", help="text files, folders of .txt/.md files, or - for stdin")
+    parser.add_argument("--output", help="write <name>.summary.txt files here instead of printing")
+    parser.add_argument("--workers", type=int, help="concurrent API calls (default: SUMMARY_WORKERS)")
+    parser.add_argument("--chunk-tokens", type=int, help="chunk size (default: SUMMARY_CHUNK_TOKENS)")
+    args = parser.parse_args()
+
+    paths: List[str] = []
+    for path in args.paths:
+        paths.extend(find_text_files(path) if os.path.isdir(path) else [path])
+
+    pipeline = SummaryPipeline(workers=args.workers, chunk_tokens=args.chunk_tokens)
+    summaries = pipeline.summarize_files(paths)
+    if args.output:
+        for target in write_summaries(summaries, args.output):
+            print(target)
+    else:
+        for path, summary in summaries.items():
+            if len(summaries) > 1:
+                print(f"=== {path} ===")
+            print(summary.strip() + "\n")
+    print(f"API calls: {pipeline.api_calls}, cached: {pipeline.cached_calls}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
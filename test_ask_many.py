@@ -0,0 +1,117 @@
+"""Behavior tests for answering several questions at once and the FAQ warm-up"""
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from bot import FinancialBot
+from response_cache import LRUCache
+from scheduler import RequestScheduler
+
+
+class ApiError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class EchoBackend:
+    """Answers with the prompt; earlier prompts take longer, so they finish last"""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = fail_on
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def complete(self, model, messages, **params):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+            delay = 0.05 / len(self.prompts)
+        time.sleep(delay)
+        if any(word in prompt for word in self.fail_on):
+            raise ApiError(400)
+        message = SimpleNamespace(content=f"Answer to {prompt}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def make_bot(tmp_path):
+    from conversation_log import ConversationLog
+
+    logs = []
+
+    def make(backend, cache=None):
+        log = ConversationLog(str(tmp_path / f"log{len(logs)}"), fsync=False)
+        logs.append(log)
+        bot = FinancialBot(response_cache=cache or LRUCache(), api_key="test", backend=backend, conversation_log=log)
+        bot.scheduler = RequestScheduler(requests_per_second=0, tokens_per_minute=0, max_retries=0)
+        return bot
+
+    yield make
+    for log in logs:
+        log.close()
+
+
+def test_answers_come_back_in_input_order(make_bot):
+    backend = EchoBackend()
+    bot = make_bot(backend)
+    questions = [f"What is asset class {i}?" for i in range(6)]
+    answers = bot.answer_questions(questions, workers=6)
+    assert answers == [f"Answer to What is asset class {i}?" for i in range(6)]
+    assert bot.history.messages == []
+
+
+def test_repeated_and_cached_questions_are_sent_once(make_bot):
+    backend = EchoBackend()
+    bot = make_bot(backend)
+    bot.answer_questions(["What is a bond?"])
+    answers = bot.answer_questions(["What is a bond?", " What is a REIT? ", "What is a REIT?"], workers=4)
+    assert answers == ["Answer to What is a bond?", "Answer to What is a REIT?", "Answer to What is a REIT?"]
+    assert backend.prompts == ["What is a bond?", "What is a REIT?"]
+
+
+def test_a_failed_question_only_fails_its_own_slot(make_bot):
+    backend = EchoBackend(fail_on=("REIT",))
+    cache = LRUCache()
+    bot = make_bot(backend, cache)
+    answers = bot.answer_questions(["What is a bond?", "What is a REIT?", "", "What is an ETF?"], workers=4)
+    assert answers[0] == "Answer to What is a bond?"
+    assert answers[1].startswith("❌ API Error")
+    assert answers[2] == "Error: Nothing to ask"
+    assert answers[3] == "Answer to What is an ETF?"
+    # Errors are not cached, so the question is sent again next time
+    bot.answer_questions(["What is a REIT?"])
+    assert backend.prompts.count("What is a REIT?") == 2
+
+
+def test_ask_many_numbers_the_answers(make_bot):
+    bot = make_bot(EchoBackend())
+    reply = bot.ask_many(["What is a bond?", "  ", "What is an ETF?"])
+    assert reply == "1. What is a bond?\nAnswer to What is a bond?\n\n2. What is an ETF?\nAnswer to What is an ETF?"
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "test")
+    monkeypatch.delenv("RESPONSE_CACHE_PATH", raising=False)
+    monkeypatch.delenv("SEMANTIC_CACHE_PATH", raising=False)
+    monkeypatch.delenv("CONVERSATION_LOG_DIR", raising=False)
+    config.reload_settings()
+    yield
+    monkeypatch.undo()
+    config.reload_settings()
+
+
+def test_warm_up_refuses_to_fill_a_cache_that_is_lost_on_exit(api_key, monkeypatch, tmp_path, capsys):
+    import warm_up
+
+    faq = tmp_path / "faq.txt"
+    faq.write_text("What is a bond?\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["warm_up.py", str(faq)])
+    with pytest.raises(SystemExit):
+        warm_up.main()
+    assert "RESPONSE_CACHE_PATH" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+"""Behavior tests for the vectorized batch calculators"""
+import re
+
+import numpy as np
+import pytest
+
+from batch_calc import (compound_interest, currency_conversion, percentage_returns, returns_from_file,
+                        save_table, summarize_returns)
+from bot import FinancialBot
+
+
+@pytest.fixture
+def bot(tmp_path):
+    from conversation_log import ConversationLog
+
+    log = ConversationLog(str(tmp_path / "log"), fsync=False)
+    yield FinancialBot(api_key="test", conversation_log=log)
+    log.close()
+
+
+def _field(text, label):
+    """The number after a label in a scalar calculator's reply, or None for an error"""
+    match = re.search(rf"{label}:\s+\$?(-?[\d,]+\.\d+)", text)
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+@pytest.mark.parametrize("principal,rate,years,n", [
+    (1000, 5, 10, 1), (2500, 3.75, 7.5, 12), (1000, 0, 10, 4), (1000, 5, 0, 1), (0, 5, 10, 1),
+])
+def test_compound_interest_matches_the_scalar_calculator(bot, principal, rate, years, n):
+    scalar = bot.calculate_compound_interest(principal, rate, years, n)
+    batch = compound_interest([principal], [rate], [years], [n])
+    expected = _field(scalar, "Final Amount")
+    if expected is None:
+        # Rows the scalar calculator rejects are NaN, not an error
+        assert scalar.startswith("Error") and np.isnan(batch["final_amount"][0])
+    else:
+        assert batch["final_amount"][0] == pytest.approx(expected, abs=0.005)
+        assert batch["interest_earned"][0] == pytest.approx(_field(scalar, "Interest Earned"), abs=0.005)
+
+
+def test_compound_interest_broadcasts_a_whole_portfolio(bot):
+    principal = np.array([1000.0, 5000.0, 250.0, 1000.0])
+    rate = np.array([5.0, 0.0, 12.5, 4.0])
+    years = np.array([10.0, 3.0, 1.0, 0.0])
+    batch = compound_interest(principal, rate, years, 12)["final_amount"]
+    for i in range(3):
+        scalar = bot.calculate_compound_interest(principal[i], rate[i], years[i], 12)
+        assert batch[i] == pytest.approx(_field(scalar, "Final Amount"), abs=0.005)
+    assert batch[1] == 5000.0
+    assert np.isnan(batch[3])
+
+
+@pytest.mark.parametrize("buy,sell", [(100, 150), (80.5, 60.25), (100, 100), (0, 50)])
+def test_percentage_returns_match_the_scalar_calculator(bot, buy, sell):
+    scalar = bot.calculate_percentage_return(buy, sell)
+    batch = percentage_returns([buy], [sell])
+    expected = _field(scalar, "Return %")
+    if expected is None:
+        assert np.isnan(batch["return_pct"][0])
+    else:
+        assert batch["return_pct"][0] == pytest.approx(expected, abs=0.005)
+        assert batch["profit_loss"][0] == pytest.approx(_field(scalar, "Profit/Loss"), abs=0.005)
+
+
+def test_currency_conversion_matches_the_scalar_calculator(bot):
+    scalar = bot.currency_conversion(1234.5, "USD", "EUR", 0.92)
+    assert currency_conversion([1234.5], 0.92)[0] == pytest.approx(_field(scalar, "Result"), abs=0.005)
+    assert np.isnan(currency_conversion([10.0], 0.0)[0])
+
+
+def test_file_summary_is_quantity_weighted_and_skips_invalid_rows(tmp_path):
+    path = str(tmp_path / "positions.csv")
+    save_table(path, {"buy_price": np.array([100.0, 50.0, 0.0]),
+                      "sell_price": np.array([110.0, 40.0, 10.0]),
+                      "quantity": np.array([1.0, 4.0, 9.0])})
+    summary = summarize_returns(returns_from_file(path))
+    assert (summary["positions"], summary["invalid"]) == (3, 1)
+    assert summary["total_cost"] == pytest.approx(300.0)
+    assert summary["total_value"] == pytest.approx(270.0)
+    assert summary["total_return_pct"] == pytest.approx(-10.0)
@@ -0,0 +1,124 @@
+"""Behavior tests for the local cash-flow engine"""
+import warnings
+
+import numpy as np
+import pytest
+
+from cashflow import (MAX_PERIODS, amortization_schedule, contribution_schedule, format_amortization,
+                      format_future_value, future_value, irr, loan_payment, npv, schedule_periods)
+
+
+def _loop_balances(principal, monthly_rate, payment, periods):
+    balance, balances = principal, []
+    for _ in range(periods):
+        balance = balance * (1 + monthly_rate) - payment
+        balances.append(max(balance, 0.0))
+    return balances
+
+
+def test_loan_payment_matches_textbook_value():
+    # $300k over 30 years at 6.5%: $1,896.20 a month
+    assert float(loan_payment(300_000, 6.5, 30)) == pytest.approx(1896.20, abs=0.01)
+
+
+def test_zero_rate_payment_is_principal_over_periods():
+    assert float(loan_payment(1200, 0, 1)) == pytest.approx(100.0)
+
+
+def test_amortization_matches_loop_and_pays_off():
+    table = amortization_schedule(300_000, 6.5, 30)
+    assert table["period"].size == 360
+    expected = _loop_balances(300_000, 0.065 / 12, table["payment"][0], 360)
+    np.testing.assert_allclose(table["balance"], expected, atol=1e-6)
+    assert table["balance"][-1] == 0.0
+    assert float(table["principal"].sum()) == pytest.approx(300_000)
+
+
+def test_extra_payment_shortens_the_loan():
+    table = amortization_schedule(300_000, 6.5, 30, extra_payment=500)
+    assert table["period"].size == 210
+    assert float(table["principal"].sum()) == pytest.approx(300_000)
+    # The last payment only settles what is left
+    assert table["payment"][-1] < table["payment"][0]
+
+
+def test_summary_shows_the_scheduled_payment():
+    # A huge extra payment settles the loan at once; "Payment:" is still the regular one
+    text = format_amortization(300_000, 6.5, 30, extra_payment=1_000_000)
+    assert "Payment:          $1,896.20 per period" in text
+    assert "Paid Off After:   1 payments" in text
+
+
+@pytest.mark.parametrize("years,periods_per_year", [(2.5, 1), (10.04, 12), (0.6, 1)])
+def test_fractional_term_repays_the_principal(years, periods_per_year):
+    table = amortization_schedule(100_000, 6, years, periods_per_year)
+    assert table["period"].size == schedule_periods(years, periods_per_year)
+    assert float(table["principal"].sum()) == pytest.approx(100_000)
+    assert float(table["payment"].sum()) == pytest.approx(100_000 + float(table["interest"].sum()))
+    # Every period pays the same level payment
+    np.testing.assert_allclose(table["payment"], table["payment"][0])
+
+
+def test_rounded_term_is_shown():
+    assert "3 years (3 payments), rounded from 2.5 years" in format_amortization(100_000, 6, 2.5, 1)
+    assert "10 years (120 payments)\n" in format_amortization(100_000, 6, 10)
+    assert "2 years (2 contributions), rounded from 1.5 years" in format_future_value(100, 6, 1.5, 1)
+
+
+@pytest.mark.parametrize("years,periods_per_year", [(0.01, 12), (0, 12), (MAX_PERIODS + 1, 1), (100_000, 12)])
+def test_schedule_periods_are_bounded(years, periods_per_year):
+    with pytest.raises(ValueError):
+        schedule_periods(years, periods_per_year)
+    with pytest.raises(ValueError):
+        amortization_schedule(1000, 5, years, periods_per_year)
+
+
+def test_extreme_rates_do_not_warn_or_produce_nan():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        table = amortization_schedule(1000, 100_000, 100)
+        assert np.isfinite(table["balance"]).all()
+        with pytest.raises(ValueError):
+            contribution_schedule(100, 100_000, 100)
+
+
+def test_future_value_of_contributions():
+    # $100 a month for 10 years at 6%, compounded monthly
+    value = float(future_value(100, 6, 10))
+    assert value == pytest.approx(16387.93, abs=0.01)
+    table = contribution_schedule(100, 6, 10, present_value=1000)
+    assert table["contributed"][-1] == pytest.approx(1000 + 100 * 120)
+    assert table["balance"][-1] == pytest.approx(value + 1000 * (1 + 0.005) ** 120)
+
+
+def test_zero_rate_future_value():
+    assert float(future_value(50, 0, 2)) == pytest.approx(1200.0)
+
+
+def test_npv_first_flow_is_not_discounted():
+    assert float(npv(10, [-100, 110])) == pytest.approx(0.0)
+    assert float(npv(8, [-1000, 300, 400, 500])) == pytest.approx(-1000 + 300 / 1.08 + 400 / 1.08 ** 2 + 500 / 1.08 ** 3)
+
+
+def test_npv_per_scenario():
+    values = npv([0, 10], [[-100, 110], [-100, 110]])
+    np.testing.assert_allclose(values, [10.0, 0.0], atol=1e-12)
+
+
+def test_irr_roots_give_zero_npv():
+    flows = [-1000, 300, 400, 500]
+    rate = float(irr(flows))
+    assert float(npv(rate, flows)) == pytest.approx(0.0, abs=1e-6)
+
+
+def test_irr_batch_with_no_root_rows():
+    flows = np.array([[-100, 110, 0], [-100, 0, 121], [100, 50, 50]], dtype=float)
+    rates = irr(flows)
+    np.testing.assert_allclose(rates[:2], [10.0, 10.0], atol=1e-8)
+    assert np.isnan(rates[2])
+
+
+def test_irr_falls_back_to_bisection_for_extreme_returns():
+    # A 1000x return diverges from the default Newton guess
+    rate = float(irr([-1, 1000]))
+    assert rate == pytest.approx(99_900.0, rel=1e-6)
@@ -0,0 +1,203 @@
+"""Behavior tests for the durable conversation log"""
+import os
+import time
+
+import pytest
+
+from bot import FinancialBot
+from conversation_log import FILE_HEADER, ConversationLog
+from prompts import explain_prompt
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return str(tmp_path / "log")
+
+
+@pytest.fixture
+def log(log_dir):
+    log = ConversationLog(log_dir, fsync=False)
+    yield log
+    log.close()
+
+
+def _segments(log_dir):
+    return sorted(name for name in os.listdir(log_dir) if name.endswith(".log"))
+
+
+def test_append_and_read_back(log):
+    log.append("a", "What is a bond?", "A loan to an issuer.", "question", prompt_tokens=12,
+               reply_tokens=6, in_history=True)
+    log.append("b", "/compound 1000 5 10", "$1,647.01", "compound")
+    log.append("a", "/return 100 150", "Error: bad input", "calc_return", error=True)
+    turns = log.turns("a")
+    assert [turn.user for turn in turns] == ["What is a bond?", "/return 100 150"]
+    assert turns[0].in_history and not turns[1].in_history
+    assert turns[1].error
+    assert (turns[0].prompt_tokens, turns[0].reply_tokens) == (12, 6)
+    assert sorted(log.sessions()) == ["a", "b"]
+    assert "b" in log and "c" not in log
+
+
+def test_history_entry_is_kept_apart_from_the_user_text(log):
+    prompt = explain_prompt("P/E ratio")
+    log.append("s", "/explain P/E ratio", "Price over earnings.", "explain", in_history=True,
+               history_user=prompt)
+    log.append("s", "And a bond?", "A loan.", "question", in_history=True, history_user="And a bond?")
+    explained, asked = log.turns("s")
+    assert (explained.user, explained.history_user) == ("/explain P/E ratio", prompt)
+    assert asked.history_user == asked.user
+
+
+def test_reopen_rebuilds_the_index_across_segments(log_dir):
+    log = ConversationLog(log_dir, segment_bytes=256, fsync=False)
+    for i in range(20):
+        log.append(f"s{i % 3}", f"question {i}", "x" * 50, in_history=True)
+    assert len(_segments(log_dir)) > 1
+    log.close()
+    reopened = ConversationLog(log_dir, fsync=False)
+    try:
+        assert [turn.user for turn in reopened.turns("s1")] == [f"question {i}" for i in range(1, 20, 3)]
+    finally:
+        reopened.close()
+
+
+def test_torn_tail_is_cut_off(log_dir):
+    log = ConversationLog(log_dir, fsync=False)
+    log.append("s", "first", "reply")
+    log.append("s", "second", "reply")
+    log.close()
+    path = os.path.join(log_dir, _segments(log_dir)[-1])
+    os.truncate(path, os.path.getsize(path) - 3)
+    log = ConversationLog(log_dir, fsync=False)
+    try:
+        assert [turn.user for turn in log.turns("s")] == ["first"]
+        log.append("s", "third", "reply")
+        assert [turn.user for turn in log.turns("s")] == ["first", "third"]
+    finally:
+        log.close()
+
+
+def test_delete_hides_a_session_and_compact_drops_it(log):
+    log.append("keep", "q", "r")
+    log.append("gone", "q", "r")
+    assert log.delete_session("gone")
+    assert log.turns("gone") == [] and "gone" not in log
+    assert not log.delete_session("never")
+    # Turns after the tombstone belong to a new conversation
+    log.append("gone", "again", "r")
+    result = log.compact()
+    assert result["records_after"] == 2
+    assert [turn.user for turn in log.turns("gone")] == ["again"]
+    assert [turn.user for turn in log.turns("keep")] == ["q"]
+
+
+def test_compact_drops_expired_turns(log):
+    log.append("old", "q", "r", timestamp=time.time() - 10 * 86400)
+    log.append("new", "q", "r")
+    log.compact(retention_days=1)
+    assert "old" not in log
+    assert "new" in log
+
+
+def test_analytics_counts_terms_commands_and_errors(log):
+    log.append("a", "/explain P/E ratio", "r", "explain", prompt_tokens=10, reply_tokens=5,
+               history_user=explain_prompt("P/E ratio"))
+    log.append("b", "/explain p/e ratio", "r", "explain", prompt_tokens=10, reply_tokens=5)
+    log.append("b", "What is a bond?", "Error: timeout", "question", error=True)
+    report = log.analytics()
+    assert (report["turns"], report["sessions"], report["errors"]) == (3, 2, 1)
+    assert report["prompt_tokens"] == 20
+    assert dict(report["commands"]) == {"explain": 2, "question": 1}
+    assert report["top_terms"][0][1] == 2
+
+
+def test_read_only_reader_next_to_the_writer(log, log_dir):
+    log.append("s", "q", "r")
+    reader = ConversationLog(log_dir, read_only=True)
+    try:
+        assert [turn.user for turn in reader.turns("s")] == ["q"]
+        with pytest.raises(ValueError):
+            reader.append("s", "q", "r")
+    finally:
+        reader.close()
+
+
+def test_second_writer_is_refused_until_the_first_closes(log, log_dir):
+    with pytest.raises(ValueError, match="already open for writing"):
+        ConversationLog(log_dir)
+    log.close()
+    ConversationLog(log_dir).close()
+
+
+def test_older_format_is_reported(log_dir):
+    os.makedirs(log_dir)
+    with open(os.path.join(log_dir, "conversations-000001.log"), "wb") as f:
+        f.write(FILE_HEADER[:6] + b"\x01\n" + bytes(64))
+    with pytest.raises(ValueError, match="another conversation log format"):
+        ConversationLog(log_dir)
+
+
+def test_resume_restores_the_exact_history(log, log_dir):
+    bot = FinancialBot(api_key="test", conversation_log=log)
+    # What /explain leaves behind: the prompt template in history, the command in the log
+    answered = bot.history.answered
+    bot.history.add_user(explain_prompt("P/E ratio"))
+    bot.history.add_assistant("Price over earnings.")
+    bot._append_turn("/explain P/E ratio", "Price over earnings.", "explain", answered)
+    # /summarize keeps a stub instead of the long payload
+    answered = bot.history.answered
+    bot.history.add_user("Summarize: " + "word " * 200, stub="[Summarized a 200-word text]")
+    bot.history.add_assistant("A summary.")
+    bot._append_turn("/summarize long.txt", "A summary.", "summarize", answered)
+    # Calculators do not go through history
+    bot._append_turn("/compound 1000 5 10", "$1,647.01", "compound", bot.history.answered)
+
+    resumed = FinancialBot(api_key="test", conversation_log=log)
+    assert resumed.resume(bot.session_id) == 2
+    assert resumed.history.messages == bot.history.messages
+
+
+def test_auto_compaction_applies_retention_after_rotation(log_dir):
+    log = ConversationLog(log_dir, segment_bytes=256, retention_days=1, fsync=False, auto_compact=True)
+    try:
+        log.append("old", "q", "x" * 50, timestamp=time.time() - 10 * 86400)
+        for i in range(10):
+            log.append("new", f"q{i}", "x" * 50)
+        deadline = time.time() + 5
+        while "old" in log and time.time() < deadline:
+            time.sleep(0.01)
+        assert "old" not in log
+        assert len(log.turns("new")) == 10
+        assert log.stats()["compaction_errors"] == 0
+    finally:
+        log.close()
+
+
+def test_reader_keeps_its_segments_across_a_compaction(log_dir):
+    log = ConversationLog(log_dir, segment_bytes=256, fsync=False)
+    try:
+        for i in range(10):
+            log.append("s", f"q{i}", "x" * 50)
+        scan = log.scan()
+        first = next(scan)
+        log.compact()
+        assert [first.user] + [turn.user for turn in scan][:9] == [f"q{i}" for i in range(10)]
+    finally:
+        log.close()
+
+
+def test_bot_runs_without_a_log_another_process_writes(log, log_dir, monkeypatch):
+    import config
+    import conversation_log
+
+    monkeypatch.setenv("CONVERSATION_LOG_DIR", log_dir)
+    config.reload_settings()
+    monkeypatch.setattr(conversation_log, "_default_log", None)
+    try:
+        bot = FinancialBot(api_key="test")
+        assert bot.conversation_log is None
+        assert "already open for writing" in bot.conversation_log_error
+    finally:
+        monkeypatch.delenv("CONVERSATION_LOG_DIR")
+        config.reload_settings()
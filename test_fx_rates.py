@@ -0,0 +1,28 @@
+"""Behavior tests for the local exchange-rate table"""
+import pytest
+
+from config import BUNDLED_FX_RATES
+from fx_rates import FxRateStore, build_index
+
+
+def test_bundled_snapshot_loads_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = FxRateStore(BUNDLED_FX_RATES, "USD")
+    assert store.rate("USD", "EUR") == pytest.approx(0.9709)
+    assert "2025-01-02" in store.source()
+    assert "not a live rate" in store.source()
+
+
+def test_cross_rates_go_through_the_pivot():
+    index = build_index([("USD", "EUR", 0.9), ("USD", "JPY", 150.0)], "USD")
+    assert index[("EUR", "JPY")] == pytest.approx(150.0 / 0.9)
+    assert index[("EUR", "USD")] == pytest.approx(1 / 0.9)
+
+
+def test_json_snapshot_and_unknown_pair(tmp_path):
+    path = tmp_path / "rates.json"
+    path.write_text('{"base": "USD", "date": "2026-10-16", "rates": {"EUR": 0.92}}')
+    store = FxRateStore(str(path), "USD")
+    assert store.convert(100, "usd", "eur") == pytest.approx(92.0)
+    assert store.rate("USD", "GBP") is None
+    assert store.source().startswith("2026-10-16")
@@ -0,0 +1,77 @@
+"""Behavior tests for the token-budgeted conversation history"""
+from history import HistoryManager, count_message_tokens, extractive_summary
+
+SYSTEM = [{"role": "system", "content": "You are a financial educator. " * 10}]
+
+
+def _history(budget=200, summary=60):
+    return HistoryManager(max_prompt_tokens=budget, max_summary_tokens=summary)
+
+
+def _turn(history, i, words=20):
+    history.add_user(f"Question {i}: " + "word " * words)
+    history.add_assistant(f"Answer {i}. " + "text " * words)
+
+
+def test_short_conversation_is_sent_verbatim():
+    history = _history(budget=1000)
+    _turn(history, 1)
+    history.add_user("And a bond?")
+    messages = history.build_messages(SYSTEM)
+    assert messages[0] == SYSTEM[0]
+    assert [m["content"][:10] for m in messages[1:]] == ["Question 1", "Answer 1. ", "And a bond"]
+    assert history.summary_lines == []
+
+
+def test_oldest_turns_are_folded_first_and_the_system_prompt_kept():
+    history = _history(budget=500, summary=1000)
+    for i in range(1, 6):
+        _turn(history, i, words=60)
+    history.add_user("Latest question?")
+    messages = history.build_messages(SYSTEM)
+
+    assert messages[0] == SYSTEM[0]
+    assert count_message_tokens(messages) <= 500
+    assert messages[-1]["content"] == "Latest question?"
+    # Turns 1..k are in the summary in order, turns k+1..5 are still verbatim
+    folded = len(history.summary_lines)
+    assert 1 <= folded < 5
+    assert [line.split(":")[1].strip() for line in history.summary_lines] == [f"Question {i}" for i in range(1, folded + 1)]
+    assert history.messages[0]["content"].startswith(f"Question {folded + 1}:")
+    assert len(history.messages) == 2 * (5 - folded) + 1
+    assert messages[1]["role"] == "system" and "Summary of the earlier conversation" in messages[1]["content"]
+
+
+def test_summary_is_bounded_by_dropping_its_oldest_lines():
+    history = _history(budget=120, summary=40)
+    for i in range(1, 10):
+        _turn(history, i)
+    history.build_messages(SYSTEM)
+    assert len(history.summary_lines) >= 1
+    assert "Question 1" not in history.summary
+
+
+def test_single_message_over_budget_is_still_sent():
+    history = _history(budget=100)
+    _turn(history, 1, words=5)
+    huge = "Please explain " + "diversification " * 200
+    history.add_user(huge)
+    messages = history.build_messages(SYSTEM)
+    # Earlier turns make room, but the question itself is never dropped or cut
+    assert messages[-1]["content"] == huge
+    assert [m for m in messages if m["role"] != "system"] == [{"role": "user", "content": huge}]
+
+
+def test_stub_replaces_an_answered_payload():
+    history = _history(budget=10_000)
+    history.add_user("Summarize: " + "news " * 500, stub="[Summarized a news article]")
+    assert history.messages[-1]["content"].startswith("Summarize:")
+    history.add_assistant("Markets rose.")
+    assert history.messages[0]["content"] == "[Summarized a news article]"
+    assert history.last_user_entry == "[Summarized a news article]"
+
+
+def test_extractive_summary_keeps_question_and_first_sentence():
+    line = extractive_summary([{"role": "user", "content": "What is a bond?"},
+                               {"role": "assistant", "content": "A loan to an issuer. It pays interest."}])
+    assert line == "User asked: What is a bond? | Assistant: A loan to an issuer."
@@ -0,0 +1,123 @@
+"""Behavior tests for the local fast-path intent router"""
+import pytest
+
+from intent_router import IntentRouter, KeywordClassifier
+
+
+@pytest.fixture
+def router():
+    return IntentRouter()
+
+
+def test_compound_with_frequency(router):
+    intent = router.route("what's 5% compounded monthly on 1000 for 10 years")
+    assert intent.name == "compound"
+    assert intent.args == {"principal": 1000.0, "annual_rate": 5.0, "years": 10.0, "compounds_per_year": 12}
+
+
+def test_compound_times_per_year(router):
+    intent = router.route("invest $2,500 at 4% compounded 4 times a year for 3 years")
+    assert intent.args["principal"] == 2500.0
+    assert intent.args["compounds_per_year"] == 4
+
+
+def test_fractional_years_are_kept(router):
+    intent = router.route("invest $1000 at 5% for 2.5 years")
+    assert intent.name == "compound"
+    assert intent.args["years"] == 2.5
+
+
+@pytest.mark.parametrize("text", [
+    # Regular contributions are not a lump sum
+    "invest $500 a month for 10 years at 7%",
+    "invest $500 per month at 7% for 10 years",
+    "I invest 200 monthly at 6% for 15 years",
+    "monthly contributions of $300 invested at 5% for 20 years",
+    "invest $1000 at 5% for 2 years and 6 months",
+    # Borrowing is not growth
+    "interest on my $300000 mortgage at 6% for 30 years",
+    "how much interest on a $20,000 loan at 7% over 5 years",
+    "I have $5000 of credit card debt at 22% interest for 2 years",
+    # Declines are not +rate growth
+    "what is $1000 worth if it loses 5% per year for 10 years",
+    "my $10,000 investment declines 3% a year for 4 years, what is it worth",
+    "if $5000 invested drops 10% per year for 3 years",
+    # Inflation is a loss of value, not growth
+    "what is $1000 worth in 10 years with 3% inflation",
+    "what is the real value of $5000 invested at 6% for 20 years",
+    # Ages are not terms
+    "I'm 30 years old with $5000, at 7% return what is it worth",
+    "at age 40 I invest $10,000 at 6% for 25 years",
+    # Calendar years are not prices
+    "What was the S&P 500 return from 2010 to 2020?",
+    "how much did the market return from 2008 to 2018",
+    # Advice, not arithmetic
+    "should I invest $1000 in gold or stocks at 5% for 10 years?",
+    "should I invest $10,000 at 4% for 5 years or pay off my car?",
+])
+def test_llm_cues_fall_through(router, text):
+    assert router.route(text) is None
+
+
+def test_convert_with_rate(router):
+    intent = router.route("convert 100 USD to EUR at 0.9")
+    assert intent == ("convert", {"amount": 100.0, "from_currency": "USD", "to_currency": "EUR",
+                                  "exchange_rate": 0.9})
+
+
+def test_convert_unknown_code_goes_to_llm(router):
+    assert router.route("convert 100 abc to xyz at 2") is None
+
+
+def test_return(router):
+    intent = router.route("I bought at $100 and sold at $150, what's my return?")
+    assert intent == ("calc_return", {"buy_price": 100.0, "sell_price": 150.0})
+
+
+def test_dollar_prices_in_the_year_range_stay_local(router):
+    intent = router.route("I bought at $1,950 and sold at $2,010, what's my return?")
+    assert intent == ("calc_return", {"buy_price": 1950.0, "sell_price": 2010.0})
+
+
+def test_loss_on_sale_stays_local(router):
+    intent = router.route("bought it at 120 and sold at 90, what was my loss?")
+    assert intent == ("calc_return", {"buy_price": 120.0, "sell_price": 90.0})
+
+
+@pytest.mark.parametrize("text", [
+    "What is a stock?",
+    "How does compound interest work?",
+    "Explain the 50/30/20 rule",
+])
+def test_non_calculations_go_to_llm(router, text):
+    assert router.route(text) is None
+
+
+def test_stats_count_routes(router):
+    router.route("invest $1000 at 5% for 10 years")
+    router.route("What is a stock?")
+    stats = router.stats()
+    assert (stats["local"], stats["llm"]) == (1, 1)
+    assert stats["by_intent"] == {"compound": 1}
+
+
+def test_classifier_picks_intent_for_missed_phrasing():
+    classifier = KeywordClassifier.fit([
+        ("1000 at 5% over 10 years", "compound"),
+        ("1000 at 5% for 10 years", "compound"),
+        ("what is a bond", "llm"),
+    ])
+    router = IntentRouter(classifier)
+    # No trigger word; the classifier picks compound and the regexes extract the parameters
+    intent = router.route("$1000 at 5% over 10 years")
+    assert intent.name == "compound"
+    assert intent.args["principal"] == 1000.0
+
+
+def test_classifier_round_trip(tmp_path):
+    classifier = KeywordClassifier({"compound": {"bias": -1.0, "weights": {"compounded": 2.0}}})
+    path = tmp_path / "router.json"
+    classifier.save(str(path))
+    loaded = KeywordClassifier.load(str(path))
+    assert loaded.predict("compounded yearly") == "compound"
+    assert loaded.predict("hello") is None
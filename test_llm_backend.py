@@ -0,0 +1,153 @@
+"""Behavior tests for local/remote routing (no model or network needed)"""
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from llm_backend import LocalBackend, RoutingBackend, _LocalStream, answered_locally, is_simple_request
+from prompts import SYSTEM_PREFIX, explain_prompt
+
+
+def _messages(*prompts):
+    messages = list(SYSTEM_PREFIX)
+    for i, prompt in enumerate(prompts):
+        messages.append({"role": "user" if i % 2 == 0 else "assistant", "content": prompt})
+    return messages
+
+
+def _request(*prompts):
+    return {"model": "mistral-small-latest", "messages": _messages(*prompts), "temperature": 0.2, "max_tokens": 64}
+
+
+def _response(text, backend=None):
+    response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=None)
+    if backend:
+        response.backend = backend
+    return response
+
+
+class FakeLocal:
+    """Stands in for LocalBackend: ready/loading/failed states and a scripted reply"""
+
+    def __init__(self, ready=True, load_error=None, fail=False):
+        self.ready = ready
+        self.load_error = load_error
+        self.fail = fail
+        self.in_flight = 0
+        self.warm_ups = 0
+        self.calls = 0
+
+    def warm_up(self):
+        self.warm_ups += 1
+
+    def complete(self, **request):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("local failure")
+        return _response("local", LocalBackend.name)
+
+    async def complete_async(self, **request):
+        return self.complete(**request)
+
+    def stats(self):
+        return {}
+
+
+class FakeRemote:
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, **request):
+        self.calls += 1
+        return _response("remote")
+
+    async def complete_async(self, **request):
+        return self.complete(**request)
+
+
+def _routing(local):
+    return RoutingBackend(local, FakeRemote(), max_prompt_tokens=200, max_queue=1)
+
+
+@pytest.mark.parametrize("messages,simple", [
+    (_messages(explain_prompt("P/E ratio")), True),
+    (_messages("What is an index fund?"), True),
+    # Figures and follow-ups need the larger model
+    (_messages("I have $40,000 and a 6% mortgage, what should I do?"), False),
+    (_messages("What is a stock?", "A share of a company.", "And a bond?"), False),
+    (_messages("word " * 500), False),
+])
+def test_is_simple_request(messages, simple):
+    assert is_simple_request(messages, 200) is simple
+
+
+def test_simple_request_goes_local():
+    routing = _routing(FakeLocal())
+    response = routing.complete(**_request("What is an ETF?"))
+    assert answered_locally(response)
+    assert routing.route_stats.snapshot()["local"] == 1
+
+
+def test_complex_request_goes_remote():
+    routing = _routing(FakeLocal())
+    response = routing.complete(**_request("Compare 5% and 7% returns on $10,000"))
+    assert not answered_locally(response)
+    assert routing.local.calls == 0
+    assert routing.route_stats.snapshot()["remote"] == 1
+
+
+def test_loading_model_is_bypassed_and_warmed_up():
+    routing = _routing(FakeLocal(ready=False))
+    response = routing.complete(**_request("What is an ETF?"))
+    assert response.choices[0].message.content == "remote"
+    assert routing.local.warm_ups == 1
+    assert routing.route_stats.snapshot()["loading"] == 1
+
+
+def test_failed_load_routes_everything_remote_without_counting_loading():
+    routing = _routing(FakeLocal(ready=False, load_error="no llama-cpp-python"))
+    for _ in range(3):
+        routing.complete(**_request("What is an ETF?"))
+    stats = routing.route_stats.snapshot()
+    assert stats["loading"] == 0
+    assert stats["remote"] == 3
+    assert routing.local.warm_ups == 0
+
+
+def test_busy_model_is_bypassed():
+    local = FakeLocal()
+    local.in_flight = 1
+    routing = _routing(local)
+    routing.complete(**_request("What is an ETF?"))
+    assert local.calls == 0
+    assert routing.route_stats.snapshot()["busy"] == 1
+
+
+def test_local_failure_falls_back_to_remote():
+    routing = _routing(FakeLocal(fail=True))
+    response = routing.complete(**_request("What is an ETF?"))
+    assert response.choices[0].message.content == "remote"
+    assert routing.route_stats.snapshot()["fallback"] == 1
+
+
+def test_async_fallback():
+    routing = _routing(FakeLocal(fail=True))
+    response = asyncio.run(routing.complete_async(**_request("What is an ETF?")))
+    assert response.choices[0].message.content == "remote"
+
+
+def test_local_stream_is_marked_and_yields_chunks():
+    stream = _LocalStream("Hello", iter([" world"]))
+    assert answered_locally(stream)
+    with stream as events:
+        text = "".join(event.data.choices[0].delta.content for event in events)
+    assert text == "Hello world"
+
+
+def test_missing_runtime_sets_load_error(monkeypatch):
+    monkeypatch.setitem(sys.modules, "llama_cpp", None)
+    local = LocalBackend(model_path="model.gguf")
+    with pytest.raises(ValueError):
+        local.complete(**_request("What is an ETF?"))
+    assert "llama-cpp-python" in local.load_error
@@ -0,0 +1,115 @@
+"""Behavior tests for the built-in metrics and their Prometheus export"""
+import re
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import metrics
+from metrics import Histogram, Metrics
+
+
+def _usage(prompt, completion):
+    return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+
+
+def _samples(text):
+    """{series: value} of Prometheus text, series written as they appear (name{labels})"""
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_recorded_call_is_exported():
+    registry = Metrics(price_input=2.0, price_output=6.0)
+    registry.record_request("question", 0.3)
+    registry.record_usage("mistral-small-latest", _usage(1000, 500))
+    with registry.stage("api"):
+        pass
+    registry.register("cache", lambda: {"hits": 3, "by_kind": {"explain": 2}, "label": "ignored"})
+
+    text = registry.render()
+    samples = _samples(text)
+    assert samples['financial_bot_requests_total{command="question"}'] == 1
+    assert samples['financial_bot_request_seconds_count{command="question"}'] == 1
+    assert samples['financial_bot_request_seconds_sum{command="question"}'] == pytest.approx(0.3)
+    assert samples['financial_bot_request_seconds_bucket{command="question",le="0.25"}'] == 0
+    assert samples['financial_bot_request_seconds_bucket{command="question",le="0.5"}'] == 1
+    assert samples['financial_bot_request_seconds_bucket{command="question",le="+Inf"}'] == 1
+    assert samples['financial_bot_tokens_total{kind="prompt",model="mistral-small-latest"}'] == 1000
+    assert samples['financial_bot_tokens_total{kind="completion",model="mistral-small-latest"}'] == 500
+    # Prices are per million tokens
+    assert samples['financial_bot_cost_usd_total{model="mistral-small-latest"}'] == pytest.approx(0.005)
+    assert samples['financial_bot_stage_seconds_count{stage="api"}'] == 1
+    assert samples["financial_bot_cache_hits"] == 3
+    assert samples['financial_bot_cache_by_kind{key="explain"}'] == 2
+    assert "financial_bot_cache_label" not in text
+    assert "# TYPE financial_bot_request_seconds histogram" in text
+    assert "# TYPE financial_bot_cache_hits gauge" in text
+
+
+def test_disabled_metrics_record_nothing():
+    registry = Metrics(enabled=False)
+    registry.record_request("question", 0.3)
+    registry.record_usage("mistral-small-latest", _usage(10, 10))
+    with registry.stage("api"):
+        pass
+    assert registry.render() == "\n"
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(0.99) == pytest.approx(2.0 + 2.0 * 0.96)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_write_is_atomic_textfile(tmp_path):
+    registry = Metrics(path=str(tmp_path / "bot.prom"))
+    registry.inc("errors_total", error="TimeoutError")
+    registry.write()
+    assert 'financial_bot_errors_total{error="TimeoutError"} 1' in (tmp_path / "bot.prom").read_text()
+    assert not (tmp_path / "bot.prom.tmp").exists()
+
+
+class Backend:
+    async def complete_async(self, **request):
+        message = SimpleNamespace(content="A loan to an issuer.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=_usage(120, 30))
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "test")
+    monkeypatch.delenv("CONVERSATION_LOG_DIR", raising=False)
+    config.reload_settings()
+    registry = Metrics(price_input=1.0, price_output=1.0)
+    monkeypatch.setattr(metrics, "_default_metrics", registry)
+    yield registry
+    monkeypatch.undo()
+    config.reload_settings()
+
+
+def test_server_exposes_recorded_calls(registry):
+    from starlette.testclient import TestClient
+
+    import server
+    from async_bot import AsyncFinancialBot
+    from session_store import SessionStore
+
+    app = server.create_app(AsyncFinancialBot(backend=Backend(), store=SessionStore()))
+    with TestClient(app) as client:
+        assert client.post("/v1/sessions/abc/messages", json={"message": "What is a bond?"}).status_code == 200
+        assert client.post("/v1/calculate", json={"command": "/compound 1000 5 10"}).status_code == 200
+        response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = _samples(response.text)
+    assert samples['financial_bot_requests_total{command="question"}'] == 1
+    assert samples['financial_bot_requests_total{command="compound"}'] == 1
+    assert samples['financial_bot_tokens_total{kind="prompt",model="mistral-small-latest"}'] == 120
+    assert samples['financial_bot_cost_usd_total{model="mistral-small-latest"}'] == pytest.approx(150 / 1e6)
+    assert samples["financial_bot_server_completed"] == 2
+    assert samples["financial_bot_server_sessions"] == 1
+    assert any(re.match(r"financial_bot_session_store_\w+$", series) for series in samples)
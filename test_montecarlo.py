@@ -0,0 +1,59 @@
+"""Behavior tests for the Monte Carlo portfolio projection"""
+import numpy as np
+import pytest
+
+import montecarlo
+from montecarlo import simulate, summarize
+
+
+def _run(**kwargs):
+    kwargs.setdefault("initial", 10_000)
+    kwargs.setdefault("annual_return", 7)
+    kwargs.setdefault("volatility", 15)
+    kwargs.setdefault("years", 10)
+    kwargs.setdefault("paths", 5_000)
+    kwargs.setdefault("workers", 1)
+    kwargs.setdefault("time_budget", 0)
+    return simulate(**kwargs)
+
+
+@pytest.mark.parametrize("contribution", [0.0, 200.0])
+def test_same_seed_gives_the_same_paths(contribution):
+    first = _run(seed=42, contribution=contribution)
+    second = _run(seed=42, contribution=contribution)
+    assert first["completed"] and first["seed"] == 42
+    np.testing.assert_array_equal(first["values"], second["values"])
+    assert not np.array_equal(first["values"], _run(seed=43, contribution=contribution)["values"])
+
+
+def test_chunks_draw_from_their_own_streams(monkeypatch):
+    whole = _run(seed=7, paths=3_000)["values"]
+    monkeypatch.setattr(montecarlo, "CHUNK_PATHS", 1_000)
+    steps = []
+    chunked = _run(seed=7, paths=3_000, progress=lambda done, total: steps.append(done))
+    assert steps == [1_000, 2_000, 3_000]
+    # The first chunk uses the same stream as a single-chunk run, the others are spawned
+    np.testing.assert_array_equal(chunked["values"][:1_000], whole[:1_000])
+    assert not np.array_equal(chunked["values"][1_000:], whole[1_000:])
+
+
+def test_zero_volatility_matches_compound_interest():
+    values = _run(volatility=0, seed=1)["values"]
+    expected = 10_000 * 1.07 ** 10
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_zero_volatility_with_contributions_matches_an_annuity():
+    values = _run(volatility=0, contribution=100, years=5, seed=1)["values"]
+    growth = 1.07 ** (1 / 12)
+    months = 5 * 12
+    # End-of-month contributions grow for the months left after them
+    expected = 10_000 * 1.07 ** 5 + 100 * sum(growth ** k for k in range(months))
+    np.testing.assert_allclose(values, expected, rtol=1e-9)
+
+
+def test_summary_reports_percentiles_and_shortfall():
+    stats = summarize(np.array([50.0, 100.0, 150.0, 200.0]), invested=120.0)
+    assert stats["p50"] == pytest.approx(125.0)
+    assert stats["mean"] == pytest.approx(125.0)
+    assert stats["shortfall"] == 0.5
@@ -0,0 +1,101 @@
+"""Behavior tests for the response cache backends"""
+import time
+
+import pytest
+
+from response_cache import BaseCache, LRUCache, SQLiteCache, make_key
+
+
+@pytest.fixture(params=["lru", "sqlite"])
+def make_cache(request, tmp_path):
+    caches = []
+
+    def make(max_entries=3, ttl=60.0):
+        if request.param == "lru":
+            cache = LRUCache(max_entries, ttl)
+        else:
+            cache = SQLiteCache(str(tmp_path / "cache.db"), max_entries, ttl)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        if isinstance(cache, SQLiteCache):
+            cache.close()
+
+
+def test_base_cache_is_abstract():
+    with pytest.raises(TypeError):
+        BaseCache()
+
+    class Partial(BaseCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_key_ignores_case_and_punctuation_but_not_params():
+    key = make_key("explain", "P/E Ratio?", "mistral-small-latest", temperature=0.2)
+    assert key == make_key("explain", "  p/e ratio ", "mistral-small-latest", temperature=0.2)
+    assert key != make_key("explain", "p/e ratio", "mistral-small-latest", temperature=0.7)
+    assert key != make_key("summarize", "p/e ratio", "mistral-small-latest", temperature=0.2)
+
+
+def test_get_set_and_stats(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "alpha")
+    assert cache.get("a") == "alpha"
+    # Membership checks are not lookups
+    assert "a" in cache and "b" not in cache
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.001)
+    cache.set("b", "2")
+    time.sleep(0.001)
+    cache.get("a")
+    time.sleep(0.001)
+    cache.set("c", "3")
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_miss(make_cache, monkeypatch):
+    cache = make_cache(ttl=10)
+    cache.set("a", "alpha")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert "a" not in cache
+    assert cache.get("a") is None
+
+
+def test_clear(make_cache):
+    cache = make_cache()
+    cache.set("a", "alpha")
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_is_shared_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache(path, 10, 60)
+    second = SQLiteCache(path, 10, 60)
+    try:
+        first.set("a", "alpha")
+        assert second.get("a") == "alpha"
+    finally:
+        first.close()
+        second.close()
+    reopened = SQLiteCache(path, 10, 60)
+    try:
+        assert reopened.get("a") == "alpha"
+    finally:
+        reopened.close()
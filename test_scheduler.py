@@ -0,0 +1,176 @@
+"""Behavior tests for request pacing, retries and the async bot's concurrency limit"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import scheduler
+from scheduler import BATCH, INTERACTIVE, RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping just advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ApiError(Exception):
+    """Shaped like an SDK error: a status code and response headers"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    return clock
+
+
+def _scheduler(**kwargs):
+    kwargs.setdefault("requests_per_second", 0)
+    kwargs.setdefault("tokens_per_minute", 0)
+    kwargs.setdefault("max_retries", 3)
+    kwargs.setdefault("base_delay", 1.0)
+    kwargs.setdefault("max_delay", 8.0)
+    return RequestScheduler(**kwargs)
+
+
+def _failing(*errors, result="ok"):
+    remaining = list(errors)
+
+    def send():
+        if remaining:
+            raise remaining.pop(0)
+        return result
+    return send
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(rate=2.0, capacity=4.0)
+    bucket.take(4)
+    assert bucket.wait_time(1, 0.0, clock.now) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.wait_time(1, 0.0, clock.now) == 0.0
+    # A reserve keeps part of the bucket back
+    assert bucket.wait_time(1, 0.5, clock.now) == pytest.approx(1.0)
+
+
+def test_requests_are_paced_to_the_rate(clock):
+    paced = _scheduler(requests_per_second=4)
+    start = clock.now
+    for _ in range(5):
+        paced.acquire()
+    # The first request uses the full bucket, the next four wait a quarter second each
+    assert clock.now - start == pytest.approx(1.0)
+    assert paced.stats()["sent"] == 5
+
+
+def test_batch_calls_leave_a_reserve_for_chat(clock):
+    paced = _scheduler(tokens_per_minute=600)
+    # Bucket: 100 tokens, 30 used; batch may not dip below 20, chat may use it all
+    assert paced._try_acquire(INTERACTIVE, 30) == 0
+    assert paced._try_acquire(BATCH, 60) > 0
+    assert paced._try_acquire(INTERACTIVE, 60) == 0
+
+
+def test_retries_back_off_then_succeed(clock, monkeypatch):
+    monkeypatch.setattr(scheduler.random, "uniform", lambda low, high: high)
+    paced = _scheduler()
+    result = paced.call(_failing(ApiError(503), ApiError(502)))
+    assert result == "ok"
+    # Exponential: base_delay * 2 ** attempt
+    assert clock.sleeps == [1.0, 2.0]
+    assert paced.stats()["retries"] == 2
+
+
+def test_final_errors_are_not_retried(clock):
+    paced = _scheduler()
+    with pytest.raises(ApiError):
+        paced.call(_failing(ApiError(400)))
+    assert clock.sleeps == []
+    assert paced.stats()["failures"] == 1
+
+
+def test_retries_give_up_after_max_retries(clock):
+    paced = _scheduler(max_retries=2)
+    with pytest.raises(ApiError):
+        paced.call(_failing(*[ApiError(500)] * 5))
+    assert len(clock.sleeps) == 2
+
+
+def test_retry_after_is_honoured_and_pauses_everyone(clock):
+    paced = _scheduler()
+    paced.call(_failing(ApiError(429, {"retry-after": "3"})))
+    assert clock.sleeps == [3.0]
+    assert paced.stats()["rate_limited"] == 1
+
+
+def test_large_retry_after_is_capped(clock):
+    paced = _scheduler(max_delay=8.0)
+    paced.call(_failing(ApiError(429, {"retry-after": "3600"})))
+    # Neither this caller nor the global pause waits longer than max_delay
+    assert max(clock.sleeps) <= 8.0
+    assert sum(clock.sleeps) == pytest.approx(8.0)
+
+
+class SlowBackend:
+    """Chat backend that records how many calls are in flight at once"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def complete_async(self, **request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        message = SimpleNamespace(content="An answer.")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+@pytest.fixture
+def api_key(monkeypatch):
+    import config
+
+    monkeypatch.setenv("MISTRAL_API_KEY", "test")
+    config.reload_settings()
+    yield
+    monkeypatch.delenv("MISTRAL_API_KEY")
+    config.reload_settings()
+
+
+def test_async_bot_limits_concurrency_and_rejects_overload(api_key):
+    from async_bot import AsyncFinancialBot, BotOverloadedError
+
+    backend = SlowBackend()
+
+    async def run():
+        bot = AsyncFinancialBot(max_concurrency=2, max_pending=4, backend=backend)
+        ok = await asyncio.gather(*(bot.process_user_input(f"s{i}", f"What is asset class {i}?")
+                                    for i in range(4)))
+        calls = [bot.process_user_input(f"t{i}", f"What is a fund type {i}?") for i in range(5)]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return bot, ok, results
+
+    bot, ok, results = asyncio.run(run())
+    assert ok == ["An answer."] * 4
+    assert backend.peak == 2
+    assert sum(isinstance(r, BotOverloadedError) for r in results) == 1
+    assert bot.stats()["rejected"] == 1
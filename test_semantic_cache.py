@@ -0,0 +1,88 @@
+"""Behavior tests for the semantic answer cache"""
+import time
+
+import pytest
+
+from semantic_cache import HashingEmbedder, SemanticCache
+
+
+def _cache(**kwargs):
+    kwargs.setdefault("threshold", 0.85)
+    kwargs.setdefault("max_entries", 10)
+    kwargs.setdefault("ttl", 60.0)
+    return SemanticCache(**kwargs)
+
+
+def test_paraphrases_share_an_answer():
+    cache = _cache()
+    cache.set("What is an ETF?", "A fund traded on an exchange.")
+    assert cache.get("explain ETFs") == "A fund traded on an exchange."
+    assert cache.get("ETF meaning") == "A fund traded on an exchange."
+    assert "etf" in cache
+
+
+def test_different_questions_miss():
+    cache = _cache()
+    cache.set("What is a Roth IRA?", "Taxed now, not later.")
+    assert cache.get("What is a traditional IRA?") is None
+    assert cache.get("What is a bond?") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_filler_only_questions_are_not_stored():
+    cache = _cache()
+    cache.set("what is it?", "?")
+    assert len(cache) == 0
+    assert not HashingEmbedder().embed("please explain").any()
+
+
+def test_same_question_refreshes_the_answer():
+    cache = _cache()
+    cache.set("What is an ETF?", "old")
+    cache.set("what is an etf", "new")
+    assert len(cache) == 1
+    assert cache.get("ETF meaning") == "new"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(max_entries=2)
+    cache.set("What is an ETF?", "etf")
+    time.sleep(0.001)
+    cache.set("What is a bond?", "bond")
+    time.sleep(0.001)
+    cache.get("What is an ETF?")
+    time.sleep(0.001)
+    cache.set("What is a dividend?", "dividend")
+    assert "What is an ETF?" in cache and "What is a dividend?" in cache
+    assert "What is a bond?" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    cache = _cache(ttl=10)
+    cache.set("What is an ETF?", "etf")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("What is an ETF?") is None
+    assert len(cache) == 0
+
+
+def test_invalidate_drops_matching_entries():
+    cache = _cache()
+    cache.set("What is an ETF?", "etf")
+    cache.set("What is a bond?", "bond")
+    assert cache.invalidate("ETF meaning") == 1
+    assert "What is an ETF?" not in cache
+    assert "What is a bond?" in cache
+
+
+@pytest.mark.parametrize("namespace,kept", [("model|v1", 1), ("model|v2", 0)])
+def test_saved_index_is_reloaded_only_for_the_same_namespace(tmp_path, namespace, kept):
+    path = str(tmp_path / "semantic.npz")
+    cache = _cache(path=path, namespace="model|v1")
+    cache.set("What is an ETF?", "etf")
+    cache.save()
+    reloaded = _cache(path=path, namespace=namespace)
+    assert len(reloaded) == kept
+    if kept:
+        assert reloaded.get("explain ETFs") == "etf"
@@ -0,0 +1,89 @@
+"""Behavior tests for the map-reduce summarizer"""
+import random
+import re
+import threading
+import time
+
+from history import count_tokens
+from prompts import CHUNK_SUMMARIZE_TEMPLATE, REDUCE_TEMPLATE, summarize_prompt
+from response_cache import LRUCache
+from summarizer import SummaryPipeline, chunk_text
+
+CHUNK_HEADER = CHUNK_SUMMARIZE_TEMPLATE.split("{text}")[0]
+REDUCE_HEADER = REDUCE_TEMPLATE.split("{text}")[0]
+
+
+def _document(paragraphs=30, words=25):
+    return "\n\n".join(f"P{i:02d}" + " market" * words for i in range(paragraphs))
+
+
+class StubCompletion:
+    """Summarizes a chunk as the ids of its paragraphs and a merge as its parts in order
+
+    Replies arrive in random order, so the pipeline has to put them back.
+    """
+
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, priority, max_tokens, stage):
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(random.uniform(0, 0.005))
+        if prompt.startswith(CHUNK_HEADER):
+            return "[" + " ".join(re.findall(r"P\d\d", prompt)) + "]", True
+        assert prompt.startswith(REDUCE_HEADER)
+        return "(" + " ".join(prompt[len(REDUCE_HEADER):].split("\n\n")) + ")", True
+
+
+def _pipeline(complete, chunk_tokens=120, workers=4):
+    return SummaryPipeline(api_key="test", chunk_tokens=chunk_tokens, workers=workers,
+                           cache=LRUCache(), complete=complete)
+
+
+def test_chunks_keep_paragraphs_whole_and_in_order():
+    text = _document()
+    chunks = chunk_text(text, 120)
+    assert len(chunks) > 3
+    assert all(count_tokens(chunk) <= 120 for chunk in chunks)
+    # Boundaries fall between paragraphs: joining the chunks gives the text back
+    assert "\n\n".join(chunks) == text
+
+
+def test_oversized_paragraph_is_split_on_sentences():
+    paragraph = " ".join(f"Sentence {i} " + "about earnings " * 10 + "ends." for i in range(8))
+    chunks = chunk_text(paragraph, 60)
+    assert len(chunks) > 1
+    assert all(count_tokens(chunk) <= 60 for chunk in chunks)
+    assert all(chunk.rstrip().endswith("ends.") for chunk in chunks)
+
+
+def test_partial_summaries_are_combined_in_order():
+    complete = StubCompletion()
+    pipeline = _pipeline(complete)
+    summary = pipeline.summarize(_document())
+    # Every level of merges keeps document order, however the replies arrived
+    assert re.findall(r"P\d\d", summary) == [f"P{i:02d}" for i in range(30)]
+    assert summary.startswith("(")
+    chunk_calls = [p for p in complete.prompts if p.startswith(CHUNK_HEADER)]
+    assert len(chunk_calls) == len(chunk_text(_document(), 120))
+    assert pipeline.stats() == {"api_calls": len(complete.prompts), "cached_calls": 0}
+
+
+def test_rerun_is_answered_from_the_cache():
+    complete = StubCompletion()
+    pipeline = _pipeline(complete)
+    first = pipeline.summarize(_document())
+    calls = len(complete.prompts)
+    assert pipeline.summarize(_document()) == first
+    assert len(complete.prompts) == calls
+    assert pipeline.stats()["cached_calls"] == calls
+
+
+def test_short_document_is_one_plain_summary():
+    complete = StubCompletion()
+    pipeline = _pipeline(complete, chunk_tokens=1000)
+    text = _document(paragraphs=2)
+    assert pipeline.final_prompt(chunk_text(text, 1000)) == summarize_prompt(text)
+    assert complete.prompts == []
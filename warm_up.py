@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+FAQ warm-up: answer a list of questions ahead of time so users get cached answers.
+
+Questions are read one per line (list markers such as "1." are ignored) and
+answered concurrently by BATCH_WORKERS threads at batch priority, so a
+running bot's chat requests still go first. Answers land in the configured
+response cache or in the semantic cache when SEMANTIC_CACHE_THRESHOLD is set.
+The in-process LRU cache is lost when this script exits, so it refuses to run
+unless RESPONSE_CACHE_PATH or SEMANTIC_CACHE_PATH is set.
+
+    python warm_up.py faq.txt
+    python warm_up.py faq.txt --explain terms.txt --workers 16
+"""
+import argparse
+import time
+
+from bot import FinancialBot, split_questions
+from config import get_settings
+from scheduler import BATCH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", nargs="?", help="file with one question per line")
+    parser.add_argument("--explain", help="file with one term per line to cache /explain answers for")
+    parser.add_argument("--workers", type=int, default=None, help="concurrent requests (default BATCH_WORKERS)")
+    args = parser.parse_args()
+    if not args.questions and not args.explain:
+        parser.error("give a questions file and/or --explain terms")
+
+    bot = FinancialBot()
+    if bot.response_cache is None and bot.semantic_cache is None:
+        parser.error("no cache is enabled (RESPONSE_CACHE_SIZE=0); nothing would be kept")
+    settings = get_settings()
+    keeps_semantic = bot.semantic_cache is not None and settings.semantic_cache_path
+    if not settings.response_cache_path and not keeps_semantic:
+        parser.error("answers would only be kept in this process and lost on exit; "
+                     "set RESPONSE_CACHE_PATH (or SEMANTIC_CACHE_PATH with SEMANTIC_CACHE_THRESHOLD)")
+    if not settings.response_cache_path:
+        # Questions with figures and explanations use the response cache, not the semantic one
+        print("Warning: RESPONSE_CACHE_PATH is not set; explanations and questions with figures will not be kept")
+
+    start = time.perf_counter()
+    answers = []
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            answers += bot.answer_questions(split_questions(f.read()), workers=args.workers, priority=BATCH)
+    if args.explain:
+        with open(args.explain, encoding="utf-8") as f:
+            answers += bot.explain_terms(split_questions(f.read()), workers=args.workers, priority=BATCH)
+    failed = [answer for answer in answers if answer.startswith(("❌", "Error"))]
+    for answer in failed[:5]:
+        print(answer)
+    print(f"Warmed {len(answers) - len(failed)}/{len(answers)} answers in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()